@@ -0,0 +1,17 @@
+# financial_tools: Tools for the analysis of financial assets, including the
+#       value-at-risk of stocks and portfolios, the CAPM, portfolio
+#       optimization, jump tests, cointegration and backtesting.
+#
+# Importing the package, or any of its modules, does no work beyond defining
+# its classes and functions: nothing is downloaded, plotted or printed. The
+# slow imports of scipy, cvxopt and matplotlib are deferred to the functions
+# which use them, so that a module which is imported but only partly used
+# never loads them.
+#
+# The modules are imported individually, for example:
+#       from financial_tools.stock import Stock
+#       from financial_tools.portfolio import Portfolio
+#
+# Each analysis may also be run on local price files from the command line
+# (see cli.py):
+#       python -m financial_tools var MSFT.csv --alpha .05 --position 1000000
@@ -0,0 +1,238 @@
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+from multiprocessing import Pool
+
+CRITERIA = ("aic","bic")
+
+# Autoregressive process
+class AR(object):
+	# The order of the process is selected by an information criterion ("aic" or "bic")
+	# unless it is given. The autocorrelations of the series are calculated once by the
+	# fast Fourier transform, and the Levinson-Durbin recursion over them yields the
+	# partial autocorrelations together with the innovation variance of the fit of every
+	# candidate order, so that the criteria are compared without refitting each order.
+	def __init__(self,time_series,p = None,max_order = None,criterion = "aic"):
+		self.time_series = np.asarray(time_series,dtype = np.float64).ravel()
+		self.n = len(self.time_series)
+		if max_order is None:
+			max_order = int(min(10 * np.log10(self.n),self.n // 2 - 1))
+		self.max_order = max(max_order,1)
+		self.criterion = criterion
+		self.p = self.calculate_times_series_order() if p is None else p
+		self.regression = self.time_series_regression()
+
+	def time_series_regression(self):
+		# Least squares regression of each value on a constant and the previous p values.
+		# The lagged values are a strided view of the series, from which the normal
+		# equations are formed without copying it.
+		regression = {}
+		lags = lag_matrix(self.time_series,self.p)
+		targets = lags[:,0]
+		X = lags[:,1:]
+		n = len(targets)
+
+		sums = np.sum(X,axis = 0)
+		XX = np.empty((self.p + 1,self.p + 1))
+		XX[0,0] = n
+		XX[0,1:] = XX[1:,0] = sums
+		XX[1:,1:] = np.dot(X.T,X)
+		Xy = np.concatenate(([np.sum(targets)],np.dot(X.T,targets)))
+		coefficients = np.linalg.solve(XX,Xy)
+
+		phi = coefficients[1:]
+		mu = coefficients[0] / (1 - np.sum(phi))
+		self.residuals = targets - coefficients[0] - np.dot(X,phi)
+
+		regression["mu"] = mu
+		regression["phi"] = phi
+		regression["sigma2"] = np.dot(self.residuals,self.residuals) / (n - self.p - 1)
+		return regression
+
+	def calculate_times_series_order(self):
+		# The order from zero to the maximum order which minimizes the criterion, where
+		# the innovation variance of each order is that of its Yule-Walker fit.
+		if self.criterion not in CRITERIA:
+			raise ValueError("Unknown information criterion: " + str(self.criterion))
+		recursion = levinson_durbin(self.autocovariance_function(self.max_order),self.max_order)
+		n = float(self.n)
+		orders = np.arange(self.max_order + 1)
+		self.order_selection = {"aic" : n * np.log(recursion["sigma2"]) + 2 * (orders + 1),
+								"bic" : n * np.log(recursion["sigma2"]) + np.log(n) * (orders + 1)}
+		return int(np.argmin(self.order_selection[self.criterion]))
+
+	def autocovariance_function(self,nlags = None):
+		return autocovariance(self.time_series,nlags)
+
+	def autocorrelation_function(self,nlags = None):
+		covariances = self.autocovariance_function(nlags)
+		return covariances / covariances[0]
+
+	def partial_autocorrelation_function(self,nlags = None):
+		nlags = self.max_order if nlags is None else nlags
+		return levinson_durbin(self.autocovariance_function(nlags),nlags)["pacf"]
+
+	def calculate_ljung_box_statistic(self,lags = 10):
+		# The Ljung-Box test of the autocorrelation of the residuals of the regression up to
+		# the given lag, whose statistic is chi-squared with lags - p degrees of freedom when
+		# the residuals are uncorrelated.
+		from scipy import stats
+		n = float(len(self.residuals))
+		residual_autocovariance = autocovariance(self.residuals,lags)
+		correlation = residual_autocovariance[1:] / residual_autocovariance[0]
+		statistic = n * (n + 2) * np.sum(np.square(correlation) / (n - np.arange(1,lags + 1)))
+		degrees_of_freedom = max(lags - self.p,1)
+		return {"statistic" : statistic,"p_value" : stats.chi2.sf(statistic,degrees_of_freedom),
+				"degrees_of_freedom" : degrees_of_freedom}
+
+def autocovariance(time_series,nlags = None):
+	# The sample autocovariances of lags 0 to nlags, as the inverse transform of the power
+	# spectrum of the series padded with zeros so that no lags wrap around. The series may
+	# be a matrix with one series per column, in which case row k holds the autocovariances
+	# of lag k.
+	n = len(time_series)
+	nlags = n - 1 if nlags is None else nlags
+	size = 1 << int(np.ceil(np.log2(2 * n - 1)))
+	spectrum = np.fft.rfft(time_series - np.mean(time_series,axis = 0),size,axis = 0)
+	return np.fft.irfft(spectrum * np.conj(spectrum),size,axis = 0)[:nlags + 1] / n
+
+def lag_matrix(time_series,p):
+	# A view of the series whose row t holds the values x_t, x_{t-1}, ..., x_{t-p} for
+	# t = p, ..., n - 1. The rows overlap in memory, so that the view must not be written to.
+	time_series = np.ascontiguousarray(time_series)
+	stride = time_series.strides[0]
+	windows = as_strided(time_series,shape = (len(time_series) - p,p + 1),strides = (stride,stride))
+	return windows[:,::-1]
+
+def levinson_durbin(autocovariances,order):
+	# The Levinson-Durbin recursion, which solves the Yule-Walker equations of every order
+	# up to the given one from those of the order below. The partial autocorrelations, the
+	# coefficients of the highest order and of every order below it, and the innovation
+	# variances of the orders 0 to order are returned. The autocovariances may be a matrix
+	# with one series per column, in which case every series is solved at once.
+	shape = np.shape(autocovariances)[1:]
+	pacf = np.zeros((order + 1,) + shape)
+	sigma2 = np.zeros((order + 1,) + shape)
+	pacf[0] = 1.0
+	sigma2[0] = autocovariances[0]
+	phi = np.zeros((0,) + shape)
+	coefficients = [phi]
+	for k in range(1,order + 1):
+		reflection = (autocovariances[k] - np.sum(phi * autocovariances[k - 1:0:-1],axis = 0)) / sigma2[k - 1]
+		phi = np.concatenate((phi - reflection * phi[::-1],[reflection]))
+		coefficients.append(phi)
+		pacf[k] = reflection
+		sigma2[k] = sigma2[k - 1] * (1 - reflection ** 2)
+	return {"pacf" : pacf,"phi" : phi,"coefficients" : coefficients,"sigma2" : sigma2}
+
+def fit_ar_panel(time_series,p = None,max_order = None,criterion = "aic",method = "yule_walker",
+				 processes = None,chunk_size = 1024):
+	# Fit an autoregressive process to every column of a matrix of series at once. The
+	# order is p for every series, or is selected for each series by the criterion from
+	# the Yule-Walker fits of the orders 0 to max_order, as in AR. The coefficients are
+	# then either those of the Yule-Walker equations, solved for every series together by
+	# the Levinson-Durbin recursion, or those of least squares, solved together for every
+	# series of the same order from their stacked normal equations.
+	#
+	# The coefficients are returned as a matrix with one row per series, whose columns
+	# beyond the order of a series are zero, with the orders, intercepts, means, residual
+	# variances and criteria of the series. The columns may be divided into chunks which
+	# are fitted by a pool of processes.
+	#
+	# The following is an example of how to fit the daily returns of a universe:
+	#		fit = fit_ar_panel(portfolio.statistics["asset_returns"],max_order = 5)
+	#		print fit["order"], fit["phi"]
+	time_series = np.asarray(time_series,dtype = np.float64)
+	if time_series.ndim == 1:
+		time_series = time_series[:,np.newaxis]
+	if not np.all(np.isfinite(time_series)):
+		raise ValueError("The series must not contain missing values.")
+	if method not in ("yule_walker","least_squares"):
+		raise ValueError("Unknown estimation method: " + str(method))
+	if criterion not in CRITERIA:
+		raise ValueError("Unknown information criterion: " + str(criterion))
+	n = time_series.shape[0]
+	if max_order is None:
+		max_order = int(min(10 * np.log10(n),n // 2 - 1))
+	max_order = max(max_order,1) if p is None else p
+
+	blocks = [time_series[:,i:i + chunk_size] for i in range(0,time_series.shape[1],chunk_size)]
+	arguments = [(block,p,max_order,criterion,method) for block in blocks]
+	if processes is not None and processes > 1 and len(arguments) > 1:
+		pool = Pool(processes)
+		try:
+			results = pool.map(fit_ar_block,arguments)
+		finally:
+			pool.close()
+			pool.join()
+	else:
+		results = [fit_ar_block(block_arguments) for block_arguments in arguments]
+
+	fit = {}
+	for name in results[0]:
+		fit[name] = np.concatenate([result[name] for result in results],axis = 0)
+	return fit
+
+def fit_ar_block(arguments):
+	time_series, p, max_order, criterion, method = arguments
+	n, m = time_series.shape
+	recursion = levinson_durbin(autocovariance(time_series,max_order),max_order)
+	orders = np.arange(max_order + 1)[:,np.newaxis]
+	with np.errstate(divide = "ignore"):
+		selection = {"aic" : n * np.log(recursion["sigma2"]) + 2 * (orders + 1),
+					 "bic" : n * np.log(recursion["sigma2"]) + np.log(n) * (orders + 1)}
+	order = np.full(m,max_order,dtype = int) if p is not None else np.argmin(selection[criterion],axis = 0)
+	columns = np.arange(m)
+
+	phi = np.zeros((m,max_order))
+	mean = np.mean(time_series,axis = 0)
+	fit = {"order" : order,"mean" : mean}
+	if method == "yule_walker":
+		for k in np.unique(order):
+			chosen = order == k
+			phi[chosen,:k] = recursion["coefficients"][k][:,chosen].T
+		intercept = mean * (1 - np.sum(phi,axis = 1))
+		sigma2 = recursion["sigma2"][order,columns]
+		fit["aic"] = selection["aic"][order,columns]
+		fit["bic"] = selection["bic"][order,columns]
+	else:
+		intercept = np.zeros(m)
+		sigma2 = np.zeros(m)
+		fit["aic"] = np.zeros(m)
+		fit["bic"] = np.zeros(m)
+		for k in np.unique(order):
+			chosen = np.flatnonzero(order == k)
+			coefficients, residual_squares = batch_least_squares(time_series[:,chosen],k)
+			intercept[chosen] = coefficients[:,0]
+			phi[chosen,:k] = coefficients[:,1:]
+			sigma2[chosen] = residual_squares / (n - 2 * k - 1)
+			fit["aic"][chosen] = (n - k) * np.log(residual_squares / (n - k)) + 2 * (k + 1)
+			fit["bic"][chosen] = (n - k) * np.log(residual_squares / (n - k)) + np.log(n - k) * (k + 1)
+
+	fit["phi"] = phi
+	fit["intercept"] = intercept
+	fit["sigma2"] = sigma2
+	if p is None:
+		fit["aic_by_order"] = selection["aic"].T
+		fit["bic_by_order"] = selection["bic"].T
+	return fit
+
+def batch_least_squares(time_series,p):
+	# The least squares regressions of every column on a constant and its previous p values,
+	# whose normal equations are stacked into one array and solved together. The lagged
+	# values are strided views of the series. The coefficients (intercept first) and the
+	# residual sums of squares are returned.
+	n, m = time_series.shape
+	time_series = np.ascontiguousarray(time_series)
+	row, column = time_series.strides
+	lags = as_strided(time_series,shape = (n - p,m,p + 1),strides = (row,column,row))[:,:,::-1]
+	targets = lags[:,:,0]
+	X = lags[:,:,1:]
+
+	XX = np.empty((m,p + 1,p + 1))
+	XX[:,0,0] = n - p
+	XX[:,0,1:] = XX[:,1:,0] = np.sum(X,axis = 0)
+	XX[:,1:,1:] = np.einsum("tmi,tmj->mij",X,X)
+	Xy = np.concatenate((np.sum(targets,axis = 0)[:,np.newaxis],np.einsum("tmi,tm->mi",X,targets)),axis = 1)
+	coefficients = np.linalg.solve(XX,Xy[:,:,np.newaxis])[:,:,0]
+	residual_squares = np.einsum("tm,tm->m",targets,targets) - np.einsum("mi,mi->m",coefficients,Xy)
+	return coefficients, residual_squares
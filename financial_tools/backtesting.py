@@ -0,0 +1,239 @@
+# backtesting.py: A vectorized engine for testing trading strategies against
+#       the historical prices of the assets in a portfolio.
+#
+# A strategy receives the entire array of closing prices at once, and returns an
+# array of target positions with one entry for each day: 1 to hold the asset, 0
+# to hold none of it (or -1 to be short), and nan to keep the position as it was.
+# A single strategy receives the prices of every asset as a matrix with one
+# column per asset; otherwise there is one strategy for each asset, and each
+# receives the prices of its own asset.
+#
+# The target position decided at the close of one day is filled at the close of
+# the following day, so that a strategy never trades at a price which it used
+# to make its decision. Every fill costs a proportion "transaction_cost" of the
+# value traded. The engine calculates the positions, fills, costs, returns, the
+# curve of equity and its drawdowns with a handful of array operations over the
+# entire history, without calling back into Python for each day.
+#
+# Strategies which are more naturally written one day at a time may be wrapped
+# by "bar_strategy", which compiles the loop over the days with numba when it is
+# installed (and otherwise runs the same loop in Python).
+#
+# The following is an example of how to test the threshold strategy, which buys
+# below $9.50 and sells above $10.50, with a cost of ten basis points per trade:
+#       backtest = Backtesting(portfolio,threshold_strategy,transaction_cost = .001)
+#       print backtest
+#       print backtest.results["equity"][-1], backtest.results["max_drawdown"]
+
+import numpy as np
+from .portfolio import Portfolio
+from .stock import Stock
+from .instrumentation import instrumented
+
+try:
+	from numba import njit
+except ImportError:
+	njit = None
+
+TRADING_DAYS = 252
+
+class Backtesting(object):
+	def __init__(self,portfolio,strategies,time_interval = None,transaction_cost = 0.0,weights = None):
+		self.portfolio = portfolio
+
+		# Create an array of strategies to test. It is assumed that there is a
+		# single strategy for each asset in the portfolio, or else there is only
+		# a single strategy. The capital is divided among the assets according
+		# to the weights, which are equal by default.
+		self.strategies = [strategies] if type(strategies) is not list else strategies
+		self.transaction_cost = transaction_cost
+		self.weights = weights
+
+		# The prices of the assets are aligned on a shared calendar by the
+		# portfolio (see panel.py), and restricted to the time interval.
+		dates, prices = self.portfolio.panel.dates, self.portfolio.panel.prices
+		interval = time_interval if time_interval is not None else self.portfolio.assets[0].date_range
+		if interval is not None:
+			start = np.searchsorted(dates,np.datetime64(interval["start"],"D"))
+			end = np.searchsorted(dates,np.datetime64(interval["end"],"D"),side = "right")
+			dates, prices = dates[start:end], prices[start:end]
+		self.dates = dates
+		self.prices = prices
+
+		self.results = self.test_strategies_in_time_interval()
+
+	def __str__(self):
+		if self.results is None:
+			return "The strategies could not be tested."
+		return format_backtest([asset.ticker for asset in self.portfolio.assets],self.dates,self.results)
+
+	@instrumented("backtest",lambda backtest: {"assets" : backtest.portfolio.n,"days" : len(backtest.dates)})
+	def test_strategies_in_time_interval(self):
+		n_assets = self.portfolio.n
+		if n_assets > 1 and len(self.strategies) > 1 and n_assets != len(self.strategies):
+			print "The number of strategies must equal the number of assets in the portfolio."
+			return None
+
+		if len(self.strategies) == 1:
+			targets = evaluate_strategy(self.strategies[0],self.prices)
+		else:
+			targets = np.column_stack([evaluate_strategy(strategy,self.prices[:,i])
+				for i,strategy in enumerate(self.strategies)])
+
+		results = run_backtest(self.prices,targets,transaction_cost = self.transaction_cost,weights = self.weights)
+		results["dates"] = self.dates
+		return results
+
+
+def format_backtest(tickers,dates,results):
+	print_string = "Backtest of [" + " ".join(tickers) + "]"
+	print_string += " from %s to %s:\n" % (dates[0],dates[-1])
+	print_string += "\tTotal return:\t\t%.4f\n" % results["total_return"]
+	print_string += "\tAnnualized return:\t%.4f\n" % results["annualized_return"]
+	print_string += "\tAnnualized volatility:\t%.4f\n" % results["annualized_volatility"]
+	print_string += "\tSharpe's ratio:\t\t%.4f\n" % results["sharpe_ratio"]
+	print_string += "\tMaximum drawdown:\t%.4f\n" % results["max_drawdown"]
+	print_string += "\tTrades:\t\t\t%d\n" % results["trades"]
+	print_string += "\tTransaction costs:\t%.4f" % results["total_costs"]
+	return print_string
+
+
+@instrumented("strategy")
+def evaluate_strategy(strategy,prices):
+	# A strategy is either a function of the prices or an array of targets
+	# which has already been calculated.
+	targets = strategy(prices) if callable(strategy) else strategy
+	return np.asarray(targets,dtype = np.float64).reshape(prices.shape)
+
+
+@instrumented("run_backtest",lambda prices: {"days" : len(prices)})
+def run_backtest(prices,targets,transaction_cost = 0.0,weights = None):
+	# Simulate trading the assets from a matrix of prices and a matrix of target
+	# positions of the same shape (a single asset may be given as vectors). The
+	# returns of each asset are earned on the capital allocated to it by the
+	# weights, and the returns of the strategy are expressed as proportions of
+	# the equity at the start of each day.
+	prices = np.asarray(prices,dtype = np.float64)
+	prices = prices.reshape((prices.shape[0],-1))
+	targets = np.asarray(targets,dtype = np.float64).reshape(prices.shape)
+	n_days, n_assets = prices.shape
+	weights = np.full(n_assets,1.0 / n_assets) if weights is None else np.asarray(weights,dtype = np.float64)
+
+	# A nan target keeps the previous position, and no position is held before
+	# the first target. The target of each day is filled on the next day.
+	targets = forward_fill(targets)
+	positions = np.zeros(prices.shape)
+	positions[1:] = targets[:-1]
+	fills = np.diff(np.concatenate((np.zeros((1,n_assets)),positions),axis = 0),axis = 0)
+
+	# The position held at the close of one day earns the return of the next.
+	# A day on which an asset has no price earns nothing.
+	returns = np.zeros(prices.shape)
+	returns[1:] = prices[1:] / prices[:-1] - 1
+	returns[~np.isfinite(returns)] = 0
+
+	gross = np.zeros(prices.shape)
+	gross[1:] = positions[:-1] * returns[1:]
+	costs = transaction_cost * np.abs(fills)
+	asset_returns = gross - costs
+	strategy_returns = np.dot(asset_returns,weights)
+
+	equity = np.cumprod(1 + strategy_returns)
+	drawdown = equity / np.maximum.accumulate(equity) - 1
+
+	results = {}
+	results["positions"] = positions
+	results["fills"] = fills
+	results["fill_prices"] = np.where(fills != 0,prices,np.nan)
+	results["costs"] = costs
+	results["asset_returns"] = asset_returns
+	results["returns"] = strategy_returns
+	results["equity"] = equity
+	results["drawdown"] = drawdown
+	results.update(summary_statistics(strategy_returns,equity,drawdown))
+	results["trades"] = int(np.count_nonzero(fills))
+	results["turnover"] = np.sum(np.abs(fills) * weights)
+	results["total_costs"] = np.sum(np.dot(costs,weights))
+	return results
+
+
+def summary_statistics(returns,equity,drawdown):
+	# The returns are annualized over the conventional number of trading days.
+	# Given matrices, the statistics of every column are calculated at once.
+	statistics = {}
+	n_days = len(returns)
+	if not n_days:
+		zeros = np.zeros(np.shape(returns)[1:])
+		for name in ("total_return","annualized_return","annualized_volatility","sharpe_ratio","max_drawdown"):
+			statistics[name] = zeros[()]
+		return statistics
+
+	deviation = np.std(returns,ddof = 1,axis = 0) if n_days > 1 else np.zeros(np.shape(returns)[1:])
+	with np.errstate(divide = "ignore",invalid = "ignore"):
+		sharpe_ratio = np.mean(returns,axis = 0) / deviation * np.sqrt(TRADING_DAYS)
+	statistics["total_return"] = equity[-1] - 1
+	statistics["annualized_return"] = equity[-1] ** (float(TRADING_DAYS) / n_days) - 1
+	statistics["annualized_volatility"] = deviation * np.sqrt(TRADING_DAYS)
+	statistics["sharpe_ratio"] = np.where(deviation > 0,sharpe_ratio,0.0)[()]
+	statistics["max_drawdown"] = -np.min(drawdown,axis = 0)
+	return statistics
+
+
+def column_statistics(asset_returns):
+	# The summary statistics of each asset traded on its own.
+	equity = np.cumprod(1 + asset_returns,axis = 0)
+	drawdown = equity / np.maximum.accumulate(equity,axis = 0) - 1
+	return summary_statistics(asset_returns,equity,drawdown)
+
+
+def forward_fill(targets):
+	# Replace every nan with the most recent target before it, or with zero
+	# before the first target.
+	observed = np.isfinite(targets)
+	rows = np.where(observed,np.arange(targets.shape[0])[:,None],0)
+	rows = np.maximum.accumulate(rows,axis = 0)
+	filled = targets[rows,np.arange(targets.shape[1])]
+	filled[~np.maximum.accumulate(observed,axis = 0)] = 0
+	return filled
+
+
+def run_bars(callback,prices,targets):
+	# Call the strategy on every day, with the prices up to and including that
+	# day and the position which it last targeted.
+	position = 0.0
+	for i in range(prices.shape[0]):
+		position = callback(i,prices[:i + 1],position)
+		targets[i] = position
+	return targets
+
+compiled_run_bars = njit(run_bars) if njit is not None else run_bars
+
+
+def bar_strategy(callback):
+	# Turn a function of one day, callback(index,prices,position), which returns
+	# the target position for that day, into a strategy over entire arrays. With
+	# numba installed the callback itself is compiled, so that it should use
+	# only numerical operations on its arguments.
+	if njit is not None:
+		callback = njit(callback)
+
+	def strategy(prices):
+		prices = np.asarray(prices,dtype = np.float64)
+		columns = prices.reshape((prices.shape[0],-1))
+		targets = np.empty(columns.shape)
+		for j in range(columns.shape[1]):
+			targets[:,j] = compiled_run_bars(callback,np.ascontiguousarray(columns[:,j]),np.empty(columns.shape[0]))
+		return targets.reshape(prices.shape)
+	return strategy
+
+
+def threshold_strategy(prices,buy = 9.5,sell = 10.5):
+	# For this simple trading strategy, we will choose to buy stock
+	# of WNC when the price is below $9.50, and we will choose to
+	# sell when the price rises above $10.50. Because we have the 
+	# benefit of looking backwards, this strategy should to be very
+	# profitable over the specified time interval.
+	targets = np.full(np.shape(prices),np.nan)
+	targets[prices < buy] = 1.0
+	targets[prices > sell] = 0.0
+	return targets
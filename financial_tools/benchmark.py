@@ -0,0 +1,264 @@
+# benchmark.py: An offline benchmark of the hot paths of the tools, run on
+#       synthetic market data (see synthetic.py) so that nothing is
+#       downloaded and every run measures the same work.
+#
+# Each case times a single operation at increasing scales (days of prices,
+# assets in a portfolio or contracts priced), and reports the best time of
+# several repetitions, the throughput in units of the scale per second and the
+# peak resident memory. Every case and scale is measured in a fresh process, so
+# that the memory of one measurement is not inflated by those before it; the
+# increase is the peak memory beyond that of the process once the modules are
+# imported, and so includes the synthetic data of the case.
+#
+# The results may be saved as a baseline, against which later runs are
+# compared: a case whose time or memory increase exceeds that of the baseline
+# by more than the tolerance is flagged as a regression, and the benchmark then
+# exits with a nonzero status. The memory of the interpreter and the imported
+# modules is the bulk of the peak memory of small cases, and so would hide
+# their growth; an increase is also only flagged when it exceeds that of the
+# baseline by at least a megabyte, since the peak is measured in pages. A
+# baseline is only meaningful on the machine on which it was recorded.
+#
+# The following are examples of how to run the benchmark:
+#       python -m financial_tools.benchmark --quick
+#       python -m financial_tools.benchmark --save-baseline baseline.json
+#       python -m financial_tools.benchmark --baseline baseline.json --tolerance .25
+#       python -m financial_tools.benchmark --case portfolio_optimize --case kelly
+
+import io
+import os
+import sys
+import json
+import timeit
+import argparse
+import subprocess
+import numpy as np
+from .synthetic import synthetic_stock, synthetic_stocks, yahoo_csv, autoregressive
+
+CASES = []
+
+# The least growth of the memory increase, in megabytes, which is flagged as a
+# regression whatever the ratio to the baseline.
+MEMORY_SLACK = 1.0
+
+
+def case(scales,unit):
+    # Register a case, whose function prepares the data of a given scale and
+    # returns the operation to be timed.
+    def register(setup):
+        CASES.append({"name" : setup.__name__,"scales" : scales,"unit" : unit,"setup" : setup})
+        return setup
+    return register
+
+
+def find_case(name):
+    for benchmark in CASES:
+        if benchmark["name"] == name:
+            return benchmark
+    raise ValueError("Unknown benchmark case: " + str(name))
+
+
+def risk_free_stock(n_days):
+    return synthetic_stock("RF",n_days,drift = .02,volatility = 0.0,jump_intensity = 0.0)
+
+
+@case((2520,25200,252000),"days")
+def stock_parse(n_days):
+    from .prices import read_yahoo_csv
+    data = yahoo_csv(synthetic_stock("S",n_days,seed = 0).prices)
+    return lambda: read_yahoo_csv(io.BytesIO(data))
+
+
+@case((2520,25200,252000),"days")
+def stock_statistics(n_days):
+    from .stock import Stock
+    stock = synthetic_stock("S",n_days,seed = 0)
+    return lambda: Stock(stock.ticker,stock.date_range,prices = stock.prices)
+
+
+@case((5,20,80),"assets")
+def portfolio_optimize(n_assets):
+    from .portfolio import Portfolio
+    stocks = synthetic_stocks(["S%d" % i for i in range(n_assets)],2520,correlation = .3,seed = 0)
+    portfolio = Portfolio(stocks,risk_free = risk_free_stock(2520))
+    return portfolio.optimize_portfolio
+
+
+@case((5,20,80),"assets")
+def kelly(n_assets):
+    from .portfolio import Portfolio
+    stocks = synthetic_stocks(["S%d" % i for i in range(n_assets)],2520,correlation = .3,seed = 0)
+    portfolio = Portfolio(stocks,risk_free = risk_free_stock(2520))
+    return portfolio.optimize_kelly_criterion
+
+
+@case((2520,25200,252000),"days")
+def capm_regression(n_days):
+    from .capm import CAPM
+    market, stock = synthetic_stocks(["M","S"],n_days,correlation = .6,seed = 0)
+    model = CAPM(risk_free_stock(n_days),market)
+    return lambda: model.asset_regression(stock)
+
+
+@case((2520,25200,252000),"days")
+def barndorff_nielsen(n_days):
+    from .jumps import BarndorffNielsen
+    stock = synthetic_stock("S",n_days,jump_intensity = .05,seed = 0)
+    return lambda: BarndorffNielsen(stock).close()
+
+
+@case((2520,25200,252000),"days")
+def backtesting(n_days):
+    # Ten assets trade around the thresholds of the threshold strategy.
+    from .portfolio import Portfolio
+    from .backtesting import Backtesting, threshold_strategy
+    stocks = synthetic_stocks(["S%d" % i for i in range(10)],n_days,initial = 10.0,seed = 0)
+    portfolio = Portfolio(stocks,risk_free = risk_free_stock(n_days))
+    return lambda: Backtesting(portfolio,threshold_strategy,transaction_cost = .001)
+
+
+@case((1000,10000,100000),"contracts")
+def european_call(n_contracts):
+    from .option import EuropeanCall
+    strikes = np.linspace(30.0,80.0,n_contracts)
+    return lambda: [EuropeanCall(strike_price = strike).evaluate_black_scholes() for strike in strikes]
+
+
+@case((1000,10000,100000),"contracts")
+def black_scholes_chain(n_contracts):
+    from .option import black_scholes
+    strikes = np.linspace(30.0,80.0,n_contracts)
+    return lambda: black_scholes(55.0,strikes,.5,.03,.45)
+
+
+@case((10,100,1000),"series")
+def ar_panel(n_series):
+    from .arima import fit_ar_panel
+    series = autoregressive(2520,phi = (.5,-.2),n_series = n_series,seed = 0)
+    return lambda: fit_ar_panel(series)
+
+
+def peak_memory():
+    # The peak resident memory of this process in megabytes, which Linux
+    # reports in kilobytes and Mac OS X in bytes.
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024.0 ** 2 if sys.platform == "darwin" else 1024.0)
+
+
+def measure(name,scale,repeats = 5,budget = 2.0,minimum = .2):
+    # Time the case at a single scale, in this process. The operation is
+    # repeated until it has run "repeats" times and for "minimum" seconds in
+    # all (so that the best of many runs of a fast operation is kept), but
+    # stops once the budget of seconds has been spent, having run at least once.
+    benchmark = find_case(name)
+    imported = peak_memory()
+    run = benchmark["setup"](scale)
+    times = []
+    while not times or ((len(times) < repeats or sum(times) < minimum) and sum(times) < budget):
+        start = timeit.default_timer()
+        run()
+        times.append(timeit.default_timer() - start)
+    best = min(times)
+    peak = peak_memory()
+    return {"case" : name,"scale" : scale,"unit" : benchmark["unit"],"seconds" : best,
+            "mean_seconds" : sum(times) / len(times),"repeats" : len(times),
+            "throughput" : scale / best if best > 0 else float("inf"),
+            "peak_memory" : peak,"memory_increase" : peak - imported}
+
+
+def measure_in_subprocess(name,scale,repeats = 5,budget = 2.0):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    environment = dict(os.environ)
+    environment["PYTHONPATH"] = os.pathsep.join([root] + ([environment["PYTHONPATH"]] if environment.get("PYTHONPATH") else []))
+    command = [sys.executable,"-m","financial_tools.benchmark","--worker",name,str(scale),
+               "--repeats",str(repeats),"--budget",str(budget)]
+    output = subprocess.check_output(command,env = environment)
+    return json.loads(output.decode("ascii").strip().splitlines()[-1])
+
+
+def compare(results,baseline,tolerance = .25):
+    # Attach the ratios of time and of memory increase to those of the
+    # baseline, and flag every case which exceeds either by more than the
+    # tolerance.
+    previous = dict(((result["case"],result["scale"]),result) for result in baseline["results"])
+    regressions = []
+    for result in results:
+        reference = previous.get((result["case"],result["scale"]))
+        if reference is None:
+            continue
+        result["time_ratio"] = result["seconds"] / reference["seconds"] if reference["seconds"] > 0 else 1.0
+        growth = result["memory_increase"] - reference["memory_increase"]
+        result["memory_ratio"] = result["memory_increase"] / reference["memory_increase"] if reference["memory_increase"] > 0 else 1.0
+        result["regression"] = (result["time_ratio"] > 1 + tolerance
+                                or (growth > MEMORY_SLACK and growth > tolerance * reference["memory_increase"]))
+        if result["regression"]:
+            regressions.append(result)
+    return regressions
+
+
+def format_result(result):
+    print_string = "%-20s%8d %-10s%12.6f s%14.1f /s%10.1f MB%10.1f MB" % (
+        result["case"],result["scale"],result["unit"],result["seconds"],result["throughput"],
+        result["peak_memory"],result["memory_increase"])
+    if "time_ratio" in result:
+        print_string += "%8.2fx%8.2fx%s" % (result["time_ratio"],result["memory_ratio"],
+                                           "  REGRESSION" if result["regression"] else "")
+    return print_string
+
+
+def parser():
+    parser = argparse.ArgumentParser(prog = "python -m financial_tools.benchmark",
+                                     description = "Benchmark the tools on synthetic market data.")
+    parser.add_argument("--case",action = "append",choices = [benchmark["name"] for benchmark in CASES],
+                        help = "run only this case (may be repeated)")
+    parser.add_argument("--quick",action = "store_true",help = "run only the smallest scale of each case")
+    parser.add_argument("--repeats",type = int,default = 5)
+    parser.add_argument("--budget",type = float,default = 2.0,help = "seconds after which a case stops repeating")
+    parser.add_argument("--baseline",help = "compare against the results saved in this file")
+    parser.add_argument("--tolerance",type = float,default = .25,help = "relative slowdown or growth flagged as a regression")
+    parser.add_argument("--save-baseline",help = "save the results to this file")
+    parser.add_argument("--worker",nargs = 2,metavar = ("CASE","SCALE"),help = argparse.SUPPRESS)
+    return parser
+
+
+def main(argv = None):
+    arguments = parser().parse_args(argv)
+    if arguments.worker is not None:
+        name, scale = arguments.worker
+        print json.dumps(measure(name,int(scale),arguments.repeats,arguments.budget))
+        return
+
+    names = arguments.case if arguments.case else [benchmark["name"] for benchmark in CASES]
+    baseline = None
+    if arguments.baseline is not None:
+        with open(arguments.baseline) as source:
+            baseline = json.load(source)
+
+    print "%-20s%8s %-10s%14s%17s%13s%13s%s" % ("Case","Scale","","Time","Throughput","Peak","Increase",
+                                              "    Time  Memory" if baseline is not None else "")
+    results = []
+    for name in names:
+        scales = find_case(name)["scales"]
+        for scale in scales[:1] if arguments.quick else scales:
+            result = measure_in_subprocess(name,scale,arguments.repeats,arguments.budget)
+            if baseline is not None:
+                compare([result],baseline,arguments.tolerance)
+            results.append(result)
+            print format_result(result)
+            sys.stdout.flush()
+
+    if arguments.save_baseline is not None:
+        with open(arguments.save_baseline,"w") as destination:
+            json.dump({"python" : sys.version,"platform" : sys.platform,"results" : results},destination,indent = 1)
+
+    regressions = [result for result in results if result.get("regression")]
+    if regressions:
+        print "\n%d regression(s) beyond a tolerance of %.0f%%: %s" % (len(regressions),100 * arguments.tolerance,
+                                                                      ", ".join("%s (%d)" % (result["case"],result["scale"])
+                                                                                for result in regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
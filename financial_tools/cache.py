@@ -0,0 +1,275 @@
+# cache.py: A persistent, on-disk cache of the daily price histories that are
+#       downloaded from Yahoo Finance! The cache is keyed by ticker symbol and
+#       remembers which intervals of time have already been downloaded, so that
+#       a request overlapping cached data only fetches the missing gaps.
+#
+# Each ticker is stored as a directory of columnar ".npy" files (one for the
+# dates and one for each price field) which are memory-mapped when read, so
+# that loading a cached history does not copy it into memory. An index file
+# records the intervals covered for each ticker, its size on disk and the time
+# it was last accessed. When the cache grows beyond its size limit, the least
+# recently used tickers are evicted. In offline mode the cache never touches
+# the network, and simply returns whatever portion of the request it holds.
+#
+# Several processes may share a cache directory. Every change to the cache is
+# made while holding an exclusive lock on a lock file in the directory, having
+# first read the index again, so that the change is merged into the tickers
+# stored by other processes rather than overwriting them. Locking between
+# processes requires the fcntl module, and so is not available on Windows.
+#
+# The following is an example usage of the price cache, in which every stock
+# object shares a single cache directory:
+#       Stock.default_cache = PriceCache("/tmp/prices",max_bytes = 2 ** 30)
+#       stock = Stock("GOOG",{"start" : "2012-01-03","end" : "2013-01-08"})
+#       # The second stock is loaded from disk, and only the days from
+#       # 2013-01-09 through 2013-03-01 are downloaded.
+#       stock = Stock("GOOG",{"start" : "2012-01-03","end" : "2013-03-01"})
+
+import os
+import json
+import time
+import datetime
+import threading
+import contextlib
+import numpy as np
+from .prices import PriceHistory, as_datetime64
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+ONE_DAY = np.timedelta64(1,"D")
+
+
+class CacheMiss(KeyError):
+    # Raised in offline mode when the cache holds no data whatsoever for the
+    # requested ticker and interval of time.
+    pass
+
+
+def merge_intervals(intervals):
+    # Merge a list of inclusive date intervals, joining intervals that overlap
+    # or that are adjacent to one another.
+    merged = []
+    for start,end in sorted(intervals):
+        if merged and start <= merged[-1][1] + ONE_DAY:
+            merged[-1][1] = max(merged[-1][1],end)
+        else:
+            merged.append([start,end])
+    return merged
+
+
+def missing_intervals(start,end,covered):
+    # Calculate the sub-intervals of [start,end] which are not contained in
+    # any of the (merged and sorted) covered intervals.
+    gaps = []
+    cursor = start
+    for lower,upper in covered:
+        if upper < cursor:
+            continue
+        if lower > end:
+            break
+        if lower > cursor:
+            gaps.append((cursor,lower - ONE_DAY))
+        cursor = max(cursor,upper + ONE_DAY)
+    if cursor <= end:
+        gaps.append((cursor,end))
+    return gaps
+
+
+class PriceCache(object):
+    def __init__(self,directory,max_bytes = None,offline = False):
+        self.directory = os.path.expanduser(directory)
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.lock = threading.RLock()
+
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        self.index = self.read_index()
+
+    def __str__(self):
+        print_string = "Price cache: " + self.directory + "\n"
+        print_string += "Tickers cached: %d\n" % len(self.index)
+        print_string += "Size on disk: %d bytes" % self.size()
+        return print_string
+
+    def index_path(self):
+        return os.path.join(self.directory,"index.json")
+
+    def lock_path(self):
+        return os.path.join(self.directory,"index.lock")
+
+    @contextlib.contextmanager
+    def locked(self):
+        # Hold the lock of this object and the lock of the directory, and read
+        # the index again, since another process may have changed it since it
+        # was last read. The lock of the directory is taken by every process
+        # which changes the cache, and must not be taken twice by one thread.
+        with self.lock:
+            with open(self.lock_path(),"a") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(),fcntl.LOCK_EX)
+                try:
+                    self.index = self.read_index()
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file.fileno(),fcntl.LOCK_UN)
+
+    def ticker_path(self,ticker):
+        # Ticker symbols such as "^IRX" contain characters which are awkward
+        # in file names, so every character other than a letter, a digit, a
+        # hyphen or a period is escaped by its hexadecimal code. The escape
+        # character "_" is itself escaped, so that no two tickers share a name.
+        name = "".join(c if c.isalnum() or c in "-." else "_%02x" % ord(c) for c in ticker)
+        return os.path.join(self.directory,name)
+
+    def read_index(self):
+        if not os.path.exists(self.index_path()):
+            return {}
+        with open(self.index_path()) as index_file:
+            return json.load(index_file)
+
+    def write_index(self):
+        temporary = self.index_path() + ".tmp"
+        with open(temporary,"w") as index_file:
+            json.dump(self.index,index_file)
+        replace_file(temporary,self.index_path())
+
+    def size(self):
+        return sum(entry["bytes"] for entry in self.index.values())
+
+    def covered(self,ticker):
+        entry = self.index.get(ticker)
+        if entry is None:
+            return []
+        return [[as_datetime64(start),as_datetime64(end)] for start,end in entry["ranges"]]
+
+    def load(self,ticker):
+        # Memory-map the columnar files of a cached ticker. The arrays are
+        # read-only views onto the files on disk.
+        path = self.ticker_path(ticker)
+        fields = self.index[ticker]["fields"]
+        dates = np.load(os.path.join(path,"Date.npy"),mmap_mode = "r")
+        columns = dict((field,np.load(os.path.join(path,field + ".npy"),mmap_mode = "r")) for field in fields)
+        return PriceHistory(dates,columns)
+
+    def store(self,ticker,prices,ranges):
+        path = self.ticker_path(ticker)
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+        # Each column is written to a temporary file which then replaces the
+        # existing file, so that a reader never observes a partially written
+        # column, and histories that are already memory-mapped stay valid.
+        size = 0
+        for field,values in [("Date",prices.dates)] + [(field,prices[field]) for field in prices.fields()]:
+            destination = os.path.join(path,field + ".npy")
+            temporary = destination + ".tmp.npy"
+            np.save(temporary,np.ascontiguousarray(values))
+            replace_file(temporary,destination)
+            size += os.path.getsize(destination)
+
+        self.index[ticker] = {
+            "fields" : prices.fields(),
+            "ranges" : [[str(start),str(end)] for start,end in ranges],
+            "bytes" : size,
+            "accessed" : time.time()
+            }
+
+    def evict(self,keep = None):
+        # Remove the least recently used tickers until the cache fits within
+        # its size limit. The ticker which was just requested is never evicted.
+        if self.max_bytes is None:
+            return
+        candidates = sorted((entry["accessed"],ticker) for ticker,entry in self.index.items() if ticker != keep)
+        while self.size() > self.max_bytes and candidates:
+            ticker = candidates.pop(0)[1]
+            path = self.ticker_path(ticker)
+            for file_name in os.listdir(path):
+                os.remove(os.path.join(path,file_name))
+            os.rmdir(path)
+            del self.index[ticker]
+
+    def get(self,ticker,start,end,fetch):
+        # Retrieve the daily price history of a ticker over the inclusive
+        # interval [start,end]. The fetch function is called as
+        #     fetch(ticker,start,end)
+        # with dates formatted as "YYYY-MM-DD" for every gap in the cached
+        # data, and must return a price history over that interval.
+        start,end = as_datetime64(start),as_datetime64(end)
+
+        # Days in the future have not yet been traded, and so are never
+        # fetched. Nor is the present day, or the days just before it, covered
+        # until its prices have been returned (see covered_gaps), so that a
+        # later request will fetch the days whose prices were not yet reported.
+        today = as_datetime64(datetime.date.today())
+
+        with self.lock:
+            self.index = self.read_index()
+            gaps = missing_intervals(start,min(end,today),self.covered(ticker))
+
+        # The missing intervals are downloaded without holding the lock, so
+        # that several threads may fill the cache for different tickers at
+        # the same time.
+        if gaps and not self.offline:
+            fetched = [fetch(ticker,str(lower),str(upper)) for lower,upper in gaps]
+
+            with self.locked():
+                covered = self.covered(ticker)
+                histories = [self.load(ticker)] if ticker in self.index else []
+                prices = concatenate_histories(histories + fetched)
+                self.store(ticker,prices,merge_intervals(covered + covered_gaps(gaps,fetched,today)))
+                self.evict(keep = ticker)
+                self.write_index()
+
+        with self.locked():
+            if ticker not in self.index:
+                raise CacheMiss(ticker)
+            self.index[ticker]["accessed"] = time.time()
+            self.write_index()
+            return self.load(ticker).slice(start,end)
+
+
+def covered_gaps(gaps,fetched,today):
+    # The intervals which the fetched histories cover. A gap which ends before
+    # the present day is covered entirely, since days without prices in the
+    # past were not traded. A gap which reaches the present day is only
+    # covered up to the last day for which prices were returned.
+    covered = []
+    for (lower,upper),history in zip(gaps,fetched):
+        if upper < today:
+            covered.append([lower,upper])
+        elif len(history) and history.dates[-1] >= lower:
+            covered.append([lower,min(upper,history.dates[-1])])
+    return covered
+
+
+def concatenate_histories(histories):
+    # Join several price histories into one. Where two histories report the
+    # same trading day, the most recently fetched values are retained.
+    histories = [history for history in histories if len(history)]
+    if not histories:
+        return PriceHistory([],{})
+    fields = [field for field in histories[0].fields() if all(field in history.columns for history in histories)]
+    dates = np.concatenate([history.dates for history in histories])
+    columns = dict((field,np.concatenate([history[field] for history in histories])) for field in fields)
+
+    # Reversing the concatenated arrays before selecting unique dates means
+    # that the first occurrence found for each date is the latest fetched.
+    reverse = slice(None,None,-1)
+    dates, unique = np.unique(dates[reverse],return_index = True)
+    return PriceHistory(dates,dict((field,values[reverse][unique]) for field,values in columns.items()))
+
+
+def replace_file(source,destination):
+    # Replace the destination file with the source file. On POSIX systems a
+    # rename is atomic and overwrites the destination; elsewhere the
+    # destination must first be removed.
+    try:
+        os.rename(source,destination)
+    except OSError:
+        os.remove(destination)
+        os.rename(source,destination)
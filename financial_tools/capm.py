@@ -0,0 +1,241 @@
+# capm.py: A Python class representing the CAPM model given
+#       the risk free rate and market returns.  The object
+#       can be instantiated given Stock objects representing
+#		the risk free and market data or their respective
+#       ticker symbols.
+#
+# Calling asset_regression with a stock object or asset
+# dictionary as a parameter will calculate and store the CAPM
+# model's alpha, beta, and associated confidence intervals.
+#
+# The folowing is an example usage of the CAPM class to
+# calculate the alpha and beta of the stock given an asset
+# dictionary.
+#       date_range = {"start" : "2012-01-03", "end" : "2013-01-08"}
+#       tickers = ("^IRX","^GSPC","GOOG")
+#       capm = CAPM({"ticker" : tickers[0],"date_range" : date_range},
+#                   {"ticker" : tickers[1],"date_range" : date_range})
+#       capm.asset_regression({"ticker" : tickers[2],"date_range" : date_range})
+#
+# Many assets may be regressed at once, in which case the assets are
+# downloaded concurrently and the regressions are solved together as a single
+# least-squares problem:
+#       results = capm.batch_regression(["GOOG","MSFT","IBM"])
+#       print results["GOOG"]["beta"]["value"]
+#
+# The regression may also be estimated over a rolling window of days, with
+# additional factors alongside the market premium:
+#       rolling = capm.rolling_regression(["GOOG","MSFT"],window = 60)
+#       print rolling["beta"]["value"][:,0]
+
+import numpy as np
+from .stock import Stock, DownloadError
+from .panel import ReturnsPanel
+from .instrumentation import stage, instrumented
+
+class CAPM(object):
+    @instrumented("capm")
+    def __init__(self,risk_free,market,alpha = .05):
+        from scipy.special import ndtri
+
+        stocks, failures = Stock.load_many([risk_free,market])
+        if failures:
+            raise DownloadError(failures)
+        self.risk_free, self.market = stocks
+
+        self.alpha, self.beta = {}, {}
+        self.critical_value = ndtri(1 - alpha / 2.0)
+
+        # The market premium and the design matrix of the regression are the
+        # same for every asset, and so are calculated only once. The returns of
+        # the market and of the risk free asset are first joined on the days
+        # which both share, and every asset is later aligned on those days.
+        self.panel = ReturnsPanel([self.risk_free,self.market],missing = "drop")
+        self.dates = self.panel.return_dates
+        self.market_premium = self.panel.returns[:,1] - self.panel.returns[:,0]
+        self.covariates = np.concatenate((np.ones((len(self.market_premium),1)),
+                                          np.atleast_2d(self.market_premium).T),axis = 1)
+        self.covariates_inverse = np.linalg.inv(np.dot(self.covariates.T,self.covariates))
+
+    def __str__(self):
+        if len(self.alpha.keys()) and len(self.beta.keys()):
+            alpha = self.alpha
+            beta = self.beta
+        else:
+            return "The alpha and beta coefficients were not initialized. Please call the asset regression method before continuing."
+
+
+        print_string = "Capital Asset Pricing Model:\n\tCritical value: %.2f\n" % self.critical_value
+        print_string += "\t\t\tValue\t\tLower Bound\tUpper Bound\n"
+        print_string += "\talpha:\t\t%.4f\t\t%.4f\t\t%.4f\n" % (alpha["value"],alpha["confidence_interval"][0],
+                                                                    alpha["confidence_interval"][1])
+        print_string += "\tbeta:\t\t%.4f\t\t%.4f\t\t%.4f\n\n" % (beta["value"],beta["confidence_interval"][0],
+                                                                    beta["confidence_interval"][1])
+        
+        if alpha["confidence_interval"][0] > 0:
+            print_string += "\tThe CAPM reports that the security is overpriced. Asset returns are too large on average."
+        elif alpha["confidence_interval"][1] < 0:
+            print_string += "\tThe CAPM reports that the security is underpriced. Asset returns are too small on average."
+        else:
+            print_string += "\tThere CAPM reports that the security is appropriately priced."
+
+        return print_string
+
+    def asset_regression(self,asset_data):
+        results = self.batch_regression([asset_data])
+        asset = list(results.values())[0]
+        self.alpha = asset["alpha"]
+        self.beta = asset["beta"]
+
+    def batch_regression(self,assets):
+        # Regress many assets against the market at once. The assets may be
+        # ticker symbols, asset dictionaries or stock objects; those which are
+        # not already stock objects are downloaded concurrently. A dictionary
+        # keyed by ticker symbol is returned, holding the alpha and beta of
+        # each asset in the same form as the "alpha" and "beta" attributes.
+        stocks, failures = Stock.load_many(assets)
+        if failures:
+            raise DownloadError(failures)
+
+        # The regression is recorded as a stage of its own, apart from the
+        # downloads, and is attributed to the ticker of the asset (or to the
+        # tickers of all of the assets, separated by commas).
+        with stage("capm_regression",ticker = ",".join(stock.ticker for stock in stocks)):
+            asset_premium = self.asset_premiums(stocks)
+            covariates = self.covariates
+
+            # Solve the capital asset pricing model in the least-squares sense. In
+            # particular, wel solve the following linear model for parameters theta_0
+            # and theta_1:
+            #     R_{j,t} - mu_{f,t} = theta_0 + theta_1 * (R_{M,t} - mu_{f,t}) + e_{j,t}
+            # Where R_{j,t} is the asset premium of the jth asset, mu_{f,t} is the
+            # risk-free rate, R_{M,t} is the market premium, and e_{j,t} represents an
+            # error term. Refer to page 435 in the Statistics and Data Analysis for
+            # Financial Engineering. Every column of the asset premiums is a separate
+            # right-hand side of the same least-squares problem.
+            #
+            # Assets which have a return on every day share the precomputed inverse
+            # of the covariates. An asset which is missing some returns (having
+            # listed later than the market, say) is regressed on its own days.
+            observed = np.isfinite(asset_premium)
+            complete = np.all(observed,axis = 0)
+            theta = np.zeros((2,len(stocks)))
+            standard_errors = np.zeros((2,len(stocks)))
+
+            if np.any(complete):
+                theta[:,complete], standard_errors[:,complete] = self.least_squares(
+                    covariates,asset_premium[:,complete],self.covariates_inverse)
+            for j in np.flatnonzero(~complete):
+                rows = observed[:,j]
+                theta[:,j:j + 1], standard_errors[:,j:j + 1] = self.least_squares(
+                    covariates[rows],asset_premium[rows,j:j + 1])
+
+            interval = self.critical_value * np.array([-1,1])
+
+            results = {}
+            for j,asset in enumerate(stocks):
+                alpha, beta = {}, {}
+                alpha["value"] = theta[0,j]
+                alpha["standard_error"] = standard_errors[0,j]
+                alpha["confidence_interval"] = theta[0,j] + standard_errors[0,j] * interval
+
+                beta["value"] = theta[1,j]
+                beta["standard_error"] = standard_errors[1,j]
+                beta["confidence_interval"] = theta[1,j] + standard_errors[1,j] * interval
+                results[asset.ticker] = {"alpha" : alpha,"beta" : beta}
+        return results
+
+    def least_squares(self,covariates,premiums,covariates_inverse = None):
+        theta = np.linalg.lstsq(covariates,premiums,rcond = -1)[0]
+        residuals = premiums - np.dot(covariates,theta)
+        if covariates_inverse is None:
+            covariates_inverse = np.linalg.inv(np.dot(covariates.T,covariates))
+
+        # The rank of the covariates matrix is presumably two, and it is for that
+        # reason that we subtract two in the denominator.
+        s_squared = np.sum(residuals * residuals,axis = 0) / (covariates.shape[0] - 2)
+        return theta, np.sqrt(np.outer(np.diag(covariates_inverse),s_squared))
+
+    def asset_premiums(self,stocks):
+        # Stack the asset premiums into the columns of a single matrix, so that
+        # the regressions share one factorization of the design matrix. Every
+        # asset is aligned on the days of the market returns; a return which
+        # the asset does not have on one of those days is nan.
+        panel = ReturnsPanel(stocks,missing = "pairwise",calendar = self.panel.dates)
+        return panel.returns - self.panel.returns[:,:1]
+
+    @instrumented("capm_rolling_regression")
+    def rolling_regression(self,assets,window = 252,factors = None):
+        # Estimate the regression of many assets over a rolling window of days.
+        # Additional factors (such as size or value premiums) may be provided as
+        # the columns of a matrix with one row per day of market returns (that
+        # is, per entry of the "dates" attribute); these
+        # enter the regression alongside the constant and the market premium.
+        #
+        # Rather than solving a least-squares problem for every window, the
+        # sufficient statistics X'X, X'Y and the sums of squares of Y are
+        # maintained as the window slides: the day entering the window is added
+        # and the day leaving it is subtracted, at a cost which does not depend
+        # on the length of the window. Since an asset may be missing returns on
+        # some days, every asset keeps its own X'X over the days it has returns.
+        stocks, failures = Stock.load_many(assets)
+        if failures:
+            raise DownloadError(failures)
+
+        Y = self.asset_premiums(stocks)
+        observed = np.isfinite(Y).astype(np.float64)
+        Y = np.where(observed > 0,Y,0)
+        X = self.covariates
+        if factors is not None:
+            X = np.concatenate((X,np.asarray(factors,dtype = np.float64).reshape((X.shape[0],-1))),axis = 1)
+        n, k = X.shape
+        if window <= k or window > n:
+            raise ValueError("The window must exceed the number of covariates and not exceed the length of the series.")
+
+        n_windows = n - window + 1
+        coefficients = np.zeros((n_windows,k,Y.shape[1]))
+        standard_errors = np.zeros((n_windows,k,Y.shape[1]))
+        outer = X[:,:,np.newaxis] * X[:,np.newaxis,:]
+
+        for t in range(n_windows):
+            # Adding and removing days accumulates rounding error, so that the
+            # sufficient statistics are recalculated exactly once per window
+            # length. The amortized cost per day is unchanged.
+            if t % window == 0:
+                rows = slice(t,t + window)
+                XtX = np.einsum("tj,tab->jab",observed[rows],outer[rows])
+                XtY = np.dot(Y[rows].T,X[rows])
+                YtY = np.sum(Y[rows] * Y[rows],axis = 0)
+                counts = np.sum(observed[rows],axis = 0)
+            else:
+                t_in, t_out = t + window - 1, t - 1
+                XtX += (observed[t_in,:,np.newaxis,np.newaxis] * outer[t_in]
+                        - observed[t_out,:,np.newaxis,np.newaxis] * outer[t_out])
+                XtY += np.outer(Y[t_in],X[t_in]) - np.outer(Y[t_out],X[t_out])
+                YtY += Y[t_in] * Y[t_in] - Y[t_out] * Y[t_out]
+                counts += observed[t_in] - observed[t_out]
+
+            # Because X'X theta = X'Y at the solution, the residual sum of squares
+            # is simply Y'Y - theta'X'Y, which requires no pass over the window.
+            # Assets with too few returns in the window have no estimate.
+            valid = counts > k
+            XtX_inverse = np.linalg.inv(np.where(valid[:,np.newaxis,np.newaxis],XtX,np.eye(k)))
+            theta = np.einsum("jab,jb->ja",XtX_inverse,XtY)
+            with np.errstate(divide = "ignore",invalid = "ignore"):
+                s_squared = (YtY - np.sum(theta * XtY,axis = 1)) / (counts - k)
+            variances = np.diagonal(XtX_inverse,axis1 = 1,axis2 = 2) * np.maximum(s_squared,0)[:,np.newaxis]
+            coefficients[t] = np.where(valid,theta.T,np.nan)
+            standard_errors[t] = np.where(valid,np.sqrt(variances).T,np.nan)
+
+        # The returns of the market are indexed by the second of the pair of days
+        # over which each return is calculated, and each window by its final day.
+        dates = self.dates[window - 1:]
+
+        interval = self.critical_value * standard_errors
+        rolling = {"tickers" : [asset.ticker for asset in stocks],"dates" : dates,
+                   "coefficients" : coefficients,"standard_errors" : standard_errors}
+        for name,j in (("alpha",0),("beta",1)):
+            rolling[name] = {"value" : coefficients[:,j],
+                             "lower_bound" : coefficients[:,j] - interval[:,j],
+                             "upper_bound" : coefficients[:,j] + interval[:,j]}
+        return rolling
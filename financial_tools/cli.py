@@ -0,0 +1,225 @@
+# cli.py: The command line interface, which runs each analysis on price
+#       histories stored in local files, without downloading anything.
+#
+# Daily prices are read from files in the CSV format of Yahoo Finance!, and
+# each asset takes its ticker symbol from the name of its file (so that the
+# prices of Microsoft are read from "MSFT.csv"). Intraday prices for the jump
+# test are read in the format described in intraday.py. Since a command is
+# usually run once and then exits, its start-up time matters: the modules of
+# an analysis are only imported once the command has been chosen, and the
+# option --timing reports how long the imports, the reading of the prices and
+# the analysis itself took. The options --profile, --trace and --records
+# enable the instrumentation of instrumentation.py, and report the time taken
+# by each stage of the analysis itself (downloads, parsing, fitting and
+# optimization) as a summary, as a trace for Chrome or as records in JSON.
+#
+# The following are examples of each command:
+#       python -m financial_tools var MSFT.csv --alpha .05 --position 1000000
+#       python -m financial_tools var MSFT.csv GOOG.csv --method historical --timing
+#       python -m financial_tools capm IRX.csv GSPC.csv GOOG.csv MSFT.csv
+#       python -m financial_tools bn MSFT.csv --window 63
+#       python -m financial_tools bn --intraday MSFT-2014-02.csv --interval 300
+#       python -m financial_tools backtest WNC.csv --buy 9.5 --sell 10.5 --cost .001
+#       python -m financial_tools --profile --trace capm.json capm IRX.csv GSPC.csv GOOG.csv
+
+import time
+
+STARTED = time.time()
+
+import os
+import sys
+import argparse
+
+
+class Timer(object):
+    # Record the time taken by each stage of a command, measured from the
+    # import of this module.
+    def __init__(self,enabled = False):
+        self.enabled = enabled
+        self.last = STARTED
+        self.stages = []
+
+    def stage(self,name):
+        now = time.time()
+        self.stages.append((name,now - self.last))
+        self.last = now
+
+    def report(self):
+        if not self.enabled:
+            return
+        for name,elapsed in self.stages:
+            sys.stderr.write("%-10s%9.3f s\n" % (name,elapsed))
+        sys.stderr.write("%-10s%9.3f s\n" % ("total",sum(elapsed for name,elapsed in self.stages)))
+
+
+def ticker_of(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def load_stocks(paths):
+    from .stock import Stock
+    return [Stock.from_csv(ticker_of(path),path) for path in paths]
+
+
+def value_at_risk(arguments,timer):
+    # The parametric value-at-risk is that of each stock under its fitted
+    # t-distribution. The simulated value-at-risk is that of a portfolio of the
+    # stocks, equally weighted unless weights are given.
+    from .panel import ReturnsPanel
+    from .risk import RiskEngine
+    timer.stage("import")
+    stocks = load_stocks(arguments.files)
+    timer.stage("load")
+
+    if arguments.method == "parametric":
+        for stock in stocks:
+            risk = stock.calculate_parametric_risk(arguments.alpha,position = arguments.position)
+            print "%s\tvalue-at-risk (%.2f):\t%.4f" % (stock.ticker,arguments.alpha,risk)
+    else:
+        import numpy as np
+        panel = ReturnsPanel(stocks,missing = "drop")
+        weights = np.full(len(stocks),1.0 / len(stocks)) if arguments.weights is None else np.array(arguments.weights)
+        if len(weights) != len(stocks):
+            raise SystemExit("There must be one weight for each file.")
+        engine = RiskEngine(panel.returns,method = arguments.method,distribution = arguments.distribution,
+                            seed = arguments.seed,processes = arguments.processes)
+        risk = engine.evaluate(weights,alpha = arguments.alpha,position = arguments.position,
+                               scenarios = arguments.scenarios)
+        print "Portfolio of [%s] from %s to %s:" % (" ".join(panel.tickers),panel.dates[0],panel.dates[-1])
+        print "\tValue-at-risk (%.2f):\t%.4f" % (arguments.alpha,risk["value_at_risk"])
+        print "\tExpected shortfall:\t%.4f" % risk["expected_shortfall"]
+    timer.stage("analysis")
+
+
+def capm(arguments,timer):
+    from .capm import CAPM
+    timer.stage("import")
+    stocks = load_stocks([arguments.risk_free,arguments.market] + arguments.files)
+    timer.stage("load")
+
+    model = CAPM(stocks[0],stocks[1],alpha = arguments.alpha)
+    results = model.batch_regression(stocks[2:])
+    print "Ticker\talpha\t\t\t\t\tbeta"
+    for stock in stocks[2:]:
+        alpha, beta = results[stock.ticker]["alpha"], results[stock.ticker]["beta"]
+        print "%s\t%.6f [%.6f, %.6f]\t%.4f [%.4f, %.4f]" % ((stock.ticker,alpha["value"]) + tuple(alpha["confidence_interval"])
+                                                          + (beta["value"],) + tuple(beta["confidence_interval"]))
+    timer.stage("analysis")
+
+
+def barndorff_nielsen(arguments,timer):
+    # The test is applied to the whole history of each stock, to rolling
+    # windows of the histories, or to each day of a file of intraday prices.
+    import numpy as np
+    if arguments.intraday:
+        from .intraday import IntradayFile
+        timer.stage("import")
+        for path in arguments.files:
+            statistics = IntradayFile(path,interval = arguments.interval).daily_statistics(processes = arguments.processes)
+            print "%s:\nDate\t\tReturns\tStatistic\tp-value" % path
+            for i in range(len(statistics["dates"])):
+                print "%s\t%d\t%.4f\t\t%.4f%s" % (statistics["dates"][i],statistics["n_returns"][i],statistics["statistic"][i],
+                                                statistics["p_value"][i],"\tjump" if statistics["p_value"][i] < arguments.alpha else "")
+            if statistics["rejected"]:
+                print "%d line(s) of %s could not be read, and were rejected." % (statistics["rejected"],path)
+        timer.stage("analysis")
+        return
+
+    from .jumps import BarndorffNielsen, panel_barndorff_nielsen
+    timer.stage("import")
+    stocks = load_stocks(arguments.files)
+    timer.stage("load")
+    if arguments.window is None:
+        for stock in stocks:
+            with BarndorffNielsen(stock) as bn:
+                print "%s\tstatistic:\t%.4f\tp-value:\t%.4f\t%s" % (stock.ticker,bn.statistic,bn.p_value,
+                                                                 "jump" if bn.p_value < arguments.alpha else "no jump")
+    else:
+        results = panel_barndorff_nielsen(stocks,arguments.window)
+        with np.errstate(invalid = "ignore"):
+            jumps = results["p_value"] < arguments.alpha
+        for j,ticker in enumerate(results["tickers"]):
+            dates = results["dates"][jumps[:,j]]
+            print "%s\t%d of %d windows with a jump%s" % (ticker,len(dates),len(results["dates"]),
+                                                         (": " + " ".join(str(date) for date in dates)) if len(dates) else "")
+    timer.stage("analysis")
+
+
+def backtest(arguments,timer):
+    from .panel import ReturnsPanel
+    from .backtesting import run_backtest, threshold_strategy, format_backtest
+    timer.stage("import")
+    stocks = load_stocks(arguments.files)
+    timer.stage("load")
+
+    panel = ReturnsPanel(stocks,missing = "drop")
+    targets = threshold_strategy(panel.prices,buy = arguments.buy,sell = arguments.sell)
+    results = run_backtest(panel.prices,targets,transaction_cost = arguments.cost)
+    print format_backtest(panel.tickers,panel.dates,results)
+    timer.stage("analysis")
+
+
+def parser():
+    parser = argparse.ArgumentParser(prog = "python -m financial_tools",
+                                     description = "Run an analysis on price histories stored in local files.")
+    parser.add_argument("--timing",action = "store_true",help = "report the time taken by each stage on stderr")
+    parser.add_argument("--profile",action = "store_true",help = "report the instrumented stages of the analysis on stderr")
+    parser.add_argument("--trace",help = "write the instrumented stages to this file as a Chrome trace")
+    parser.add_argument("--records",help = "write the instrumented stages to this file as JSON records")
+    commands = parser.add_subparsers(dest = "command")
+
+    var = commands.add_parser("var",help = "value-at-risk of stocks or of a portfolio")
+    var.add_argument("files",nargs = "+",help = "daily prices in the CSV format of Yahoo Finance!")
+    var.add_argument("--alpha",type = float,default = .05)
+    var.add_argument("--position",type = float,default = 1.0)
+    var.add_argument("--method",choices = ("parametric","historical","monte_carlo"),default = "parametric")
+    var.add_argument("--distribution",choices = ("normal","t_copula"),default = "normal")
+    var.add_argument("--weights",type = float,nargs = "+")
+    var.add_argument("--scenarios",type = int,default = 100000)
+    var.add_argument("--seed",type = int)
+    var.add_argument("--processes",type = int)
+    var.set_defaults(run = value_at_risk)
+
+    regression = commands.add_parser("capm",help = "alpha and beta of stocks against the market")
+    regression.add_argument("risk_free",help = "daily prices of the risk free asset")
+    regression.add_argument("market",help = "daily prices of the market")
+    regression.add_argument("files",nargs = "+",help = "daily prices of the stocks")
+    regression.add_argument("--alpha",type = float,default = .05,help = "significance of the confidence intervals")
+    regression.set_defaults(run = capm)
+
+    bn = commands.add_parser("bn",help = "Barndorff-Nielsen test for jumps")
+    bn.add_argument("files",nargs = "+")
+    bn.add_argument("--alpha",type = float,default = .01)
+    bn.add_argument("--window",type = int,help = "test rolling windows of this many returns")
+    bn.add_argument("--intraday",action = "store_true",help = "test each day of files of intraday prices")
+    bn.add_argument("--interval",type = int,default = 300,help = "sampling interval of intraday prices in seconds")
+    bn.add_argument("--processes",type = int)
+    bn.set_defaults(run = barndorff_nielsen)
+
+    strategy = commands.add_parser("backtest",help = "backtest of the threshold strategy")
+    strategy.add_argument("files",nargs = "+")
+    strategy.add_argument("--buy",type = float,default = 9.5)
+    strategy.add_argument("--sell",type = float,default = 10.5)
+    strategy.add_argument("--cost",type = float,default = 0.0,help = "transaction cost per unit traded")
+    strategy.set_defaults(run = backtest)
+    return parser
+
+
+def main(argv = None):
+    arguments = parser().parse_args(argv)
+    timer = Timer(arguments.timing)
+    profiled = arguments.profile or arguments.trace is not None or arguments.records is not None
+    if profiled:
+        from . import instrumentation
+        instrumentation.enable()
+    timer.stage("startup")
+    arguments.run(arguments,timer)
+    timer.report()
+
+    if profiled:
+        if arguments.profile:
+            sys.stderr.write(instrumentation.format_summary(instrumentation.summary(by = ("stage","ticker"))) + "\n")
+        if arguments.trace is not None:
+            instrumentation.write_chrome_trace(arguments.trace)
+        if arguments.records is not None:
+            instrumentation.write_records(arguments.records)
@@ -0,0 +1,208 @@
+import numpy as np
+from multiprocessing import Pool
+from multiprocessing.sharedctypes import RawArray
+from .stock import Stock, DownloadError
+from .panel import ReturnsPanel
+
+# The critical values of the Engle-Granger test, from the response surfaces of
+# J. G. MacKinnon. 2010. "Critical Values for Cointegration Tests". Queen's
+# Economics Department Working Paper No. 1227. For N series, whose cointegrating
+# regression has a constant, the critical value at each significance level for T
+# observations is b0 + b1 / T + b2 / T^2 + b3 / T^3.
+CRITICAL_VALUES = {
+	1 : {.01 : (-3.43035,-6.5393,-16.786,-79.433),.05 : (-2.86154,-2.8903,-4.234,-40.040),.10 : (-2.56677,-1.5384,-2.809,0)},
+	2 : {.01 : (-3.89644,-10.9519,-22.527,0),.05 : (-3.33613,-6.1101,-6.823,0),.10 : (-3.04445,-4.2412,-2.720,0)},
+	3 : {.01 : (-4.29374,-14.4354,-33.195,47.433),.05 : (-3.74066,-8.5631,-10.852,27.982),.10 : (-3.45218,-6.2143,-3.718,0)},
+	4 : {.01 : (-4.64332,-18.1031,-37.972,0),.05 : (-4.09600,-11.2349,-11.175,0),.10 : (-3.81020,-8.3931,-4.137,0)},
+	5 : {.01 : (-4.95756,-21.8883,-45.142,0),.05 : (-4.41519,-14.0406,-12.575,0),.10 : (-4.13157,-10.7417,-3.784,0)},
+	6 : {.01 : (-5.24568,-25.6688,-57.737,88.639),.05 : (-4.70693,-16.9178,-17.492,60.007),.10 : (-4.42501,-13.1875,-5.104,27.877)}}
+
+# The prices mapped from shared memory by each worker process of a pair screen.
+shared_prices = None
+
+class CointegratedAssets(object):
+	# The "CointegratedAssets" class implements the Engle-Granger approach
+	# to cointegrated time series. The first asset is regressed on the others,
+	# and an augmented Dickey-Fuller test with "lags" lagged differences is
+	# applied to the residuals, whose statistic is compared with the critical
+	# value at the significance level.
+	#
+	# For a universe of assets, screen_pairs tests every pair at once:
+	#       pairs = screen_pairs(["MSFT","GOOG","AAPL","IBM"],min_correlation = .8)
+	#       print pairs["tickers"][pairs["cointegrated"]]
+
+	def __init__(self,assets,lags = 1,significance = .05):
+		# The assets may be given as stock objects, or as ticker symbols (or
+		# asset dictionaries) which are then downloaded concurrently.
+		assets, failures = Stock.load_many(assets)
+		if failures:
+			raise DownloadError(failures)
+
+		# The prices are aligned on the days on which every asset traded, so
+		# that each row of the price series refers to a single day.
+		panel = ReturnsPanel(assets,missing = "drop")
+		self.dates = panel.dates
+		self.price_series = panel.prices
+		self.dependent = self.price_series[:,0].T
+		self.independent = self.price_series[:,1:]
+		self.lags = lags
+		self.significance = significance
+
+		self.engle_granger = {}
+		self.engle_granger["step_one"] = self.engle_granger_step_one()
+		self.engle_granger["step_two"] = self.engle_granger_step_two()
+		self.engle_granger["cointegrated"] = self.engle_granger_cointegration_test()
+
+	def __str__(self):
+		if self.engle_granger["cointegrated"]:
+			return "The Engle-Granger test reports that cointegration exists between the time-series."
+		return "The Engle-Granger test reports that cointegration does not exist between the time-series."
+
+	def engle_granger_step_one(self):
+
+		constant = np.ones((self.independent.shape[0],1))
+		covariates = np.concatenate((constant,self.independent),axis = 1)
+
+		theta = np.linalg.lstsq(covariates,self.dependent,rcond = -1)[0]
+		residuals = self.dependent - np.dot(covariates,theta)
+
+		return {"theta" : theta,"residuals" : residuals}
+
+
+	def engle_granger_step_two(self):
+		# The augmented Dickey-Fuller test of a unit root in the residuals of the
+		# cointegrating regression.
+		residuals = self.engle_granger["step_one"]["residuals"]
+		statistic = augmented_dickey_fuller(residuals,self.lags)
+		return {"statistic" : statistic,"lags" : self.lags}
+
+	def engle_granger_cointegration_test(self):
+		n_series = self.price_series.shape[1]
+		critical_value = engle_granger_critical_value(n_series,len(self.dependent),self.significance)
+		self.engle_granger["critical_value"] = critical_value
+		return self.engle_granger["step_two"]["statistic"] < critical_value
+
+
+def engle_granger_critical_value(n_series,n_observations,significance = .05):
+	if n_series not in CRITICAL_VALUES or significance not in CRITICAL_VALUES[n_series]:
+		raise ValueError("Critical values are available for 1 to %d series at the 1%%, 5%% and 10%% levels." % max(CRITICAL_VALUES))
+	b = CRITICAL_VALUES[n_series][significance]
+	T = float(n_observations - 1)
+	return b[0] + b[1] / T + b[2] / T ** 2 + b[3] / T ** 3
+
+
+def augmented_dickey_fuller(residuals,lags = 1):
+	# The t statistic of gamma in the regression of the differences of each
+	# column of the residuals on its previous level and "lags" of its previous
+	# differences, without a constant since the residuals of the cointegrating
+	# regression have mean zero. The regressions of every column are solved
+	# together from their stacked normal equations.
+	residuals = np.asarray(residuals,dtype = np.float64)
+	single = residuals.ndim == 1
+	if single:
+		residuals = residuals[:,np.newaxis]
+	differences = np.diff(residuals,axis = 0)
+	n = differences.shape[0] - lags
+	targets = differences[lags:]
+	covariates = np.empty((lags + 1,n,residuals.shape[1]))
+	covariates[0] = residuals[lags:-1]
+	for i in range(1,lags + 1):
+		covariates[i] = differences[lags - i:-i]
+
+	XX = np.einsum("itm,jtm->mij",covariates,covariates)
+	Xy = np.einsum("itm,tm->mi",covariates,targets)
+	inverse = np.linalg.inv(XX)
+	coefficients = np.einsum("mij,mj->mi",inverse,Xy)
+	residual_squares = np.einsum("tm,tm->m",targets,targets) - np.einsum("mi,mi->m",coefficients,Xy)
+	variance = residual_squares / (n - lags - 1)
+	statistic = coefficients[:,0] / np.sqrt(variance * inverse[:,0,0])
+	return statistic[0] if single else statistic
+
+
+def screen_pairs(assets,min_correlation = .9,lags = 1,significance = .05,processes = None,chunk_size = 1024):
+	# Test every pair of a universe of assets for cointegration. The assets are
+	# stock objects, ticker symbols or asset dictionaries as for
+	# CointegratedAssets, or a matrix of prices with one column per asset.
+	if isinstance(assets,np.ndarray):
+		prices, tickers = assets, None
+	else:
+		assets, failures = Stock.load_many(assets)
+		if failures:
+			raise DownloadError(failures)
+		panel = ReturnsPanel(assets,missing = "drop")
+		prices, tickers = panel.prices, np.array(panel.tickers)
+	return screen_price_pairs(prices,tickers,min_correlation,lags,significance,processes,chunk_size)
+
+
+def screen_price_pairs(prices,tickers = None,min_correlation = .9,lags = 1,significance = .05,processes = None,chunk_size = 1024):
+	# The cointegrating regression of asset i on asset j depends only on their
+	# means, variances and covariance, so that the regressions of every pair are
+	# read from a single Gram matrix of the centered prices. Pairs whose prices
+	# are less correlated than min_correlation are discarded before any
+	# residuals are calculated. The residuals of the remaining pairs are tested
+	# in chunks by a pool of processes, which map the prices from shared memory.
+	#
+	# The Engle-Granger statistic depends on which asset of a pair is the
+	# dependent one, so that both regressions of every pair are tested, and
+	# the one with the more negative statistic is kept; the verdict therefore
+	# does not depend on the order of the columns. The pairs (as column indices
+	# and tickers, with the dependent asset first), the coefficients of the
+	# regression kept, the correlations and the test statistics are returned in
+	# order of the statistic, with the critical value and whether each pair is
+	# cointegrated. Without tickers, the assets are identified by their columns.
+	prices = np.ascontiguousarray(prices,dtype = np.float64)
+	n_days, n_assets = prices.shape
+	tickers = np.arange(n_assets) if tickers is None else np.asarray(tickers)
+	means = np.mean(prices,axis = 0)
+	centered = prices - means
+	gram = np.dot(centered.T,centered)
+	deviations = np.sqrt(np.diag(gram))
+	correlation = gram / np.outer(deviations,deviations)
+
+	first, second = np.triu_indices(n_assets,1)
+	keep = np.abs(correlation[first,second]) >= min_correlation
+	first, second = first[keep], second[keep]
+	n_pairs = len(first)
+
+	# The regressions of the first asset of each pair on the second, followed
+	# by those of the second on the first.
+	dependent, independent = np.concatenate((first,second)), np.concatenate((second,first))
+	beta = gram[dependent,independent] / gram[independent,independent]
+	alpha = means[dependent] - beta * means[independent]
+
+	shared = RawArray("d",prices.size)
+	np.frombuffer(shared,dtype = np.float64)[:] = prices.ravel()
+	arguments = [(dependent[i:i + chunk_size],independent[i:i + chunk_size],alpha[i:i + chunk_size],beta[i:i + chunk_size],lags)
+				 for i in range(0,len(dependent),chunk_size)]
+	if processes is not None and processes > 1 and len(arguments) > 1:
+		pool = Pool(processes,initializer = initialize_worker,initargs = (shared,prices.shape))
+		try:
+			statistics = pool.map(pair_statistics,arguments)
+		finally:
+			pool.close()
+			pool.join()
+	else:
+		initialize_worker(shared,prices.shape)
+		statistics = [pair_statistics(chunk_arguments) for chunk_arguments in arguments]
+	statistic = np.concatenate(statistics) if statistics else np.array([])
+
+	# Keep the direction of each pair whose statistic is the more negative.
+	kept = np.arange(n_pairs) + n_pairs * (statistic[n_pairs:] < statistic[:n_pairs])
+	critical_value = engle_granger_critical_value(2,n_days,significance)
+	order = kept[np.argsort(statistic[kept])]
+	pairs = np.column_stack((dependent,independent))[order]
+	return {"pairs" : pairs,"tickers" : tickers[pairs],"alpha" : alpha[order],"beta" : beta[order],
+			"correlation" : correlation[dependent,independent][order],"statistic" : statistic[order],
+			"critical_value" : critical_value,"cointegrated" : statistic[order] < critical_value}
+
+
+def initialize_worker(prices,shape):
+	# Map the shared prices as a numpy array, without copying them.
+	global shared_prices
+	shared_prices = np.frombuffer(prices,dtype = np.float64).reshape(shape)
+
+
+def pair_statistics(arguments):
+	first, second, alpha, beta, lags = arguments
+	residuals = shared_prices[:,first] - alpha - beta * shared_prices[:,second]
+	return augmented_dickey_fuller(residuals,lags)
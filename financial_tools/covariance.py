@@ -0,0 +1,349 @@
+# covariance.py: Estimators of the covariance matrix of the daily returns of
+#       many assets, for universes in which the number of assets approaches
+#       (or exceeds) the number of days of returns.
+#
+# The sample covariance matrix of N assets estimated from T days of returns has
+# rank at most T - 1, and is badly conditioned well before that point. The
+# following estimators are provided in its place:
+#
+#     SampleCovariance       The sample covariance, as calculated by np.cov.
+#     LedoitWolf             The sample covariance shrunk towards a multiple of
+#                            the identity matrix, by the intensity which is
+#                            optimal under the quadratic loss of Ledoit and Wolf.
+#     ExponentialCovariance  The covariance with the weight of each day decaying
+#                            exponentially with its age (as in RiskMetrics).
+#     FactorModel            A covariance of the form L L' + diag(D), where L has
+#                            one column for each of a few factors. The factors
+#                            are either principal components of the returns or
+#                            the returns of observable factors (such as the
+#                            market premium).
+#
+# Every estimator keeps only the running sums from which it is calculated, so
+# that the returns of a new day are incorporated by a rank-one update of those
+# sums, without revisiting the history. The factor model never forms an N x N
+# matrix: its sums grow with the number of assets times the number of factors,
+# and products with the covariance are calculated through the factors.
+#
+# Every estimator provides fit(returns), which replaces the sums by those of a
+# matrix of returns, update(returns), which adds the returns of further days,
+# and calculate(), which forms the covariance from the sums; each of fit and
+# update returns the estimator. The sample and Ledoit-Wolf estimators also
+# provide remove(returns), which subtracts days that were added before, as
+# when a window of days slides forward. A covariance matrix which is given in
+# place of an estimator (CovarianceMatrix) is fixed: fitting, updating or
+# removing days leaves it unchanged, so that a portfolio recalculates the
+# matrix rather than updating it.
+#
+# Olivier Ledoit and Michael Wolf. 2004. "A Well-Conditioned Estimator for
+# Large-Dimensional Covariance Matrices". Journal of Multivariate Analysis 88,
+# 365-411.
+#
+# The following is an example of how to estimate a factor model and to bring it
+# up to date with the returns of a further day:
+#       model = FactorModel(returns,n_factors = 3)
+#       model.update(todays_returns)
+#       print model.quadratic(weights), model.diagonal()
+
+import numpy as np
+
+
+class CovarianceEstimator(object):
+    # The operations on the covariance matrix which are needed by the optimizer
+    # and the risk engine. By default they are calculated from the dense matrix,
+    # which is cached until the next update.
+    cache = None
+
+    def to_dense(self):
+        if self.cache is None:
+            self.cache = self.calculate()
+        return self.cache
+
+    def factored(self):
+        # Estimators which are kept in factored form return the pair (L,D) for
+        # which the covariance is L L' + diag(D); the others return None.
+        return None
+
+    def dot(self,weights):
+        return np.dot(self.to_dense(),weights)
+
+    def quadratic(self,weights):
+        # The variance w'Sw of one portfolio, or of each column of a matrix of
+        # portfolio weights.
+        weights = np.asarray(weights,dtype = np.float64)
+        return np.sum(weights * self.dot(weights),axis = 0)
+
+    def diagonal(self):
+        return np.diag(self.to_dense()).copy()
+
+
+class CovarianceMatrix(CovarianceEstimator):
+    # A covariance matrix which has already been calculated (for example, the
+    # pairwise covariance of returns with missing days).
+    def __init__(self,covariance):
+        self.cache = np.atleast_2d(np.asarray(covariance,dtype = np.float64))
+
+    def fit(self,returns):
+        return self
+
+    def update(self,returns):
+        return self
+
+    def remove(self,returns):
+        return self
+
+
+class SampleCovariance(CovarianceEstimator):
+    def __init__(self,returns = None):
+        self.count = 0
+        self.sums = None
+        self.cross = None
+        if returns is not None:
+            self.fit(returns)
+
+    def fit(self,returns):
+        x = complete_rows(returns)
+        self.count = x.shape[0]
+        self.sums = np.sum(x,axis = 0)
+        self.cross = np.dot(x.T,x)
+        self.cache = None
+        return self
+
+    def update(self,returns):
+        # The returns of a single day, or a matrix of the returns of several
+        # days with one row for each day.
+        r = np.atleast_2d(np.asarray(returns,dtype = np.float64))
+        if self.sums is None:
+            self.sums, self.cross = np.zeros(r.shape[1]), np.zeros((r.shape[1],r.shape[1]))
+        self.count += r.shape[0]
+        self.sums += np.sum(r,axis = 0)
+        self.cross += np.dot(r.T,r)
+        self.cache = None
+        return self
+
+    def remove(self,returns):
+        # Remove days which were previously added, as when the window of days
+        # from which the covariance is estimated slides forward.
+        r = np.atleast_2d(np.asarray(returns,dtype = np.float64))
+        self.count -= r.shape[0]
+        self.sums -= np.sum(r,axis = 0)
+        self.cross -= np.dot(r.T,r)
+        self.cache = None
+        return self
+
+    def mean(self):
+        return self.sums / self.count
+
+    def calculate(self):
+        return (self.cross - np.outer(self.sums,self.sums) / self.count) / (self.count - 1)
+
+
+class LedoitWolf(SampleCovariance):
+    # Writing S for the sample covariance (normalized by the number of days T,
+    # as in the paper) and mu = tr(S) / N, the estimator is
+    #     (1 - s) S + s mu I
+    # with the shrinkage intensity s = min(b, d) / d, where
+    #     d = ||S - mu I||^2 / N
+    #     b = (sum_t ||y_t||^4 / T - ||S||^2) / (T N)
+    # and y_t are the demeaned returns of day t. The sum of the fourth powers
+    # depends on the mean of the returns, which changes with every update. It
+    # is therefore expanded into running sums which do not: with a_t = ||x_t||^2
+    # and c = ||m||^2 for the mean m,
+    #     sum_t ||x_t - m||^4 = sum a_t^2 - 4 m'(sum a_t x_t) + 2 c sum a_t
+    #                           + 4 m'(sum x_t x_t')m - 4 c m'(sum x_t) + T c^2
+    def fit(self,returns):
+        x = complete_rows(returns)
+        squared_norms = np.sum(x * x,axis = 1)
+        self.fourth = np.sum(squared_norms ** 2)
+        self.weighted = np.dot(squared_norms,x)
+        return super(LedoitWolf,self).fit(x)
+
+    def update(self,returns):
+        r = np.atleast_2d(np.asarray(returns,dtype = np.float64))
+        if self.sums is None:
+            self.fourth, self.weighted = 0.0, np.zeros(r.shape[1])
+        squared_norms = np.sum(r * r,axis = 1)
+        self.fourth += np.sum(squared_norms ** 2)
+        self.weighted += np.dot(squared_norms,r)
+        return super(LedoitWolf,self).update(r)
+
+    def remove(self,returns):
+        r = np.atleast_2d(np.asarray(returns,dtype = np.float64))
+        squared_norms = np.sum(r * r,axis = 1)
+        self.fourth -= np.sum(squared_norms ** 2)
+        self.weighted -= np.dot(squared_norms,r)
+        return super(LedoitWolf,self).remove(r)
+
+    def calculate(self):
+        T, N = float(self.count), len(self.sums)
+        m = self.sums / T
+        S = self.cross / T - np.outer(m,m)
+        mu = np.trace(S) / N
+        norm_squared = np.sum(S * S)
+        d = (norm_squared - 2 * mu * np.trace(S) + N * mu ** 2) / N
+
+        c = np.dot(m,m)
+        quartic = (self.fourth - 4 * np.dot(self.weighted,m) + 2 * c * np.trace(self.cross)
+                   + 4 * np.dot(m,np.dot(self.cross,m)) - 4 * c * np.dot(self.sums,m) + T * c ** 2)
+        b = (quartic / T - norm_squared) / (T * N)
+        self.shrinkage = min(max(b,0),d) / d if d > 0 else 0.0
+
+        covariance = (1 - self.shrinkage) * S
+        covariance[np.diag_indices(int(N))] += self.shrinkage * mu
+        return covariance
+
+
+class ExponentialCovariance(CovarianceEstimator):
+    # The weight of the return of a day which is t days old is decay^t, and the
+    # weights are normalized to sum to one.
+    def __init__(self,returns = None,decay = .94):
+        self.decay = decay
+        self.weight = 0.0
+        self.sums = None
+        self.cross = None
+        if returns is not None:
+            self.fit(returns)
+
+    def fit(self,returns):
+        x = complete_rows(returns)
+        weights = self.decay ** np.arange(x.shape[0] - 1,-1,-1,dtype = np.float64)
+        self.weight = np.sum(weights)
+        self.sums = np.dot(weights,x)
+        self.cross = np.dot(x.T * weights,x)
+        self.cache = None
+        return self
+
+    def update(self,returns):
+        r = np.asarray(returns,dtype = np.float64).ravel()
+        if self.sums is None:
+            self.sums, self.cross = np.zeros(len(r)), np.zeros((len(r),len(r)))
+        self.weight = self.decay * self.weight + 1
+        self.sums *= self.decay
+        self.sums += r
+        self.cross *= self.decay
+        self.cross += np.outer(r,r)
+        self.cache = None
+        return self
+
+    def calculate(self):
+        m = self.sums / self.weight
+        return self.cross / self.weight - np.outer(m,m)
+
+
+class FactorModel(CovarianceEstimator):
+    # The returns of each asset are regressed on the returns of the factors,
+    #     x_t = a + B'f_t + e_t
+    # so that the covariance is B'FB + diag(D), for the covariance F of the
+    # factors and the variances D of the residuals. The regressions only need
+    # the sums of the factor returns, of their cross products with one another
+    # and with the asset returns, and of the squared asset returns.
+    #
+    # Without observable factors, the factors are the first principal
+    # components of the returns. Their basis is found when the model is fitted
+    # and is held fixed afterwards, so that the returns of the factors on later
+    # days are simply projections onto the basis.
+    def __init__(self,returns = None,factors = None,n_factors = 3):
+        self.n_factors = n_factors
+        self.basis = None
+        if returns is not None:
+            self.fit(returns,factors)
+
+    def fit(self,returns,factors = None):
+        returns = np.atleast_2d(np.asarray(returns,dtype = np.float64).T).T
+        if factors is None:
+            x = complete_rows(returns)
+            centered = x - np.mean(x,axis = 0)
+            basis = np.linalg.svd(centered,full_matrices = False)[2]
+            self.basis = basis[:min(self.n_factors,len(basis))].T
+            f = np.dot(x,self.basis)
+        else:
+            factors = np.atleast_2d(np.asarray(factors,dtype = np.float64).T).T
+            complete = np.all(np.isfinite(returns),axis = 1) & np.all(np.isfinite(factors),axis = 1)
+            x, f = returns[complete], factors[complete]
+            self.basis = None
+
+        self.count = x.shape[0]
+        self.factor_sums = np.sum(f,axis = 0)
+        self.asset_sums = np.sum(x,axis = 0)
+        self.factor_cross = np.dot(f.T,f)
+        self.factor_asset_cross = np.dot(f.T,x)
+        self.asset_squares = np.sum(x * x,axis = 0)
+        self.cache = None
+        return self
+
+    def update(self,returns,factors = None):
+        x = np.asarray(returns,dtype = np.float64).ravel()
+        if self.basis is not None:
+            f = np.dot(x,self.basis)
+        elif factors is None:
+            raise ValueError("The returns of the observable factors are required to update the model.")
+        else:
+            f = np.asarray(factors,dtype = np.float64).ravel()
+
+        self.count += 1
+        self.factor_sums += f
+        self.asset_sums += x
+        self.factor_cross += np.outer(f,f)
+        self.factor_asset_cross += np.outer(f,x)
+        self.asset_squares += x * x
+        self.cache = None
+        return self
+
+    def calculate(self):
+        n = float(self.count)
+        factor_mean, asset_mean = self.factor_sums / n, self.asset_sums / n
+        F = (self.factor_cross - n * np.outer(factor_mean,factor_mean)) / (n - 1)
+        C = (self.factor_asset_cross - n * np.outer(factor_mean,asset_mean)) / (n - 1)
+        variances = (self.asset_squares - n * asset_mean ** 2) / (n - 1)
+
+        # Since F B = C, the variance explained by the factors is b'Fb = b'C for
+        # each asset. Writing F = R R' by its Cholesky factorization, B'FB is
+        # L L' with L = B'R.
+        B = np.linalg.solve(F,C)
+        D = np.maximum(variances - np.sum(B * C,axis = 0),0)
+        L = np.dot(B.T,np.linalg.cholesky(F))
+        return L, D
+
+    def factored(self):
+        if self.cache is None:
+            self.cache = self.calculate()
+        return self.cache
+
+    def to_dense(self):
+        L, D = self.factored()
+        covariance = np.dot(L,L.T)
+        covariance[np.diag_indices(len(D))] += D
+        return covariance
+
+    def dot(self,weights):
+        L, D = self.factored()
+        weights = np.asarray(weights,dtype = np.float64)
+        scale = D if weights.ndim == 1 else D[:,np.newaxis]
+        return np.dot(L,np.dot(L.T,weights)) + scale * weights
+
+    def quadratic(self,weights):
+        L, D = self.factored()
+        weights = np.asarray(weights,dtype = np.float64)
+        scale = D if weights.ndim == 1 else D[:,np.newaxis]
+        return np.sum(np.dot(L.T,weights) ** 2,axis = 0) + np.sum(scale * weights ** 2,axis = 0)
+
+    def diagonal(self):
+        L, D = self.factored()
+        return np.sum(L * L,axis = 1) + D
+
+
+ESTIMATORS = {"sample" : SampleCovariance,"ledoit_wolf" : LedoitWolf,
+              "ewma" : ExponentialCovariance,"factor" : FactorModel}
+
+
+def estimate_covariance(returns,method = "sample",**options):
+    # Fit the estimator of the given name to a matrix of returns, with one row
+    # for each day and one column for each asset.
+    if method not in ESTIMATORS:
+        raise ValueError("Unknown covariance estimator: " + str(method))
+    return ESTIMATORS[method](returns,**options)
+
+
+def complete_rows(returns):
+    # Only the days on which every asset has a return are used.
+    returns = np.atleast_2d(np.asarray(returns,dtype = np.float64).T).T
+    return returns[np.all(np.isfinite(returns),axis = 1)]
@@ -0,0 +1,129 @@
+# distributions.py: Maximum likelihood estimation of the t-distribution for
+#       many series of returns at once.
+#
+# The location, scale and degrees of freedom of a t-distribution are fitted to
+# every column of a matrix of returns simultaneously by the ECME algorithm of
+# Liu and Rubin, which is a variant of the EM algorithm. Each iteration is a
+# handful of vectorized operations over the entire matrix, in place of the
+# general-purpose numerical optimizer which scipy.stats.t.fit runs separately
+# for every series. Missing returns may be marked as nan, so that series of
+# different lengths can be fitted together.
+#
+# Chuanhai Liu and Donald B. Rubin. 1995. "ML Estimation of the t Distribution
+# Using EM and its Extensions, ECM and ECME". Statistica Sinica 5, 19-39.
+#
+# The following is an example of how to fit t-distributions to the daily
+# returns of many stocks, beginning from the estimates of a previous fit:
+#       dof, loc, scale = fit_t(returns)
+#       dof, loc, scale = fit_t(more_returns,initial = (dof,loc,scale))
+
+import numpy as np
+from .instrumentation import stage
+
+
+def fit_t(returns,initial = None,tolerance = 1e-8,iterations = 500,**attributes):
+    # The returns are either a single series or a matrix with one series in
+    # each column. The degrees of freedom, the location and the scale of each
+    # series are returned, in the same order as by scipy.stats.t.fit. Any
+    # further keyword arguments are recorded as attributes of the stage of the
+    # fit (see instrumentation.py), such as the ticker of the series.
+    returns = np.asarray(returns,dtype = np.float64)
+    single = returns.ndim == 1
+    x = returns.reshape((returns.shape[0],-1))
+
+    observed = np.isfinite(x)
+    x = np.where(observed,x,0)
+    n = np.sum(observed,axis = 0).astype(np.float64)
+
+    if initial is not None:
+        dof, loc, scale = [np.array(parameter,dtype = np.float64).ravel() * np.ones(x.shape[1]) for parameter in initial]
+    else:
+        dof, loc, scale = initial_estimates(np.where(observed,x,np.nan))
+
+    # Series are retired from the iterations as they converge, so that the
+    # remaining iterations only touch the columns which are still changing.
+    active = np.arange(x.shape[1])
+    with stage("fit_t",series = x.shape[1],returns = x.shape[0],**attributes) as record:
+        for iteration in range(iterations):
+            if not len(active):
+                break
+            record.add(iterations = 1)
+            xa, oa, na = x[:,active], observed[:,active], n[active]
+            dof_a, loc_a, scale_a = dof[active], loc[active], scale[active]
+
+            # Expectation step: the weight of each return is the expected value of
+            # the latent precision, which is small for returns far in the tails.
+            d = ((xa - loc_a) / scale_a) ** 2
+            w = np.where(oa,(dof_a + 1) / (dof_a + d),0)
+
+            # Conditional maximization steps for the location and the scale.
+            new_loc = np.sum(w * xa,axis = 0) / np.sum(w,axis = 0)
+            new_scale = np.sqrt(np.sum(w * (xa - new_loc) ** 2,axis = 0) / na)
+
+            # The degrees of freedom maximize the actual likelihood, given the new
+            # location and scale (this is the "either" of ECME).
+            d = np.where(oa,((xa - new_loc) / new_scale) ** 2,0)
+            new_dof = maximize_dof(d,oa,na,dof_a)
+
+            change = np.maximum(np.abs(new_loc - loc_a) / new_scale,np.abs(new_scale - scale_a) / new_scale)
+            change = np.maximum(change,np.abs(np.log(new_dof) - np.log(dof_a)))
+            dof[active], loc[active], scale[active] = new_dof, new_loc, new_scale
+            active = active[change >= tolerance]
+
+    if single:
+        return dof[0], loc[0], scale[0]
+    return dof, loc, scale
+
+
+def initial_estimates(x):
+    # Robust starting values: the median for the location, the median absolute
+    # deviation for the scale, and the degrees of freedom which match the
+    # sample kurtosis (the excess kurtosis of a t-distribution is 6 / (nu - 4)).
+    loc = np.nanmedian(x,axis = 0)
+    scale = 1.4826 * np.nanmedian(np.abs(x - loc),axis = 0)
+    scale = np.where(scale > 0,scale,np.nanstd(x,axis = 0) + 1e-12)
+    centered = x - np.nanmean(x,axis = 0)
+    kurtosis = np.nanmean(centered ** 4,axis = 0) / np.nanmean(centered ** 2,axis = 0) ** 2 - 3
+    dof = np.where(kurtosis > 0,4 + 6 / np.maximum(kurtosis,1e-6),30.0)
+    return np.clip(dof,2.5,100.0), loc, scale
+
+
+def maximize_dof(d,observed,n,initial,lower = .1,upper = 1000.0,tolerance = 1e-10,iterations = 50):
+    # The derivative of the log-likelihood with respect to the degrees of
+    # freedom nu, for standardized squared deviations d, is
+    #     n / 2 * (psi((nu + 1) / 2) - psi(nu / 2) - 1 / nu)
+    #         - 1 / 2 * sum(log(1 + d / nu)) + (nu + 1) / 2 * sum(d / (nu * (nu + d)))
+    # which decreases through zero at the maximum. The root is found for every
+    # series at once by Newton's method, starting from the previous degrees of
+    # freedom, so that only a few passes over the returns are needed once the
+    # algorithm has begun to converge. Each series keeps a bracket around its
+    # root, and bisects the bracket whenever a Newton step would leave it. When
+    # the derivative is still positive at the upper limit, the series cannot be
+    # distinguished from a normal distribution, and the degrees of freedom are
+    # set to the limit.
+    from scipy.special import digamma, polygamma
+    low = np.full(d.shape[1],lower)
+    high = np.full(d.shape[1],upper)
+    nu = np.clip(initial,lower,upper)
+
+    for iteration in range(iterations):
+        ratio = d / (nu * (nu + d))
+        first = (n / 2 * (digamma((nu + 1) / 2) - digamma(nu / 2) - 1 / nu)
+                 - np.sum(np.log1p(d / nu) * observed,axis = 0) / 2
+                 + (nu + 1) / 2 * np.sum(ratio * observed,axis = 0))
+        second = (n / 4 * (polygamma(1,(nu + 1) / 2) - polygamma(1,nu / 2)) + n / (2 * nu ** 2)
+                  + np.sum(ratio * observed,axis = 0)
+                  - (nu + 1) / 2 * np.sum(ratio * (2 * nu + d) / (nu * (nu + d)) * observed,axis = 0))
+
+        low = np.where(first > 0,nu,low)
+        high = np.where(first > 0,high,nu)
+        with np.errstate(divide = "ignore",invalid = "ignore"):
+            step = nu - first / second
+        bisect = ~np.isfinite(step) | (step <= low) | (step >= high)
+        new_nu = np.where(bisect,np.sqrt(low * high),step)
+
+        converged = np.all(np.abs(new_nu - nu) <= tolerance * nu)
+        nu = new_nu
+        if converged:
+            break
+    return nu
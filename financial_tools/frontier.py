@@ -0,0 +1,370 @@
+# frontier.py: An implementation of Markowitz's critical line algorithm for the
+#       computation of the efficient frontier of a portfolio of assets. The
+#       algorithm is subject to the constraints that the weights of the
+#       portfolio sum to one and that every weight lies within a lower and an
+#       upper bound; by default, the portfolio is long-only.
+#
+# Rather than solving a quadratic program for each of many levels of risk
+# aversion, the critical line algorithm traces the entire efficient frontier
+# exactly. The frontier is piecewise linear in the portfolio weights: between
+# a pair of adjacent "corner portfolios" the efficient portfolios are convex
+# combinations of the two corners. The algorithm moves from the portfolio of
+# greatest expected return to the portfolio of minimum variance, and at every
+# step either a free weight reaches one of its bounds or a bounded weight is
+# freed. The mathematics and the structure of this implementation follow:
+#
+# David H. Bailey and Marcos Lopez de Prado. 2013. "An Open-Source
+# Implementation of the Critical-Line Algorithm for Portfolio Optimization".
+# Algorithms 6(1), 169-196.
+#
+# Unlike that implementation, several events which occur at the same value of
+# lambda (such as assets with equal expected returns) are processed one after
+# another rather than all but one being lost, the portfolio of greatest
+# expected return is resolved among tied assets to the one of least variance,
+# and the equations of the free weights are solved directly, with a small ridge
+# added to the covariance matrix, rather than by inverting it, so that a
+# singular covariance matrix (more assets than observations) is supported. The
+# final corner is always the portfolio of minimum variance.
+#
+# The following is an example of how the critical line algorithm may be used
+# to find the portfolio with the greatest Sharpe's ratio:
+#       cla = CriticalLineAlgorithm(expected_returns,covariance)
+#       weights = cla.max_sharpe(risk_free = .01)
+#       returns, risk, weights = cla.frontier(100)
+#
+# The covariance matrix may also be given in the factored form L L' + diag(D)
+# of a factor model (see covariance.py), as the pair (L,D), in which case the
+# N x N matrix is never formed. The equations of the free weights are then
+# solved through the Woodbury identity
+#       (diag(D) + L L')^-1 = D^-1 - D^-1 L (I + L'D^-1 L)^-1 L'D^-1,
+# at a cost linear in the number of free assets, or, when some free asset has
+# (almost) no specific variance, from the covariance matrix of the free assets
+# alone.
+#       cla = CriticalLineAlgorithm(expected_returns,factor_model.factored())
+
+import numpy as np
+
+# The relative tolerance within which two values of lambda are taken to be the
+# same event.
+TOLERANCE = 1e-9
+
+# The ridge, relative to the average variance, which is added to the covariance
+# matrix of the free assets so that the equations of the free weights may be
+# solved when the covariance matrix is singular.
+RIDGE = 1e-10
+
+# The least specific variance of the free assets, relative to the average
+# variance, for which the equations of a factored covariance matrix are solved
+# through the Woodbury identity, which loses precision as the specific
+# variances vanish.
+WOODBURY_MINIMUM = 1e-6
+
+
+class CriticalLineAlgorithm(object):
+    def __init__(self,mean,covariance,lower = None,upper = None):
+        self.mean = np.asarray(mean,dtype = np.float64).ravel()
+        if isinstance(covariance,tuple):
+            self.covariance = None
+            self.loadings = np.atleast_2d(np.asarray(covariance[0],dtype = np.float64).T).T
+            self.variances = np.asarray(covariance[1],dtype = np.float64).ravel()
+        else:
+            self.covariance = np.atleast_2d(np.asarray(covariance,dtype = np.float64))
+            self.loadings = self.variances = None
+        n = len(self.mean)
+        self.lower = np.zeros(n) if lower is None else np.asarray(lower,dtype = np.float64).ravel()
+        self.upper = np.ones(n) if upper is None else np.asarray(upper,dtype = np.float64).ravel()
+
+        # The corner portfolios, together with the values of the Lagrange
+        # multipliers of the expected return (lambda) and of the budget
+        # constraint (gamma) at which they occur.
+        self.weights, self.lambdas, self.gammas = [], [], []
+        self.solve()
+        self.purge_numerical_errors()
+        self.purge_excess()
+
+    def initial_portfolio(self):
+        # The portfolio of greatest expected return places as much weight as
+        # possible in the assets with the greatest expected returns. Beginning
+        # with every weight at its lower bound, raise the weight of each asset
+        # to its upper bound in order of expected return until the budget is
+        # exhausted. The final asset to be raised is the first free asset.
+        weights = self.lower.copy()
+        order = np.argsort(-self.mean,kind = "mergesort")
+        for i in order:
+            weights[i] = self.upper[i]
+            if np.sum(weights) >= 1:
+                weights[i] -= np.sum(weights) - 1
+                return weights, [i]
+        raise ValueError("The upper bounds on the portfolio weights cannot satisfy the budget constraint.")
+
+    def solve(self):
+        # The portfolio of greatest expected return is not unique when several
+        # assets share the expected return of the first free asset. Of those
+        # portfolios, the efficient one has the least variance, and it is found
+        # by tracing the frontier of the tied assets alone (every other weight
+        # held at its bound) to its end, with expected returns which break the
+        # tie in any order, since the portfolio of minimum variance does not
+        # depend on them.
+        n = len(self.mean)
+        self.variance_scale = np.mean(np.abs(self.diagonal())) or 1.0
+        self.ridge = RIDGE * self.variance_scale
+        weights, free = self.initial_portfolio()
+        tied = [i for i in range(n) if self.mean[i] == self.mean[free[0]] and self.lower[i] < self.upper[i]]
+        if len(tied) > 1:
+            tie_break = np.zeros(n)
+            tie_break[tied] = -np.arange(len(tied),dtype = np.float64)
+            weights, free = self.trace(weights,free,tie_break,tied,record = False)
+        self.append_corner(weights,None,None)
+        self.trace(weights,free,self.mean,range(n))
+
+    def trace(self,weights,free,mean,eligible,record = True,iterations = None):
+        # Between events the free weights, and the Lagrange multiplier of the
+        # budget constraint, are linear in lambda. Lambda falls from infinity
+        # to zero, and at every step the next event is the greatest value of
+        # lambda below the current one at which either a free weight reaches a
+        # bound (case a) or the multiplier of an eligible bounded weight changes
+        # sign, so that the weight becomes free (case b). Several events may
+        # occur at the same lambda; they are then processed one after another,
+        # each at that same lambda, except that the asset which has just changed
+        # is not immediately changed back. The final weights and free assets
+        # are returned.
+        n = len(mean)
+        weights, free, eligible = weights.copy(), list(free), np.asarray(eligible)
+        at_upper = (weights >= self.upper) & ~np.isin(np.arange(n),free)
+
+        # Slopes and multipliers which are no larger than rounding errors, on
+        # the scales of the expected returns and of the variances, are zero.
+        mean_scale = np.max(np.abs(mean)) or 1.0
+        variance_scale = self.variance_scale
+        slope_tolerance = TOLERANCE * mean_scale / variance_scale
+
+        current, changed = np.inf, None
+        iterations = iterations if iterations is not None else 50 * (n + 1)
+        for iteration in range(iterations):
+            w_constant, w_lambda, g_constant, g_lambda, gamma = self.free_solution(free,weights,mean)
+
+            # Case a): a free weight falls to its lower bound, or rises to its
+            # upper bound, as lambda decreases. Case b): the multiplier of a
+            # weight at its lower bound must remain positive, and that of a
+            # weight at its upper bound negative; a multiplier which has the
+            # wrong sign whatever the value of lambda frees the weight at once.
+            # The candidates of every asset are calculated at once, and those of
+            # assets without an event are minus infinity.
+            is_free = np.zeros(n,dtype = bool)
+            is_free[free] = True
+            candidates, bounds = np.full(n,-np.inf), np.full(n,np.nan)
+            with np.errstate(divide = "ignore",invalid = "ignore"):
+                for moving,bound in ((w_lambda > slope_tolerance,self.lower),(w_lambda < -slope_tolerance,self.upper)):
+                    moving &= is_free
+                    candidates[moving] = ((bound - w_constant) / w_lambda)[moving]
+                    bounds[moving] = bound[moving]
+                bounded = ~is_free & (self.lower < self.upper)
+                sign = np.where(at_upper,-1.0,1.0)
+                crossing = bounded & (sign * g_lambda > TOLERANCE * mean_scale)
+                candidates[crossing] = (-g_constant / g_lambda)[crossing]
+                candidates[bounded & ~crossing & (sign * g_constant < -TOLERANCE * variance_scale)] = current
+            candidates = np.minimum(candidates,current)
+            if changed is not None and candidates[changed] >= current * (1 - TOLERANCE):
+                candidates[changed] = -np.inf
+
+            candidates = candidates[eligible]
+            l = candidates[np.argmax(candidates)] if len(candidates) else -np.inf
+            event = eligible[np.argmax(candidates)] if l > -np.inf else None
+
+            if event is None or l <= 0:
+                # When no event occurs at a positive value of lambda, the
+                # frontier terminates at the portfolio of minimum variance, at
+                # which the expected return carries no weight (lambda is zero).
+                weights[free] = w_constant[free]
+                if record:
+                    self.append_corner(weights,0.0,gamma[0])
+                return weights, free
+
+            weights[free] = w_constant[free] + (l * w_lambda[free] if np.isfinite(l) else 0)
+            if is_free[event]:
+                free.remove(event)
+                weights[event] = bounds[event]
+                at_upper[event] = bounds[event] >= self.upper[event]
+            else:
+                free.append(event)
+                at_upper[event] = False
+            if record:
+                self.append_corner(weights,l,gamma[0] + (l * gamma[1] if np.isfinite(l) else 0))
+            current, changed = l, event
+        raise ValueError("The critical line algorithm did not reach the portfolio of minimum variance.")
+
+    def free_solution(self,free,weights,mean):
+        # The weights and the multipliers of the bounded weights, as linear
+        # functions of lambda (constant + lambda * slope), given the free assets
+        # and the weights of the assets at their bounds. The free weights solve
+        #     S_FF w_F - gamma * 1 = lambda * mu_F - S_FB w_B,    1'w_F = 1 - 1'w_B,
+        # with a small ridge added to S_FF (see solve_free), so that they have a
+        # solution even when the covariance matrix is singular.
+        n = len(mean)
+        bounded = np.ones(n,dtype = bool)
+        bounded[free] = False
+        w_bounded = np.where(bounded,weights,0.0)
+
+        right_hand_side = np.zeros((len(free) + 1,2))
+        right_hand_side[:-1,0] = -self.dot(w_bounded)[free]
+        right_hand_side[-1,0] = 1 - np.sum(w_bounded)
+        right_hand_side[:-1,1] = mean[free]
+        solution, gamma = self.solve_free(free,right_hand_side)
+
+        w_constant, w_lambda = w_bounded, np.zeros(n)
+        w_constant[free], w_lambda[free] = solution[:,0], solution[:,1]
+        g_constant = self.dot(w_constant) + self.ridge * w_constant - gamma[0]
+        g_lambda = self.dot(w_lambda) + self.ridge * w_lambda - mean - gamma[1]
+        return w_constant, w_lambda, g_constant, g_lambda, gamma
+
+    def solve_free(self,free,right_hand_side):
+        # Solve the equations of the free weights
+        #     (S_FF + ridge * I) w_F - gamma * 1 = b,    1'w_F = c
+        # for each column (b,c) of the right hand side.
+        if self.loadings is not None and np.min(self.variances[free]) >= WOODBURY_MINIMUM * self.variance_scale:
+            # Eliminating w_F = S^-1 (b + gamma * 1) from the budget constraint
+            # gives gamma = (c - 1'S^-1 b) / 1'S^-1 1.
+            inverse = self.woodbury(free,np.column_stack((right_hand_side[:-1],np.ones(len(free)))))
+            gamma = (right_hand_side[-1] - np.sum(inverse[:,:-1],axis = 0)) / np.sum(inverse[:,-1])
+            return inverse[:,:-1] + np.outer(inverse[:,-1],gamma), gamma
+
+        system = np.zeros((len(free) + 1,len(free) + 1))
+        system[:-1,:-1] = self.free_covariance(free) + self.ridge * np.eye(len(free))
+        system[:-1,-1] = -1.0
+        system[-1,:-1] = 1.0
+        solution = np.linalg.solve(system,right_hand_side)
+        return solution[:-1], solution[-1]
+
+    def woodbury(self,free,right_hand_side):
+        # The product of the inverse of the (ridged) covariance matrix of the
+        # free assets with a matrix, for a factored covariance matrix.
+        L = self.loadings[free]
+        inverse_variances = 1.0 / (self.variances[free] + self.ridge)
+        scaled = L * inverse_variances[:,np.newaxis]
+        capacitance = np.eye(L.shape[1]) + np.dot(L.T,scaled)
+        products = right_hand_side * inverse_variances[:,np.newaxis]
+        return products - np.dot(scaled,np.linalg.solve(capacitance,np.dot(L.T,products)))
+
+    def free_covariance(self,free):
+        if self.loadings is None:
+            return self.covariance[np.ix_(free,free)]
+        L = self.loadings[free]
+        return np.dot(L,L.T) + np.diag(self.variances[free])
+
+    def dot(self,weights):
+        if self.loadings is None:
+            return np.dot(self.covariance,weights)
+        return np.dot(self.loadings,np.dot(self.loadings.T,weights)) + self.variances * weights
+
+    def diagonal(self):
+        if self.loadings is None:
+            return np.diag(self.covariance)
+        return np.sum(self.loadings ** 2,axis = 1) + self.variances
+
+    def quadratic(self,weights):
+        # The variance of each row of a matrix of portfolio weights.
+        weights = np.atleast_2d(weights)
+        if self.loadings is None:
+            return np.sum(np.dot(weights,self.covariance) * weights,axis = 1)
+        return np.sum(np.dot(weights,self.loadings) ** 2,axis = 1) + np.sum(weights ** 2 * self.variances,axis = 1)
+
+    def append_corner(self,weights,l,gamma):
+        self.weights.append(weights.copy())
+        self.lambdas.append(l)
+        self.gammas.append(gamma)
+
+    def purge_numerical_errors(self,tolerance = 1e-10):
+        # Discard corner portfolios which, due to numerical error, violate the
+        # budget constraint or the bounds on the weights. The final corner, the
+        # portfolio of minimum variance, is never discarded: rounding errors in
+        # its weights are instead removed by clipping them to their bounds.
+        final = self.weights[-1]
+        if np.any(final < self.lower - tolerance) or np.any(final > self.upper + tolerance):
+            np.clip(final,self.lower,self.upper,out = final)
+            inside = (final > self.lower) & (final < self.upper)
+            if np.any(inside):
+                final[inside] += (1 - np.sum(final)) / np.sum(inside)
+        keep = [i for i,w in enumerate(self.weights)
+                if i == len(self.weights) - 1 or (abs(np.sum(w) - 1) <= tolerance
+                and np.all(w >= self.lower - tolerance) and np.all(w <= self.upper + tolerance))]
+        self.weights = [self.weights[i] for i in keep]
+        self.lambdas = [self.lambdas[i] for i in keep]
+        self.gammas = [self.gammas[i] for i in keep]
+
+    def purge_excess(self):
+        # Along the efficient frontier, the expected return decreases from one
+        # corner portfolio to the next. Discard any corner portfolio which
+        # would increase the expected return, as it is not efficient.
+        keep, highest = [], np.inf
+        for i,w in enumerate(self.weights):
+            expected_return = np.dot(self.mean,w)
+            if expected_return <= highest + 1e-12 or i == len(self.weights) - 1:
+                keep.append(i)
+                highest = expected_return
+        self.weights = [self.weights[i] for i in keep]
+        self.lambdas = [self.lambdas[i] for i in keep]
+        self.gammas = [self.gammas[i] for i in keep]
+
+    def corner_portfolios(self):
+        weights = np.array(self.weights)
+        returns = np.dot(weights,self.mean)
+        risk = np.sqrt(np.maximum(self.quadratic(weights),0))
+        return returns, risk, weights
+
+    def min_variance(self):
+        # The critical line algorithm terminates at the portfolio of minimum
+        # variance, which is therefore the final corner portfolio.
+        return self.weights[-1].copy()
+
+    def max_sharpe(self,risk_free = 0.0):
+        # Sharpe's ratio is maximized over each segment of the frontier between
+        # adjacent corner portfolios in closed form. Writing the excess return
+        # and the variance along the segment w(t) = w_a + t * (w_b - w_a) as
+        #     m(t) = m0 + m1 * t,    v(t) = v0 + 2 * v1 * t + v2 * t^2,
+        # the derivative of m(t) / sqrt(v(t)) vanishes only at
+        #     t* = (m0 * v1 - m1 * v0) / (m1 * v1 - m0 * v2),
+        # so that the maximum is attained either at t* or at a corner.
+        best_ratio, best_weights = -np.inf, None
+        for k in range(max(1,len(self.weights) - 1)):
+            w_a = self.weights[k]
+            w_b = self.weights[k + 1] if k + 1 < len(self.weights) else w_a
+            d = w_b - w_a
+            m0, m1 = np.dot(self.mean,w_a) - risk_free, np.dot(self.mean,d)
+            S_a, S_d = self.dot(w_a), self.dot(d)
+            v0, v1, v2 = np.dot(w_a,S_a), np.dot(w_a,S_d), np.dot(d,S_d)
+
+            candidates = [0.0,1.0]
+            denominator = m1 * v1 - m0 * v2
+            if denominator != 0:
+                t = (m0 * v1 - m1 * v0) / denominator
+                if 0 < t < 1:
+                    candidates.append(t)
+            for t in candidates:
+                variance = v0 + 2 * v1 * t + v2 * t * t
+                if variance <= 0:
+                    continue
+                ratio = (m0 + m1 * t) / np.sqrt(variance)
+                if ratio > best_ratio:
+                    best_ratio, best_weights = ratio, w_a + t * d
+        return best_weights
+
+    def frontier(self,points = 100):
+        # Sample the efficient frontier at points spaced evenly in expected
+        # return, from the portfolio of minimum variance to the portfolio of
+        # greatest expected return. Every point is exact, being the convex
+        # combination of the pair of corner portfolios on either side of it.
+        corner_returns = np.array([np.dot(self.mean,w) for w in self.weights])
+        targets = np.linspace(corner_returns[-1],corner_returns[0],points)
+        weights = np.zeros((points,len(self.mean)))
+        for p,target in enumerate(targets):
+            k = 0
+            while k + 2 < len(self.weights) and corner_returns[k + 1] > target:
+                k += 1
+            w_a = self.weights[k]
+            w_b = self.weights[min(k + 1,len(self.weights) - 1)]
+            spread = corner_returns[k] - corner_returns[min(k + 1,len(self.weights) - 1)]
+            t = (corner_returns[k] - target) / spread if spread > 0 else 0.0
+            weights[p] = w_a + min(max(t,0.0),1.0) * (w_b - w_a)
+        returns = np.dot(weights,self.mean)
+        risk = np.sqrt(np.maximum(self.quadratic(weights),0))
+        return returns, risk, weights
@@ -0,0 +1,197 @@
+# instrumentation.py: Opt-in profiling of the stages of an analysis, such as
+#       the download and parsing of prices, the fitting of distributions and
+#       the optimization of portfolios.
+#
+# Every stage which is instrumented records, when it finishes, the time at
+# which it began, how long it took, the process and thread in which it ran,
+# attributes identifying it (such as the ticker of a stock) and any counts it
+# accumulated (such as bytes read, rows parsed or iterations of a solver). Each
+# record is a flat dictionary, so that latency can be attributed per stage and
+# per ticker by grouping the records on those keys. Stages which are nested
+# (a download, and the parsing of its response) are recorded separately.
+#
+# Instrumentation is disabled by default, in which case entering a stage
+# returns a shared object that does nothing, and an instrumented function calls
+# straight through to the original; the cost is then a function call. Records
+# are only kept for the process in which instrumentation was enabled, so that
+# the work of a process pool is recorded as a single stage of the parent.
+#
+# The following is an example of how to profile the construction of a
+# portfolio, and to view it in the trace viewer of Chrome (chrome://tracing):
+#       instrumentation.enable()
+#       portfolio = Portfolio(["GOOG","MSFT","IBM"])
+#       print instrumentation.format_summary(instrumentation.summary(by = ("stage","ticker")))
+#       instrumentation.write_chrome_trace("portfolio.json")
+#
+# Stages are instrumented either as a block or as a whole function:
+#       with stage("download",ticker = ticker) as record:
+#           record.add(bytes = len(data))
+#       @instrumented("stock_statistics",lambda stock: {"ticker" : stock.ticker})
+#       def calculate_statistics(self): ...
+
+import os
+import json
+import time
+import functools
+import threading
+
+ENABLED = False
+RECORDS = []
+
+# The fields of every record, besides its attributes and counts, and the
+# counts which are totalled by the summary.
+FIELDS = ("stage","start","seconds","process","thread")
+COUNTS = ("bytes","rows","iterations")
+
+
+def enable():
+    global ENABLED
+    ENABLED = True
+
+
+def disable():
+    global ENABLED
+    ENABLED = False
+
+
+def enabled():
+    return ENABLED
+
+
+def reset():
+    del RECORDS[:]
+
+
+class Stage(object):
+    def __init__(self,name,attributes):
+        self.name = name
+        self.attributes = attributes
+        self.counts = {}
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+    def __exit__(self,exception_type,exception,traceback):
+        seconds = time.time() - self.start
+        record = dict(self.attributes)
+        record.update(self.counts)
+        record.update({"stage" : self.name,"start" : self.start,"seconds" : seconds,
+                       "process" : os.getpid(),"thread" : threading.current_thread().ident})
+        if exception_type is not None:
+            record["error"] = exception_type.__name__
+        RECORDS.append(record)
+        return False
+
+    def add(self,**counts):
+        for key,value in counts.items():
+            self.counts[key] = self.counts.get(key,0) + value
+
+
+class DisabledStage(object):
+    # The stage returned while instrumentation is disabled, which records
+    # nothing. A single instance is shared by every call.
+    def __enter__(self):
+        return self
+
+    def __exit__(self,exception_type,exception,traceback):
+        return False
+
+    def add(self,**counts):
+        pass
+
+DISABLED_STAGE = DisabledStage()
+
+
+def stage(name,**attributes):
+    if not ENABLED:
+        return DISABLED_STAGE
+    return Stage(name,attributes)
+
+
+def instrumented(name,attributes = None):
+    # Record every call of the decorated function as a stage. The attributes
+    # of the stage are calculated by the given function from the first
+    # argument of the call (the object, for a method).
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*arguments,**keywords):
+            if not ENABLED:
+                return function(*arguments,**keywords)
+            with Stage(name,attributes(arguments[0]) if attributes is not None else {}):
+                return function(*arguments,**keywords)
+        return wrapper
+    return decorate
+
+
+class CountingReader(object):
+    # A file-like object which adds the number of bytes read from the source
+    # to the counts of a stage.
+    def __init__(self,source,record):
+        self.source = source
+        self.record = record
+
+    def read(self,*size):
+        data = self.source.read(*size)
+        self.record.add(bytes = len(data))
+        return data
+
+
+def counted(source,record):
+    return source if record is DISABLED_STAGE else CountingReader(source,record)
+
+
+def records():
+    return list(RECORDS)
+
+
+def summary(by = "stage",counts = COUNTS):
+    # The number of calls, the total time and the totals of the counts of the
+    # records, grouped by a key or by a tuple of keys, such as ("stage","ticker").
+    keys = (by,) if isinstance(by,str) else tuple(by)
+    groups = {}
+    for record in records():
+        group = tuple(record.get(key) for key in keys)
+        totals = groups.setdefault(group,{"calls" : 0,"seconds" : 0.0})
+        totals["calls"] += 1
+        totals["seconds"] += record["seconds"]
+        for key in counts:
+            if key in record:
+                totals[key] = totals.get(key,0) + record[key]
+    return groups
+
+
+def format_summary(groups):
+    print_string = "%-40s%8s%12s  %s" % ("Stage","Calls","Seconds","Counts")
+    for group in sorted(groups,key = lambda group: -groups[group]["seconds"]):
+        totals = groups[group]
+        counts = " ".join("%s=%s" % (key,totals[key]) for key in sorted(totals) if key not in ("calls","seconds"))
+        name = " ".join(str(key) for key in group if key is not None)
+        print_string += "\n%-40s%8d%12.4f  %s" % (name,totals["calls"],totals["seconds"],counts)
+    return print_string
+
+
+def write_records(path):
+    # One record per line, in JSON.
+    with open(path,"w") as destination:
+        for record in records():
+            destination.write(json.dumps(record) + "\n")
+
+
+def chrome_trace():
+    # The records as complete events of the trace event format read by the
+    # trace viewer of Chrome, with times in microseconds since the first stage.
+    events = records()
+    origin = min(record["start"] for record in events) if events else 0.0
+    trace = []
+    for record in sorted(events,key = lambda record: record["start"]):
+        arguments = dict((key,value) for key,value in record.items() if key not in FIELDS)
+        trace.append({"name" : record["stage"],"cat" : "financial_tools","ph" : "X",
+                      "ts" : 1e6 * (record["start"] - origin),"dur" : 1e6 * record["seconds"],
+                      "pid" : record["process"],"tid" : record["thread"],"args" : arguments})
+    return {"traceEvents" : trace,"displayTimeUnit" : "ms"}
+
+
+def write_chrome_trace(path):
+    with open(path,"w") as destination:
+        json.dump(chrome_trace(),destination)
@@ -0,0 +1,316 @@
+# intraday.py: Streaming ingestion of intraday prices from local files, and the
+#       daily realized variance and jump statistics calculated from them.
+#
+# The Barndorff-Nielsen statistic (see jumps.py) is intended for the returns
+# within a day, sampled at a fixed interval. Files of tick or minute bar prices
+# are far larger than memory, so that they are never read whole: the file is
+# memory-mapped, and is read in chunks of whole lines which are parsed with
+# vectorized operations. Each chunk is reduced at once to the last price in
+# every interval of every day, which is all that is retained of it, so that the
+# file is read in a single pass.
+#
+# The file contains one price per line, ordered by time, in the form
+#       2014-02-14 09:30:01,37.655
+# where the seconds may have a fractional part (09:30:01.250). Lines which do
+# not begin with a digit (such as a header) are skipped, and lines whose
+# timestamp or price cannot be read are counted as rejected. Each
+# day is divided into intervals of "interval" seconds, and the price of a day at
+# the end of an interval is the last price observed before then; intervals in
+# which there was no trade repeat the previous price. The returns of a day are
+# the log returns between the prices at the ends of its intervals, so that the
+# overnight return is excluded.
+#
+# Since the statistics of a day depend only on the lines of that day, the file
+# is divided into byte ranges which begin and end at the first line of a day.
+# The ranges are found by binary search over the file, and are processed in
+# parallel by a pool of processes, each of which maps the file itself.
+#
+# The following is an example of how to test each day of a file of trades for
+# jumps, sampling the prices every five minutes:
+#       intraday = IntradayFile("MSFT-2014-02.csv",interval = 300)
+#       statistics = intraday.daily_statistics(processes = 4)
+#       print statistics["dates"][statistics["p_value"] < .01]
+
+import mmap
+import numpy as np
+from multiprocessing import Pool
+from .jumps import TRIPOWER_CONSTANT, barndorff_nielsen_statistic, normal_survival
+
+# The width of the timestamp at the start of every line, including the comma.
+TIMESTAMP_WIDTH = 20
+
+# The positions of the digits of the timestamp.
+TIMESTAMP_DIGITS = np.array([0,1,2,3,5,6,8,9,11,12,14,15,17,18])
+
+
+class IntradayFile(object):
+    def __init__(self,path,interval = 300,chunk_size = 1 << 24):
+        # The interval is the sampling interval in seconds, and the chunk size
+        # is the number of bytes parsed at a time.
+        if interval <= 0 or 86400 % interval:
+            raise ValueError("The interval must be a positive number of seconds which divides a day.")
+        self.path = path
+        self.interval = int(interval)
+        self.chunk_size = int(chunk_size)
+
+    def day_ranges(self,n_ranges):
+        # Divide the file into at most n_ranges byte ranges of roughly equal
+        # size, each of which begins at the first line of a day.
+        with open(self.path,"rb") as handle:
+            size = file_size(handle)
+            if size == 0:
+                return []
+            memory = mmap.mmap(handle.fileno(),0,access = mmap.ACCESS_READ)
+            try:
+                boundaries = [0]
+                for i in range(1,n_ranges):
+                    boundary = next_day(memory,line_start(memory,size * i // n_ranges))
+                    if boundary > boundaries[-1] and boundary < size:
+                        boundaries.append(boundary)
+                boundaries.append(size)
+            finally:
+                memory.close()
+        return list(zip(boundaries[:-1],boundaries[1:]))
+
+    def resample(self,start = 0,end = None):
+        # The last price in every interval of every day between the byte
+        # offsets start and end, which lie at the beginnings of lines. The days
+        # (as integers of the form YYYYMMDD), intervals and prices are returned,
+        # together with the number of lines rejected (see parse_chunk).
+        return resample_range((self.path,start,end,self.interval,self.chunk_size))
+
+    def daily_statistics(self,processes = None):
+        # The realized variance, bipower variance, tripower quarticity and
+        # Barndorff-Nielsen statistic of every day in the file, and the number
+        # of lines of the file which were rejected.
+        n_ranges = processes if processes is not None and processes > 1 else 1
+        arguments = [(self.path,start,end,self.interval,self.chunk_size) for start,end in self.day_ranges(n_ranges)]
+        if len(arguments) > 1:
+            pool = Pool(processes)
+            try:
+                results = pool.map(range_statistics,arguments)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            results = [range_statistics(range_arguments) for range_arguments in arguments]
+
+        statistics = {}
+        for name in ("days","n_returns","realized_variance","bipower_variance","tripower_quarticity",
+                     "relative_jump","statistic","p_value"):
+            statistics[name] = np.concatenate([result[name] for result in results]) if results else np.array([])
+        statistics["rejected"] = sum(result["rejected"] for result in results)
+        days = statistics.pop("days").astype(np.int64)
+        statistics["dates"] = np.array(["%04d-%02d-%02d" % (day // 10000,day // 100 % 100,day % 100) for day in days],
+                                       dtype = "datetime64[D]")
+        return statistics
+
+
+def file_size(handle):
+    handle.seek(0,2)
+    size = handle.tell()
+    handle.seek(0)
+    return size
+
+
+def line_start(memory,offset):
+    # The offset of the first line which begins at or after the offset.
+    if offset <= 0:
+        return 0
+    newline = memory.find(b"\n",offset - 1)
+    return len(memory) if newline < 0 else newline + 1
+
+
+def line_day(memory,offset):
+    return memory[offset:offset + 10]
+
+
+def next_day(memory,offset):
+    # The offset of the first line of the day after the day of the line at the
+    # offset, found by binary search since the lines are ordered by time.
+    size = len(memory)
+    if offset >= size:
+        return size
+    day = line_day(memory,offset)
+    low, high = offset, size
+    while low < high:
+        middle = (low + high) // 2
+        start = line_start(memory,middle)
+        if start >= size or line_day(memory,start) > day:
+            high = middle
+        else:
+            low = middle + 1
+    return line_start(memory,low)
+
+
+def parse_chunk(text):
+    # Parse a chunk of whole lines into the days (as integers YYYYMMDD), the
+    # seconds since midnight and the prices of its lines, and count the lines
+    # which were rejected. The seconds of a timestamp may have a fractional
+    # part (as in 09:30:01.250), which is dropped, since every interval is a
+    # whole number of seconds. Lines which do not begin with a digit (such as a
+    # header) are skipped; lines which do, but whose timestamp or price cannot
+    # be read, or whose price is not positive, are rejected.
+    buffer = np.frombuffer(text,dtype = np.uint8)
+    ends = np.flatnonzero(buffer == ord("\n"))
+    if len(buffer) and buffer[-1] != ord("\n"):
+        ends = np.append(ends,len(buffer))
+    starts = np.concatenate(([0],ends[:-1] + 1)).astype(np.int64)
+    lines = ends > starts
+    lines[lines] = is_digit(buffer[starts[lines]])
+    starts, ends = starts[lines], ends[lines]
+    n_lines = len(starts)
+
+    # The timestamps are gathered into a matrix of characters, one row for
+    # each line, by viewing the buffer as overlapping records of the width of
+    # a timestamp, one beginning at every byte. The seconds are followed
+    # either by the comma or by a fractional part of at most nine digits and
+    # then the comma, and the price follows the comma. Subtracting the code of
+    # "0" from a character which is not a digit leaves a value above nine, as
+    # the characters are unsigned.
+    valid = ends - starts > TIMESTAMP_WIDTH
+    starts, ends = starts[valid], ends[valid]
+    records = np.ndarray((max(len(buffer) - TIMESTAMP_WIDTH + 1,0),),dtype = "V%d" % TIMESTAMP_WIDTH,
+                         buffer = buffer,strides = (1,))
+    timestamps = records[starts].view(np.uint8).reshape((-1,TIMESTAMP_WIDTH))
+    digits = timestamps[:,TIMESTAMP_DIGITS] - np.uint8(ord("0"))
+    valid = (np.all(digits <= 9,axis = 1) & (timestamps[:,4] == ord("-")) & (timestamps[:,7] == ord("-"))
+             & (timestamps[:,13] == ord(":")) & (timestamps[:,16] == ord(":")))
+
+    comma = starts + TIMESTAMP_WIDTH - 1
+    fractional = np.flatnonzero(timestamps[:,-1] == ord("."))
+    valid &= (timestamps[:,-1] == ord(",")) | (timestamps[:,-1] == ord("."))
+    if len(fractional):
+        commas = np.flatnonzero(buffer == ord(","))
+        following = np.append(commas,len(buffer))[np.searchsorted(commas,comma[fractional])]
+        length = following - comma[fractional] - 1
+        accepted = (length > 0) & (length <= 9)
+        for i in range(9):
+            check = accepted & (length > i)
+            accepted[check] = is_digit(buffer[comma[fractional][check] + 1 + i])
+        comma[fractional] = following
+        valid[fractional] &= accepted
+    valid &= comma < ends - 1
+    starts, ends, comma, digits = starts[valid], ends[valid], comma[valid], digits[valid]
+    if not len(starts):
+        return np.array([],dtype = np.int64), np.array([],dtype = np.int64), np.array([]), n_lines
+
+    digits = digits.astype(np.int64)
+    days = np.dot(digits[:,:8],[10 ** 7,10 ** 6,10 ** 5,10 ** 4,1000,100,10,1])
+    seconds = np.dot(digits[:,8:],[36000,3600,600,60,10,1])
+
+    # The prices have different lengths, and are gathered into a matrix of
+    # fixed width padded with spaces, which is converted as strings.
+    widths = ends - comma - 1
+    width = int(np.max(widths))
+    columns = np.arange(width)
+    positions = (comma + 1)[:,np.newaxis] + columns
+    characters = np.where(columns < widths[:,np.newaxis],buffer[np.minimum(positions,len(buffer) - 1)],ord(" "))
+    prices = np.ascontiguousarray(characters.astype(np.uint8)).view("S%d" % width).ravel()
+    prices = parse_prices(prices)
+
+    with np.errstate(invalid = "ignore"):
+        valid = prices > 0
+    return days[valid], seconds[valid], prices[valid], n_lines - int(np.sum(valid))
+
+
+def is_digit(characters):
+    return (characters >= ord("0")) & (characters <= ord("9"))
+
+
+def parse_prices(strings):
+    # Convert an array of strings to prices. A price which is not a number is
+    # nan; the strings are converted one at a time only when the conversion of
+    # the whole array fails.
+    try:
+        return strings.astype(np.float64)
+    except ValueError:
+        prices = np.empty(len(strings))
+        for i,string in enumerate(strings):
+            try:
+                prices[i] = float(string)
+            except ValueError:
+                prices[i] = np.nan
+        return prices
+
+
+def last_in_run(keys):
+    # The positions of the last element of every run of equal keys.
+    if not len(keys):
+        return np.array([],dtype = np.int64)
+    return np.append(np.flatnonzero(keys[1:] != keys[:-1]),len(keys) - 1)
+
+
+def resample_range(arguments):
+    # The last price in every interval of every day in a byte range of the
+    # file, read in chunks of whole lines.
+    path, start, end, interval, chunk_size = arguments
+    keys, prices, rejected = [], [], 0
+    with open(path,"rb") as handle:
+        size = file_size(handle)
+        end = size if end is None else min(end,size)
+        if start >= end:
+            return np.array([],dtype = np.int64), np.array([],dtype = np.int64), np.array([]), 0
+        memory = mmap.mmap(handle.fileno(),0,access = mmap.ACCESS_READ)
+        try:
+            position = start
+            while position < end:
+                stop = end if position + chunk_size >= end else min(line_start(memory,position + chunk_size),end)
+                days, seconds, chunk_prices, chunk_rejected = parse_chunk(memory[position:stop])
+                rejected += chunk_rejected
+                # Each interval of each day is identified by a single key, and
+                # only the last price of each run of keys is retained.
+                chunk_keys = days * (86400 // interval) + seconds // interval
+                last = last_in_run(chunk_keys)
+                keys.append(chunk_keys[last])
+                prices.append(chunk_prices[last])
+                position = stop
+        finally:
+            memory.close()
+
+    # An interval may be split between two chunks, in which case its price is
+    # the one from the later chunk.
+    keys = np.concatenate(keys)
+    prices = np.concatenate(prices)
+    last = last_in_run(keys)
+    keys, prices = keys[last], prices[last]
+    return keys // (86400 // interval), keys % (86400 // interval), prices, rejected
+
+
+def range_statistics(arguments):
+    # The statistics of every day in a byte range of the file. The intervals of
+    # a day run from its first to its last observed interval, and those without
+    # a trade repeat the previous price.
+    days, intervals, prices, rejected = resample_range(arguments)
+    first = np.concatenate(([0],last_in_run(days)[:-1] + 1)).astype(np.int64) if len(days) else np.array([],dtype = np.int64)
+    unique_days = days[first]
+
+    terms = {"squares" : [],"bipower" : [],"tripower" : []}
+    n_returns = np.zeros(len(unique_days))
+    bounds = np.append(first,len(days))
+    for i in range(len(unique_days)):
+        day_intervals = intervals[bounds[i]:bounds[i + 1]]
+        grid = np.arange(day_intervals[0],day_intervals[-1] + 1)
+        day_prices = prices[bounds[i]:bounds[i + 1]][np.searchsorted(day_intervals,grid,side = "right") - 1]
+        log_returns = np.absolute(np.diff(np.log(day_prices)))
+        powers = np.power(log_returns,4.0 / 3)
+        n_returns[i] = len(log_returns)
+        terms["squares"].append(np.sum(np.square(log_returns)))
+        terms["bipower"].append(np.sum(log_returns[1:] * log_returns[:-1]))
+        terms["tripower"].append(np.sum(powers[2:] * powers[1:-1] * powers[:-2]))
+
+    sums = dict((name,np.array(values,dtype = np.float64)) for name,values in terms.items())
+    n = n_returns
+    with np.errstate(divide = "ignore",invalid = "ignore"):
+        realized_variance = sums["squares"]
+        bipower_variance = (np.pi / 2.0) * (n / (n - 1.0)) * sums["bipower"]
+        tripower_quarticity = n * TRIPOWER_CONSTANT * (n / (n - 2.0)) * sums["tripower"]
+        relative_jump = (realized_variance - bipower_variance) / realized_variance
+        statistic = barndorff_nielsen_statistic(n,relative_jump,bipower_variance,tripower_quarticity)
+        # At least three returns are needed for the tripower quarticity.
+        statistic[n < 3] = np.nan
+        p_value = normal_survival(statistic)
+
+    return {"days" : unique_days,"n_returns" : n_returns.astype(np.int64),"realized_variance" : realized_variance,
+            "bipower_variance" : bipower_variance,"tripower_quarticity" : tripower_quarticity,
+            "relative_jump" : relative_jump,"statistic" : statistic,"p_value" : p_value,"rejected" : rejected}
@@ -0,0 +1,238 @@
+import numpy as np
+from .stock import Stock
+import math
+from .panel import ReturnsPanel
+
+# The constant mu_{2/3}^{-3} of the tripower quarticity, where mu_p is the p-th
+# absolute moment of a standard normal variable.
+TRIPOWER_CONSTANT = np.power(np.power(2.0,2.0 / 3) * math.gamma(7.0 / 6.0) * np.power(math.gamma(1.0 / 2.0),-1),-3)
+
+class JumpStatistics(object):
+	def __init__(self,stock):
+		self.stock = stock
+
+class BarndorffNielsen(JumpStatistics):
+	# An implementation of the Barnforff-Nielsen test statistic used for detecting "jumps"
+	# (or "suprises") in stock price data. The mathematics for this test statistic can be
+	# found at the following two resources:
+	#
+	# Michael William Schwert. 2008. "Problems in the Application of Jump Detection Tests 
+	# to Stock Price Data". Duke University.
+	#
+	# "Some Like it Smooth, and Some Like it Rough: Untangling Continuous and Jump 
+	# Components in Measuring, Modeling, and Forecasting Asset Return Volatility".
+	# Torben G. Andersen, Tim Bollerslev and Francis X. Diebold. September 2003.
+	#
+	# The following is an example of how to apply the Barnforff-Nielsen statistic to detect
+	# surprises in Microsoft stock data:
+	#       if True:
+	# 			# Observe a trend in Microsoft stock prices where a jump occurs.
+	#			stock = Stock("MSFT",{"start" : "2013-02-14","end" : "2014-02-14"})
+	# 		else:
+	# 			# Otherwise, view a sequence of stock prices where no jump was detected.
+	# 			stock = Stock("MSFT",{"start" : "2013-03-01","end" : "2013-04-01"})
+	# 		stock.display_price()
+	# 		bn = BarndorffNielsen(stock)
+	#		bn.barndorff_nielsen_test()
+	#
+	# The sums over the log returns from which the statistic is calculated are retained, and
+	# the statistic subscribes to the stock, so that when trading days are appended to the
+	# stock only the terms of the new log returns are added to the sums. The subscription
+	# keeps the statistic alive for as long as the stock, and is ended by closing the
+	# statistic, or by using it in a with statement:
+	#		with BarndorffNielsen(stock) as bn:
+	#			stock.append(bar)
+	#			print bn.p_value
+	#
+	# The statistic over rolling windows of many series at once is calculated by
+	# rolling_barndorff_nielsen, or panel_barndorff_nielsen for a list of stocks:
+	#		results = panel_barndorff_nielsen([Stock("MSFT"),Stock("GOOG")],window = 63)
+	#		jumps = results["p_value"] < .01
+
+	def __init__(self,stock):
+		super(BarndorffNielsen,self).__init__(stock)
+		self.sums = {"squares" : 0.0,"bipower" : 0.0,"tripower" : 0.0}
+		self.n = 0
+		self.accumulate(0)
+		self.stock.subscribe(self.update)
+		self.subscribed = True
+
+	def close(self):
+		# Stop following the stock. The statistic keeps the values it had when closed.
+		if self.subscribed:
+			self.stock.unsubscribe(self.update)
+			self.subscribed = False
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self,exception_type,exception,traceback):
+		self.close()
+		return False
+
+	def update(self,stock,start):
+		# Called by the stock when trading days are appended. The first new day
+		# adds the return from the last day before it.
+		self.accumulate(self.n)
+
+	def accumulate(self,start):
+		# Add the terms of the log returns from "start" onwards to the sums. The
+		# products of neighbouring returns reach back before "start", so that
+		# every product is counted exactly once.
+		log_returns = np.absolute(self.stock.statistics["log_returns"])
+		powers = np.power(log_returns[max(start - 2,0):],4.0 / 3)
+		offset = start - max(start - 2,0)
+
+		self.sums["squares"] += np.sum(np.power(log_returns[start:],2))
+		self.sums["bipower"] += np.sum(log_returns[max(start,1):] * log_returns[max(start,1) - 1:-1])
+		self.sums["tripower"] += np.sum(powers[max(offset,2):] * powers[max(offset,2) - 1:-1] * powers[max(offset,2) - 2:-2])
+		self.n = len(log_returns)
+
+		self.realized_variance = self.calculate_realized_variance()
+		self.bipower_variance = self.calculate_bipower_variance()
+
+		self.relative_jump = np.float(self.realized_variance - self.bipower_variance) / self.realized_variance
+		self.tripower_quarticity = self.calculate_tripower_quarticity()
+
+		self.statistic = self.barndorff_nielsen_statistic()
+		self.p_value = normal_survival(self.statistic)
+
+	def calculate_realized_variance(self):
+		return self.sums["squares"]
+
+	def calculate_bipower_variance(self):
+		n = self.n
+		variance = (np.pi / 2.0) * (np.float(n) / (n - 1.0)) * self.sums["bipower"]
+		return variance
+
+	def calculate_tripower_quarticity(self):
+		n = self.n
+
+		# Notice that the absolute value of the log returns is calculated in this step. This is to 
+		# prevent numerical nan's from being produced. This also seems to be consistent with the 
+		# notation specified by Michael Schwert and Torben G. Andersen et al.
+		tripower = self.sums["tripower"]
+		quarticity = n * TRIPOWER_CONSTANT * (np.float(n) / (n - 2.0)) * tripower
+		return quarticity
+
+	def barndorff_nielsen_statistic(self):
+		return barndorff_nielsen_statistic(self.n,self.relative_jump,self.bipower_variance,self.tripower_quarticity)
+
+	def barndorff_nielsen_test(self,alpha = .01):
+		from scipy import stats
+
+		quantile = stats.norm.ppf(1 - alpha)
+
+		print_string = ""
+		if self.statistic > quantile:
+			print_string += "\tThe Barndorff-Nielsen Test reports that there was a jump in asset price.\n"
+		else:
+			print_string += "\tThe Barndorff-Nielsen Test reports that there was not a jump in asset price.\n"
+
+		print_string += "\tThe significance level of the test: %.2f\n" % alpha
+		print self.stock
+		print print_string
+
+
+def barndorff_nielsen_statistic(n,relative_jump,bipower_variance,tripower_quarticity):
+	# The ratio statistic of the relative jump, which is asymptotically standard normal
+	# when there are no jumps. The arguments may be numbers or arrays of any shape.
+	pi = np.pi
+	ratio = np.maximum(1,tripower_quarticity / (np.square(bipower_variance)))
+	return relative_jump / np.sqrt(((pi / 2) ** 2 + pi - 5) * (1.0 / n) * ratio)
+
+
+def normal_survival(statistic):
+	# The probability that a standard normal variable exceeds the statistic, that is, the
+	# p-value of the one-sided test.
+	from scipy.special import ndtr
+	return ndtr(-np.asarray(statistic))
+
+
+def rolling_barndorff_nielsen(log_returns,window):
+	# The Barndorff-Nielsen statistic over every window of "window" consecutive log returns
+	# of every series, where the log returns are a matrix with one column per series (or a
+	# single series). The sums of squared returns and of the bipower and tripower products
+	# of neighbouring returns are running sums along the rows, so that the sums over a
+	# window are the differences of the running sums at its ends, and the statistics of
+	# every window of every series are calculated at once. Row i of the results belongs to
+	# the window which ends with return i + window - 1; windows which contain a missing
+	# (nan) return have nan results.
+	#
+	# The running sums grow along the series, and their differences lose precision when
+	# the series is very long compared to a window. The sums are therefore restarted every
+	# "window" rows, and the sums over a window are assembled from the two blocks it spans.
+	log_returns = np.asarray(log_returns,dtype = np.float64)
+	single = log_returns.ndim == 1
+	if single:
+		log_returns = log_returns[:,np.newaxis]
+	n_returns = log_returns.shape[0]
+	if window < 3:
+		raise ValueError("The window must contain at least three returns.")
+	if n_returns < window:
+		raise ValueError("The series are shorter than the window.")
+
+	missing = ~np.isfinite(log_returns)
+	absolute = np.absolute(np.where(missing,0,log_returns))
+	powers = np.power(absolute,4.0 / 3)
+
+	# The terms are aligned on the last return of each product; the first returns, which
+	# have too few neighbours, contribute no products.
+	terms = {"squares" : np.square(absolute),"bipower" : np.zeros_like(absolute),"tripower" : np.zeros_like(absolute)}
+	terms["bipower"][1:] = absolute[1:] * absolute[:-1]
+	terms["tripower"][2:] = powers[2:] * powers[1:-1] * powers[:-2]
+
+	sums = dict((name,window_sums(values,window)) for name,values in terms.items())
+	# Each window contains the squares of all of its returns but only the products of
+	# neighbours within it, whose first terms are subtracted once more.
+	sums["bipower"] -= terms["bipower"][:n_returns - window + 1]
+	sums["tripower"] -= terms["tripower"][:n_returns - window + 1] + terms["tripower"][1:n_returns - window + 2]
+	incomplete = window_sums(missing.astype(np.float64),window) > 0
+
+	n = float(window)
+	with np.errstate(divide = "ignore",invalid = "ignore"):
+		realized_variance = sums["squares"]
+		bipower_variance = (np.pi / 2.0) * (n / (n - 1.0)) * sums["bipower"]
+		tripower_quarticity = n * TRIPOWER_CONSTANT * (n / (n - 2.0)) * sums["tripower"]
+		relative_jump = (realized_variance - bipower_variance) / realized_variance
+		statistic = barndorff_nielsen_statistic(n,relative_jump,bipower_variance,tripower_quarticity)
+
+	results = {"realized_variance" : realized_variance,"bipower_variance" : bipower_variance,
+			   "tripower_quarticity" : tripower_quarticity,"relative_jump" : relative_jump,"statistic" : statistic}
+	for values in results.values():
+		values[incomplete] = np.nan
+	results["p_value"] = normal_survival(results["statistic"])
+	if single:
+		results = dict((name,values[:,0]) for name,values in results.items())
+	return results
+
+
+def window_sums(values,window):
+	# The sums over every window of "window" consecutive rows. Running sums are restarted
+	# at the start of every block of "window" rows, so that a window is the tail of one
+	# block and the head of the next.
+	n_rows = values.shape[0]
+	n_blocks = -(-n_rows // window)
+	padded = np.zeros((n_blocks * window,) + values.shape[1:])
+	padded[:n_rows] = values
+	blocks = np.cumsum(padded.reshape((n_blocks,window) + values.shape[1:]),axis = 1)
+	totals = blocks[:,-1]
+
+	# The window ending at row e (in block k, offset j) is the block total of block k - 1
+	# after its offset j, plus the head of block k up to offset j.
+	ends = np.arange(window - 1,n_rows)
+	k, j = ends // window, ends % window
+	sums = blocks[k,j].copy()
+	partial = j < window - 1
+	sums[partial] += totals[k[partial] - 1] - blocks[k[partial] - 1,j[partial]]
+	return sums
+
+
+def panel_barndorff_nielsen(stocks,window,missing = "pairwise"):
+	# The rolling Barndorff-Nielsen statistics of a list of stocks, whose closing prices are
+	# aligned on a shared calendar (see panel.py). The dates are the last day of each window.
+	panel = ReturnsPanel(stocks,missing = missing)
+	results = rolling_barndorff_nielsen(np.log(panel.returns + 1),window)
+	results["tickers"] = panel.tickers
+	results["dates"] = panel.return_dates[window - 1:]
+	return results
@@ -0,0 +1,82 @@
+# lattice.py: Pricing of American options on binomial and trinomial lattices.
+#       Many contracts are priced at once: the parameters of the options are
+#       arrays, and the backward induction through the lattice is carried out
+#       for every contract simultaneously.
+#
+# Only a single layer of the lattice is held in memory for each contract. At
+# every step of the backward induction, the layer of option values is replaced
+# in place by the values one step closer to the present, so that the memory
+# required grows with the number of steps rather than with its square.
+#
+# The binomial lattice is that of Cox, Ross and Rubinstein; the trinomial
+# lattice is that of Boyle, with the probabilities of Kamrad and Ritchken.
+# Refer to chapter 21 of Options, Futures, and Other Derivatives by Hull.
+#
+# The following is an example of how to price a strip of American puts:
+#       strikes = np.linspace(40,60,21)
+#       prices = price_american(55.0,strikes,.5,.03,.45,call = False,steps = 500)
+
+import numpy as np
+
+
+def price_american(S,X,tau,r,sigma,call = True,steps = 500,method = "binomial"):
+    # The arguments are broadcast against one another, as for the function
+    # black_scholes in option.py, and the price of every contract is returned.
+    S, X, tau, r, sigma, call = np.broadcast_arrays(*[np.asarray(a,dtype = np.float64) for a in (S,X,tau,r,sigma)]
+                                                    + [np.asarray(call,dtype = bool)])
+    shape = S.shape
+
+    # Flatten the contracts into a column, so that each row of the lattice
+    # layer holds the option values of a single contract.
+    S, X, tau, r, sigma = [a.reshape((-1,1)) for a in (S,X,tau,r,sigma)]
+    sign = np.where(call.reshape((-1,1)),1.0,-1.0)
+
+    if method == "binomial":
+        prices = binomial_induction(S,X,tau,r,sigma,sign,steps)
+    elif method == "trinomial":
+        prices = trinomial_induction(S,X,tau,r,sigma,sign,steps)
+    else:
+        raise ValueError("Unknown lattice method: " + str(method))
+    return prices.reshape(shape)
+
+
+def binomial_induction(S,X,tau,r,sigma,sign,steps):
+    dt = tau / steps
+    log_u = sigma * np.sqrt(dt)
+    discount = np.exp(-r * dt)
+    p = (np.exp(r * dt) - np.exp(-log_u)) / (np.exp(log_u) - np.exp(-log_u))
+
+    # After i steps with j upward moves, the price of the stock is
+    #     S * u^j * d^(i - j) = S * u^(2j - i)
+    # since the downward move is the reciprocal of the upward move.
+    j = np.arange(steps + 1)
+    values = np.maximum(sign * (S * np.exp((2 * j - steps) * log_u) - X),0)
+
+    for i in range(steps - 1,-1,-1):
+        continuation = discount * (p * values[:,1:i + 2] + (1 - p) * values[:,:i + 1])
+        exercise = sign * (S * np.exp((2 * j[:i + 1] - i) * log_u) - X)
+        values[:,:i + 1] = np.maximum(continuation,exercise)
+    return values[:,0]
+
+
+def trinomial_induction(S,X,tau,r,sigma,sign,steps):
+    dt = tau / steps
+    log_u = sigma * np.sqrt(2 * dt)
+    discount = np.exp(-r * dt)
+    a = np.exp(r * dt / 2)
+    b = np.exp(sigma * np.sqrt(dt / 2))
+    p_u = ((a - 1 / b) / (b - 1 / b)) ** 2
+    p_d = ((b - a) / (b - 1 / b)) ** 2
+    p_m = 1 - p_u - p_d
+
+    # After i steps the lattice has 2i + 1 nodes, at which the price of the
+    # stock is S * u^k for k = -i, ..., i.
+    k = np.arange(2 * steps + 1) - steps
+    values = np.maximum(sign * (S * np.exp(k * log_u) - X),0)
+
+    for i in range(steps - 1,-1,-1):
+        width = 2 * i + 1
+        continuation = discount * (p_d * values[:,:width] + p_m * values[:,1:width + 1] + p_u * values[:,2:width + 2])
+        exercise = sign * (S * np.exp((np.arange(width) - i) * log_u) - X)
+        values[:,:width] = np.maximum(continuation,exercise)
+    return values[:,0]
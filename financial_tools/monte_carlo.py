@@ -0,0 +1,84 @@
+# monte_carlo.py: Monte Carlo pricing of path-dependent options, such as Asian
+#       and barrier options, under geometric Brownian motion.
+#
+# The paths of the stock price are simulated in chunks of a fixed number of
+# paths, so that the memory required is bounded by the size of a chunk rather
+# than by the total number of paths. Only the sum and the sum of squares of
+# the discounted payoffs are retained from each chunk. The chunks may be
+# spread across a pool of processes; every chunk draws from its own random
+# stream, seeded from the seed of the simulation, so that the price obtained
+# does not depend on the number of processes used.
+#
+# The following is an example of how to price an arithmetic Asian call which
+# is monitored daily over half of a year:
+#       price, error = simulate(55.0,50.0,.5,.03,.45,("asian",True),
+#                               paths = 10 ** 6,steps = 126,seed = 0)
+
+import numpy as np
+from multiprocessing import Pool
+
+
+def asian_payoff(paths,X,call):
+    # The payoff of an arithmetic average price option.
+    average = np.mean(paths,axis = 1)
+    return np.maximum(average - X,0) if call else np.maximum(X - average,0)
+
+
+def barrier_payoff(paths,X,call,barrier,knock):
+    # The payoff of a barrier option which is monitored at every step of the
+    # simulation. The knock is one of "up-and-out", "up-and-in", "down-and-out"
+    # or "down-and-in".
+    final = paths[:,-1]
+    vanilla = np.maximum(final - X,0) if call else np.maximum(X - final,0)
+    if knock.startswith("up"):
+        crossed = np.max(paths,axis = 1) >= barrier
+    else:
+        crossed = np.min(paths,axis = 1) <= barrier
+    alive = crossed if knock.endswith("in") else ~crossed
+    return np.where(alive,vanilla,0)
+
+
+PAYOFFS = {"asian" : asian_payoff,"barrier" : barrier_payoff}
+
+
+def simulate_chunk(arguments):
+    # Simulate a single chunk of paths and return the sum and the sum of the
+    # squares of the discounted payoffs. The payoff is specified by the name
+    # of the payoff function followed by its parameters, so that the chunk can
+    # be sent to another process.
+    S, X, tau, r, sigma, payoff, paths, steps, seed = arguments
+    generator = np.random.RandomState(seed)
+    dt = tau / float(steps)
+
+    # Under the risk-neutral measure the logarithm of the stock price is a
+    # Brownian motion with drift (r - sigma^2 / 2).
+    increments = (r - sigma ** 2 / 2) * dt + sigma * np.sqrt(dt) * generator.standard_normal((paths,steps))
+    stock_paths = S * np.exp(np.cumsum(increments,axis = 1))
+
+    discounted = np.exp(-r * tau) * PAYOFFS[payoff[0]](stock_paths,X,*payoff[1:])
+    return np.sum(discounted), np.sum(discounted ** 2)
+
+
+def simulate(S,X,tau,r,sigma,payoff,paths = 100000,steps = 252,chunk_size = 10000,seed = None,processes = None):
+    # Estimate the price of an option as the mean discounted payoff over the
+    # simulated paths, together with the standard error of the estimate. When
+    # "processes" is greater than one, the chunks are simulated in parallel.
+    chunks = [chunk_size] * (paths // chunk_size) + ([paths % chunk_size] if paths % chunk_size else [])
+    seeds = np.random.RandomState(seed).randint(0,2 ** 31 - 1,size = len(chunks))
+    arguments = [(S,X,tau,r,sigma,tuple(payoff),chunk,steps,chunk_seed) for chunk,chunk_seed in zip(chunks,seeds)]
+
+    if processes is not None and processes > 1:
+        pool = Pool(processes)
+        try:
+            results = pool.map(simulate_chunk,arguments)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [simulate_chunk(chunk_arguments) for chunk_arguments in arguments]
+
+    total = sum(result[0] for result in results)
+    total_squares = sum(result[1] for result in results)
+    mean = total / paths
+    variance = max(total_squares / paths - mean ** 2,0) * paths / max(paths - 1,1)
+    return mean, np.sqrt(variance / paths)
@@ -0,0 +1,174 @@
+import numpy as np
+from .lattice import price_american
+from .monte_carlo import simulate
+
+class Option(object):
+    def __init__(self,stock_price = 55.0,strike_price = 50.0,tau = .5,risk_free = .03,deviation = .45):
+        self.strike_price = np.float(strike_price)
+        self.tau = tau
+        self.risk_free = risk_free
+        self.deviation = deviation
+        self.stock_price = np.float(stock_price)
+
+
+class EuropeanCall(Option):
+    def evaluate_black_scholes(self):
+        from scipy.special import ndtr
+        S = self.stock_price
+        X = self.strike_price
+        r = self.risk_free
+        sigma = self.deviation
+        tau = self.tau
+
+        d_1 = (np.log(S / X) + (r + (sigma ** 2) / 2) * tau) / (sigma * np.sqrt(tau))
+        d_2 = d_1 - sigma * np.sqrt(tau)
+
+        value = S * ndtr(d_1) - X * np.exp(-r * tau) * ndtr(d_2)
+        return value
+
+    def evaluate_greeks(self):
+        return black_scholes(self.stock_price,self.strike_price,self.tau,self.risk_free,self.deviation,call = True)
+
+
+class EuropeanPut(Option):
+    def evaluate_black_scholes(self):
+        return black_scholes(self.stock_price,self.strike_price,self.tau,self.risk_free,self.deviation,call = False)["price"]
+
+    def evaluate_greeks(self):
+        return black_scholes(self.stock_price,self.strike_price,self.tau,self.risk_free,self.deviation,call = False)
+
+
+class AmericanCall(Option):
+    def evaluate_lattice(self,steps = 500,method = "binomial"):
+        return price_american(self.stock_price,self.strike_price,self.tau,self.risk_free,self.deviation,
+                              call = True,steps = steps,method = method)
+
+
+class AmericanPut(Option):
+    def evaluate_lattice(self,steps = 500,method = "binomial"):
+        return price_american(self.stock_price,self.strike_price,self.tau,self.risk_free,self.deviation,
+                              call = False,steps = steps,method = method)
+
+
+class AsianCall(Option):
+    # An arithmetic average price call, for which the average is taken over
+    # each of the "steps" monitoring dates of the simulation.
+    def evaluate_monte_carlo(self,paths = 100000,steps = 252,seed = None,processes = None):
+        return simulate(self.stock_price,self.strike_price,self.tau,self.risk_free,self.deviation,("asian",True),
+                        paths = paths,steps = steps,seed = seed,processes = processes)
+
+
+class AsianPut(Option):
+    def evaluate_monte_carlo(self,paths = 100000,steps = 252,seed = None,processes = None):
+        return simulate(self.stock_price,self.strike_price,self.tau,self.risk_free,self.deviation,("asian",False),
+                        paths = paths,steps = steps,seed = seed,processes = processes)
+
+
+class BarrierCall(Option):
+    # A call which is knocked in or out when the stock price crosses the
+    # barrier. The knock is one of "up-and-out", "up-and-in", "down-and-out"
+    # or "down-and-in".
+    def __init__(self,barrier = 65.0,knock = "up-and-out",**parameters):
+        super(BarrierCall,self).__init__(**parameters)
+        self.barrier = barrier
+        self.knock = knock
+
+    def evaluate_monte_carlo(self,paths = 100000,steps = 252,seed = None,processes = None):
+        return simulate(self.stock_price,self.strike_price,self.tau,self.risk_free,self.deviation,
+                        ("barrier",True,self.barrier,self.knock),
+                        paths = paths,steps = steps,seed = seed,processes = processes)
+
+
+class BarrierPut(Option):
+    def __init__(self,barrier = 45.0,knock = "down-and-out",**parameters):
+        super(BarrierPut,self).__init__(**parameters)
+        self.barrier = barrier
+        self.knock = knock
+
+    def evaluate_monte_carlo(self,paths = 100000,steps = 252,seed = None,processes = None):
+        return simulate(self.stock_price,self.strike_price,self.tau,self.risk_free,self.deviation,
+                        ("barrier",False,self.barrier,self.knock),
+                        paths = paths,steps = steps,seed = seed,processes = processes)
+
+
+def black_scholes(S,X,tau,r,sigma,call = True):
+    # Price European calls and puts, together with their analytic Greeks, in
+    # a single pass. Every argument may be a scalar or an array, and the
+    # arguments are broadcast against one another, so that an entire option
+    # chain (for instance, a grid of strikes against a row of expiries) is
+    # priced at once. The "call" argument may likewise be an array of
+    # booleans, distinguishing calls from puts contract by contract.
+    S, X, tau, r, sigma, call = np.broadcast_arrays(*[np.asarray(a,dtype = np.float64) for a in (S,X,tau,r,sigma)]
+                                                    + [np.asarray(call,dtype = bool)])
+    sqrt_tau = np.sqrt(tau)
+    d_1 = (np.log(S / X) + (r + (sigma ** 2) / 2) * tau) / (sigma * sqrt_tau)
+    d_2 = d_1 - sigma * sqrt_tau
+
+    # The standard normal density and distribution functions are evaluated
+    # once for every contract. The Greeks of a put follow from those of the
+    # corresponding call by put-call parity.
+    from scipy.special import ndtr
+    discount = np.exp(-r * tau)
+    density = np.exp(-d_1 ** 2 / 2) / np.sqrt(2 * np.pi)
+    N_1, N_2 = ndtr(d_1), ndtr(d_2)
+
+    call_price = S * N_1 - X * discount * N_2
+    greeks = {}
+    greeks["price"] = np.where(call,call_price,call_price - S + X * discount)
+    greeks["delta"] = np.where(call,N_1,N_1 - 1)
+    greeks["gamma"] = density / (S * sigma * sqrt_tau)
+    greeks["vega"] = S * density * sqrt_tau
+    greeks["theta"] = -S * density * sigma / (2 * sqrt_tau) - r * X * discount * np.where(call,N_2,N_2 - 1)
+    greeks["rho"] = X * tau * discount * np.where(call,N_2,N_2 - 1)
+    return greeks
+
+
+def implied_volatility(price,S,X,tau,r,call = True,tolerance = 1e-8,iterations = 100):
+    # Recover the volatilities implied by the observed prices of many options
+    # at once. Newton's method is applied to every contract simultaneously,
+    # using the vega of each contract as the derivative of its price. Since the
+    # price of an option increases with volatility, every contract maintains a
+    # bracket around its implied volatility; whenever a Newton step would leave
+    # the bracket, the contract takes a bisection step instead. Contracts whose
+    # prices violate the no-arbitrage bounds have no implied volatility, and
+    # are reported as nan, as are those which have not converged within the
+    # given number of iterations. The result has the broadcast shape of the
+    # arguments, and is a scalar if every argument is.
+    price, S, X, tau, r, call = np.broadcast_arrays(*[np.asarray(a,dtype = np.float64) for a in (price,S,X,tau,r)]
+                                                    + [np.asarray(call,dtype = bool)])
+    shape = price.shape
+    price, S, X, tau, r, call = [np.atleast_1d(a).ravel() for a in (price,S,X,tau,r,call)]
+    discount_strike = X * np.exp(-r * tau)
+    lower_bound = np.where(call,np.maximum(S - discount_strike,0),np.maximum(discount_strike - S,0))
+    upper_bound = np.where(call,S,discount_strike)
+    valid = (price > lower_bound) & (price < upper_bound)
+
+    low = np.full(price.shape,1e-6)
+    high = np.full(price.shape,10.0)
+    sigma = np.full(price.shape,.3)
+    active = valid.copy()
+
+    for iteration in range(iterations):
+        if not np.any(active):
+            break
+        greeks = black_scholes(S[active],X[active],tau[active],r[active],sigma[active],call[active])
+        error = greeks["price"] - price[active]
+
+        # Narrow the bracket of each contract according to the sign of its
+        # pricing error, and retire those contracts which have converged.
+        current = sigma[active]
+        low[active] = np.where(error < 0,current,low[active])
+        high[active] = np.where(error > 0,current,high[active])
+
+        with np.errstate(divide = "ignore",invalid = "ignore"):
+            step = current - error / greeks["vega"]
+        bisect = ~np.isfinite(step) | (step <= low[active]) | (step >= high[active])
+        step = np.where(bisect,(low[active] + high[active]) / 2,step)
+
+        converged = np.abs(error) < tolerance
+        sigma[active] = np.where(converged,current,step)
+        indices = np.flatnonzero(active)
+        active[indices[converged]] = False
+
+    sigma = np.where(valid & ~active,sigma,np.nan).reshape(shape)
+    return sigma[()] if sigma.ndim == 0 else sigma
@@ -0,0 +1,150 @@
+# panel.py: A panel of the daily prices and returns of many assets, aligned on
+#       a shared calendar of trading days.
+#
+# Assets rarely trade on exactly the same days: companies list and delist on
+# different dates, and exchanges observe different holidays. Before returns
+# can be compared across assets, the price histories must be joined on a
+# common calendar. The calendar is constructed by sorting the dates of every
+# asset together, and each asset is then placed on the calendar by binary
+# search, so that no dictionary lookups are made for individual days. Days on
+# which an asset did not trade are handled by one of three policies:
+#
+#     "drop"          Only the days on which every asset traded are retained.
+#     "forward_fill"  The price of an asset on a day it did not trade is its
+#                     most recent price; days before every asset has begun
+#                     trading are discarded.
+#     "pairwise"      Every day on which any asset traded is retained, and the
+#                     returns of an asset are missing (nan) wherever it did not
+#                     trade. The return of the first day on which an asset
+#                     trades after a gap is compounded over the gap, from its
+#                     last price before it, so that no return is lost.
+#                     Statistics are calculated from the days on which the
+#                     assets concerned both have returns.
+#
+# The pairwise covariance matrix, in which every entry is estimated from its
+# own days, need not be positive semidefinite. It is therefore projected onto
+# the nearest positive semidefinite matrix (in the Frobenius norm) by clipping
+# its negative eigenvalues to zero, so that it may be factored by the risk
+# engine and used by the critical line algorithm.
+#
+# The following is an example of how to build a panel of returns:
+#       panel = ReturnsPanel([Stock("GOOG"),Stock("MSFT")],missing = "forward_fill")
+#       print panel.returns.shape, panel.covariance()
+
+import numpy as np
+
+MISSING_POLICIES = ("drop","forward_fill","pairwise")
+
+
+class ReturnsPanel(object):
+    def __init__(self,stocks,missing = "drop",calendar = None,field = "Close"):
+        # Optionally, the calendar of trading days may be given, in which case
+        # the assets are aligned on that calendar rather than on their own.
+        if missing not in MISSING_POLICIES:
+            raise ValueError("Unknown missing data policy: " + str(missing))
+        self.tickers = [stock.ticker for stock in stocks]
+        self.missing = missing
+
+        histories = [stock.prices for stock in stocks]
+        if calendar is None:
+            calendar = trading_calendar([history.dates for history in histories],missing == "drop")
+        self.dates = np.asarray(calendar).astype("datetime64[D]")
+
+        prices = np.full((len(self.dates),len(histories)),np.nan)
+        for j,history in enumerate(histories):
+            # Locate every date of the asset on the calendar by binary search,
+            # and discard dates which the calendar does not contain.
+            positions = np.searchsorted(self.dates,history.dates)
+            inside = positions < len(self.dates)
+            inside[inside] = self.dates[positions[inside]] == history.dates[inside]
+            # Zero prices are rubbish, and are replaced by the mean price of the
+            # asset exactly as in the statistics of the stock itself.
+            values = history[field].astype(np.float64)
+            values[values == 0] = np.mean(values) if len(values) else 0
+            prices[positions[inside],j] = values[inside]
+
+        if missing == "forward_fill":
+            prices = forward_fill(prices)
+            first = np.max(np.argmax(np.isfinite(prices),axis = 0)) if prices.size else 0
+            self.dates, prices = self.dates[first:], prices[first:]
+        elif missing == "drop":
+            complete = np.all(np.isfinite(prices),axis = 1)
+            self.dates, prices = self.dates[complete], prices[complete]
+
+        # With the pairwise policy, the previous price of every day is the last
+        # price observed before it, so that the return after a gap spans it.
+        self.prices = prices
+        self.return_dates = self.dates[1:]
+        previous = forward_fill(prices[:-1]) if missing == "pairwise" else prices[:-1]
+        self.returns = np.ascontiguousarray(prices[1:] / previous - 1)
+
+    def __len__(self):
+        return len(self.return_dates)
+
+    def column(self,ticker):
+        return self.returns[:,self.tickers.index(ticker)]
+
+    def observed(self):
+        return np.isfinite(self.returns)
+
+    def expected_daily_returns(self):
+        return np.nanmean(self.returns,axis = 0)
+
+    def covariance(self):
+        # With every return observed, this is the ordinary sample covariance.
+        # Otherwise, each entry is the sample covariance over the days on which
+        # both assets have returns. Writing M for the indicator of observed
+        # returns and Z for the returns with the missing entries set to zero,
+        # the sums required for every pair of assets are the matrix products
+        #     counts = M'M,   sums_ij = (Z'M)_ij,   cross_ij = (Z'Z)_ij
+        # so that no pair of assets needs to be visited individually. A pair of
+        # assets with fewer than two days in common is taken to be uncorrelated,
+        # and the matrix is then projected to be positive semidefinite.
+        observed = self.observed()
+        if np.all(observed):
+            return np.atleast_2d(np.cov(self.returns,rowvar = 0))
+        M = observed.astype(np.float64)
+        Z = np.where(observed,self.returns,0)
+        counts = np.dot(M.T,M)
+        sums = np.dot(Z.T,M)
+        cross = np.dot(Z.T,Z)
+        with np.errstate(divide = "ignore",invalid = "ignore"):
+            covariance = (cross - sums * sums.T / counts) / (counts - 1)
+        covariance[counts < 2] = 0.0
+        return nearest_positive_semidefinite(covariance)
+
+
+def trading_calendar(dates,intersection = False):
+    # Join the dates of many assets into a single sorted calendar. Either every
+    # date on which any asset traded is included, or only the dates on which
+    # every asset traded.
+    if not dates:
+        return np.array([],dtype = "datetime64[D]")
+    calendar, counts = np.unique(np.concatenate(dates),return_counts = True)
+    if intersection:
+        # The dates of each asset are unique, so that a date appears once for
+        # every asset which traded on it.
+        calendar = calendar[counts == len(dates)]
+    return calendar
+
+
+def nearest_positive_semidefinite(covariance):
+    # The nearest positive semidefinite matrix to a symmetric matrix, in the
+    # Frobenius norm, has the same eigenvectors and its negative eigenvalues
+    # set to zero. A matrix which is already positive semidefinite is returned
+    # unchanged.
+    covariance = (covariance + covariance.T) / 2
+    eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+    if len(eigenvalues) == 0 or eigenvalues[0] >= 0:
+        return covariance
+    return np.dot(eigenvectors * np.maximum(eigenvalues,0),eigenvectors.T)
+
+
+def forward_fill(prices):
+    # Replace every missing price with the most recent price before it, in a
+    # vectorized pass: the row of the most recent observation is found by a
+    # running maximum of the rows at which prices were observed.
+    rows = np.where(np.isfinite(prices),np.arange(prices.shape[0])[:,None],0)
+    rows = np.maximum.accumulate(rows,axis = 0)
+    filled = prices[rows,np.arange(prices.shape[1])]
+    return filled
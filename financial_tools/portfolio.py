@@ -0,0 +1,391 @@
+# portfolio.py  This class represents a portfolio of stocks. It supports optimization
+#      of assets via a quadratic program.
+#
+# The following is an example of how the portfolio class may be used to represent a
+# portfolio of assets representing major technology companies:
+#       portfolio = Portfolio(["MSFT","GOOG","IBM"])
+#       print "The value at risk: %.2f" % portfolio.calculate_parametric_risk(.05,1000)
+#       print "The expected shortfall: %.2f" % portfolio.calculate_parametric_risk(.05,1000,True)
+#
+# The risk of the portfolio may also be calculated by simulation, either from
+# the historical returns of the assets or by Monte Carlo (see risk.py):
+#       print portfolio.calculate_simulated_risk(.05,position = 1000,distribution = "t_copula")
+#
+# The returns of the assets are aligned on a shared calendar of trading days
+# (see panel.py). By default only the days on which every asset traded are
+# used; assets with different listing dates may instead be forward-filled or
+# compared pairwise:
+#       portfolio = Portfolio(["MSFT","GOOG","FB"],missing = "pairwise")
+#
+# For large numbers of assets, the sample covariance may be replaced by one of
+# the estimators of covariance.py, given by name or as an estimator object. A
+# factor model is used in factored form by the optimizer and the risk engine:
+#       portfolio = Portfolio(tickers,covariance_estimator = FactorModel(n_factors = 5))
+#
+# The weights may also be re-optimized on a rolling schedule, from a sliding
+# window of returns (see rebalancing.py):
+#       walk_forward = portfolio.walk_forward(window = 252,frequency = 21)
+#       print walk_forward.results["turnover"]["max_sharpe"]
+#
+# The portfolio subscribes to its stocks, so that when trading days are appended
+# to them (see stock.py) the statistics and the optimization are recalculated
+# the next time that they are used, without downloading the stocks again. The
+# covariance estimator is brought up to date with the new days rather than
+# fitted again.
+
+import numpy as np
+from .stock import Stock, DownloadError
+from .frontier import CriticalLineAlgorithm
+from .risk import RiskEngine
+from .panel import ReturnsPanel
+from .rebalancing import WalkForward, OBJECTIVES, cvxopt_solvers
+from .covariance import CovarianceEstimator, CovarianceMatrix, estimate_covariance
+from .instrumentation import stage, instrumented
+
+
+
+
+def refreshed(name):
+    # A property of the portfolio which is recalculated, together with the
+    # others, when the stocks of the portfolio have been appended to since it
+    # was last calculated.
+    def get(self):
+        if self.stale:
+            self.refresh()
+        return getattr(self,"_" + name)
+
+    def set(self,value):
+        setattr(self,"_" + name,value)
+    return property(get,set)
+
+
+class Portfolio(object):
+    statistics = refreshed("statistics")
+    optimization = refreshed("optimization")
+    returns = refreshed("returns")
+    panel = refreshed("panel")
+
+    def __init__(self,assets,risk_free = None,position = None,missing = "drop",covariance_estimator = "sample"):
+        # The position refers to the dollar amount invested into this particular
+        # portfolio. The position can be allocated so that it corresponds to the
+        # portfolio with the maximum sharpe's ratio, or to the portfolio with the
+        # minimum risk.
+        self.position = position if position is not None else None
+
+        # The assets and the risk free asset are downloaded concurrently. If any
+        # of them cannot be obtained, the portfolio cannot be constructed, and
+        # every failure is reported at once.
+        risk_free = risk_free if risk_free is not None else "^IRX"
+        stocks, failures = Stock.load_many(list(assets) + [risk_free])
+        if failures:
+            raise DownloadError(failures)
+        self.assets = stocks[:-1]
+        self.risk_free = stocks[-1]
+
+        self.n = len(self.assets)
+        self.missing = missing
+        self.covariance_estimator = covariance_estimator
+        self.stale = False
+        self._statistics = None
+        self.refresh()
+
+        for stock in stocks:
+            stock.subscribe(self.update)
+
+    def __str__(self):
+        print_string = "Assets in portfolio: [" + " ".join([asset.ticker for asset in self.assets]) + "]\n\n"
+        for asset in self.assets:
+            print_string += asset.__str__() + "\n\n"
+        print_string += "The weights for each asset in the portfolio:\n"
+        for i in range(self.n):
+            print_string += "\t" + self.assets[i].ticker + "\t: " + str(self.optimization["max_sharpe_weights"][i][0]) + "\n"
+        print_string += "\nExpected return: %.4f" % self.returns
+
+        return print_string
+
+    def update(self,stock,start):
+        # Called by the stocks of the portfolio when trading days are appended.
+        self.stale = True
+
+    @instrumented("portfolio_refresh",lambda portfolio: {"assets" : portfolio.n})
+    def refresh(self):
+        previous = self._statistics
+        self.stale = False
+        self.statistics = self.calculate_statistics(previous)
+        self.optimization = self.optimize_portfolio()
+        self.returns = self.calculate_portfolio_returns()
+
+    def calculate_portfolio_returns(self):
+        return np.dot(self.statistics["expected_asset_returns"],self.optimization["max_sharpe_weights"])[0]
+
+
+    @instrumented("portfolio_statistics",lambda portfolio: {"assets" : portfolio.n})
+    def calculate_statistics(self,previous = None):
+        statistics = {}
+
+        # The returns of the assets are joined on a shared calendar of trading
+        # days, so that the returns in each row of the matrix were earned over
+        # the same days. With the "pairwise" policy, missing returns are nan, and
+        # each statistic is calculated from the returns which are present.
+        self.panel = ReturnsPanel(self.assets,missing = self.missing)
+        returns = self.panel.returns
+        n_days = len(self.panel)
+
+        # As for a single stock, the expected return over the entire period is
+        # the average daily return multiplied by the length of the period. The
+        # expected return of the risk free asset is taken over the same period.
+        statistics["asset_returns"] = returns
+        statistics["dates"] = self.panel.return_dates
+        statistics["expected_daily_asset_returns"] = self.panel.expected_daily_returns()
+        statistics["expected_asset_returns"] = statistics["expected_daily_asset_returns"] * n_days
+        statistics["expected_risk_free_return"] = self.risk_free.statistics["expected_daily_return"] * n_days
+
+        # The covariance estimator is either the name of an estimator or an
+        # estimator object, which is fitted here to the returns of the panel.
+        # The sample covariance of returns with missing days is the pairwise
+        # covariance of the panel. An estimator in factored form does not
+        # provide the dense covariance matrix, which is then None.
+        #
+        # When the statistics are recalculated after trading days have been
+        # appended, and the earlier returns are unchanged, the estimator of the
+        # previous statistics is simply updated with the returns of the new days.
+        # A fixed covariance matrix (such as the pairwise covariance) cannot be
+        # updated, and is instead recalculated.
+        estimator = self.covariance_estimator
+        with stage("covariance",assets = self.n,days = n_days):
+            if previous is not None and extends(previous,statistics["dates"],returns):
+                estimator = previous["covariance_estimator"]
+                for day_returns in returns[len(previous["dates"]):]:
+                    estimator.update(day_returns)
+            elif isinstance(estimator,CovarianceEstimator):
+                estimator.fit(returns)
+            elif estimator == "sample" and not np.all(self.panel.observed()):
+                estimator = CovarianceMatrix(self.panel.covariance())
+            else:
+                estimator = estimate_covariance(returns,estimator)
+            statistics["covariance_estimator"] = estimator
+            statistics["covariance"] = estimator.to_dense() if estimator.factored() is None else None
+
+        # Due to the behavior of the numpy "diag" function, scalar inputs will fail and 
+        # produce an error. This instance occurs when there is only a single asset in the
+        # portfolio. In this case, simply exclude the call to "diag" and calculate the 
+        # standard deviation and the square root of a scalar covariance "matrix".
+        if statistics["covariance"] is not None and statistics["covariance"].shape == ():
+            statistics["standard_deviation"] = np.sqrt(statistics["covariance"])
+        else:
+            statistics["standard_deviation"] = np.sqrt(estimator.diagonal())
+        return statistics
+
+    def calculate_parametric_risk(self,alpha,expected_shortfall = False,position = None):
+
+        if position is None and self.position is not None:
+            position = self.position
+        elif position is None and self.position is None:
+            print "Either specify a position for the portfolio object or provide one as an input parameter."
+            return np.nan
+
+        mu = self.statistics["expected_asset_returns"]
+        w = self.optimization["max_sharpe_weights"]
+        portfolio_mu = np.dot(mu,w)
+        portfolio_sigma = np.sqrt(self.statistics["covariance_estimator"].quadratic(w))[0]
+
+        from scipy import stats
+        quantile = stats.norm.ppf(alpha)
+
+        if expected_shortfall:
+            risk = position * (-portfolio_mu + portfolio_sigma * (stats.norm.pdf(quantile) / alpha))
+        else:
+            risk = -position * (portfolio_mu + quantile * portfolio_sigma)
+
+        return risk
+
+    def calculate_simulated_risk(self,alpha,expected_shortfall = False,position = None,weights = None,
+                                 method = "monte_carlo",distribution = "normal",scenarios = 100000,
+                                 seed = None,processes = None):
+        # Calculate the one-day value-at-risk (or expected shortfall) of the
+        # portfolio by full revaluation under simulated scenarios. By default the
+        # portfolio with the maximum Sharpe's ratio is evaluated, but a matrix of
+        # weights with one column per portfolio may be provided instead, in which
+        # case the risk of every portfolio is returned.
+        if position is None and self.position is not None:
+            position = self.position
+        elif position is None and self.position is None:
+            print "Either specify a position for the portfolio object or provide one as an input parameter."
+            return np.nan
+
+        engine = RiskEngine(self.statistics["asset_returns"],method = method,distribution = distribution,
+                            seed = seed,processes = processes,
+                            covariance = self.statistics["covariance_estimator"])
+        w = self.optimization["max_sharpe_weights"].ravel() if weights is None else weights
+        risk = engine.evaluate(w,alpha = alpha,position = position,scenarios = scenarios)
+
+        if expected_shortfall:
+            return risk["expected_shortfall"]
+        return risk["value_at_risk"]
+
+
+    @instrumented("kelly",lambda portfolio: {"assets" : portfolio.n})
+    def optimize_kelly_criterion(self):
+        # This code attempts to reproduce the optimization routine proposed by 
+        # Vasily Nekrasov using the Kelly criterion. In particular, this code 
+        # uses as reference the following work:
+        #
+        # Nekrasov, Vasily. 2013. "Kelly Criterion for Multivariate Portfolios: 
+        # A Model-Free Approach".
+
+        kelly_optimization = {}
+
+        r = self.risk_free.statistics["expected_daily_return"]
+        r_assets = self.statistics["expected_daily_asset_returns"]
+        q = 1.0 / (1 + r) * (r_assets - r)
+
+        # Notice that the "linear" term in the quadratic optimization formulation is made 
+        # negative. This is because Nekrasov maximizes the function, whereas CXVOPT is forced
+        # to minimize. By making the linear term negative, we arrive at an equivalent 
+        # formulation.
+        solve = self.quadratic_program()
+        kelly_optimization["weights"] = solve(1.0 / ((1 + r) ** 2),-q)
+        return kelly_optimization
+
+
+    def walk_forward(self,window = 252,frequency = 21,objectives = OBJECTIVES,covariance_estimator = "sample",
+                     processes = None):
+        # Re-optimize the maximum Sharpe's ratio, minimum variance and Kelly
+        # portfolios every "frequency" days from the previous "window" days.
+        return WalkForward(self,window = window,frequency = frequency,objectives = objectives,
+                           covariance_estimator = covariance_estimator,processes = processes)
+
+    @instrumented("optimize_portfolio",lambda portfolio: {"assets" : portfolio.n})
+    def optimize_portfolio(self,method = "critical_line",resolution = 100):
+        # The efficient frontier is computed exactly by the critical line
+        # algorithm (see frontier.py), and is sampled at "resolution" points.
+        # The original approach, which solves a quadratic program for each of
+        # one hundred levels of risk aversion, remains available by specifying
+        # the "quadratic_program" method, as a reference against which to
+        # check the critical line algorithm.
+        if method == "quadratic_program":
+            return self.optimize_portfolio_quadratic_program()
+        elif method != "critical_line":
+            raise ValueError("Unknown portfolio optimization method: " + str(method))
+
+        optimization = {}
+        n = self.n
+        # A factor model is given to the critical line algorithm in factored
+        # form, so that the dense covariance matrix is never formed.
+        estimator = self.statistics["covariance_estimator"]
+        covariance = estimator.factored()
+        if covariance is None:
+            covariance = np.atleast_2d(estimator.to_dense())
+        cla = CriticalLineAlgorithm(self.statistics["expected_asset_returns"],covariance)
+
+        returns, risk, weights = cla.frontier(resolution)
+        corner_returns, corner_risk, corner_weights = cla.corner_portfolios()
+
+        # Risk is reported exactly as by the quadratic programming approach,
+        # which measures it against twice the covariance matrix. This scaling
+        # has no effect on which portfolio attains the greatest Sharpe's ratio.
+        optimization["returns"] = returns
+        optimization["risk"] = np.sqrt(2) * risk
+        optimization["frontier_weights"] = weights
+        optimization["corner_weights"] = corner_weights
+        optimization["corner_returns"] = corner_returns
+        optimization["corner_risk"] = np.sqrt(2) * corner_risk
+
+        mu_free = self.statistics["expected_risk_free_return"]
+        optimization["max_sharpe_weights"] = cla.max_sharpe(mu_free).reshape((n,1))
+        optimization["min_variance_weights"] = cla.min_variance().reshape((n,1))
+        return optimization
+
+    def optimize_portfolio_quadratic_program(self):
+        optimization = {}
+
+        n = self.n
+        expected_returns = self.statistics["expected_asset_returns"]
+        solve = self.quadratic_program()
+
+        mu_array = [10**(5.0*t/100-1.0) for t in range(100)]
+
+        portfolio_weights = np.array([solve(2 * mu,-expected_returns) for mu in mu_array])
+        returns = np.dot(portfolio_weights,expected_returns)
+        risk = np.sqrt(2 * self.statistics["covariance_estimator"].quadratic(portfolio_weights.T))
+        
+        # Calculate the portfolio with the greatest "reward-to-risk" ratio, which
+        # is Sharpe's ratio. Notice that it is not necessary to specify the risk
+        # free rate in the calculation of Sharpe's ratio, as without loss of generality
+        # it may be assumed to be zero. In either case, the same portfolio will
+        # achieve the maximum. However, since the risk free asset defaults to a 
+        # Treasury bill, we take no action regarding this observation.
+        mu_free = self.statistics["expected_risk_free_return"]
+        sharpe_ratio = (returns - mu_free) / risk
+
+        optimization["returns"] = returns
+        optimization["risk"] = risk
+        optimization["max_sharpe_weights"] = portfolio_weights[np.argmax(sharpe_ratio)].reshape((n,1))
+        optimization["min_variance_weights"] = portfolio_weights[np.argmin(risk)].reshape((n,1))
+        return optimization
+
+    def quadratic_program(self):
+        # Return a function which solves the quadratic program
+        #     minimize scale / 2 * w'Sw + q'w   subject to w >= 0, sum(w) = 1
+        # for the covariance S of the assets. The matrices of the program are
+        # constructed once, and shared by every solution.
+        #
+        # When the covariance is a factor model S = L L' + diag(D), the program
+        # is solved over the weights together with the k exposures y = L'w to the
+        # factors, since then w'Sw = y'y + w'diag(D)w. The quadratic term is
+        # diagonal, and the N x N covariance matrix is never formed.
+        from cvxopt import matrix, spmatrix, spdiag
+        solvers = cvxopt_solvers()
+        n = self.n
+        estimator = self.statistics["covariance_estimator"]
+        G, h, A, b = self.optimization_constraint_matrices()
+
+        if estimator.factored() is None:
+            S = matrix(estimator.to_dense())
+            L, k = np.zeros((n,0)), 0
+        else:
+            L, D = estimator.factored()
+            k = L.shape[1]
+            S = spdiag(matrix(np.concatenate((D,np.ones(k)))))
+            G = spmatrix(-1.0,range(n),range(n),(n,n + k))
+            exposures = np.zeros((k + 1,n + k))
+            exposures[0,:n] = 1.0
+            exposures[1:,:n] = L.T
+            exposures[1:,n:] = -np.eye(k)
+            A = matrix(exposures)
+            b = matrix(np.concatenate(([1.0],np.zeros(k))))
+
+        def solve(scale,q,initial = None):
+            # The solution may be started from an initial vector of weights,
+            # such as the solution of a neighbouring program. As in
+            # rebalancing.py, the weights are first drawn slightly towards the
+            # equally weighted portfolio, so that the start is strictly feasible.
+            q = matrix(np.concatenate((np.asarray(q,dtype = np.float64).ravel(),np.zeros(k))))
+            initvals = None
+            if initial is not None:
+                initial = np.asarray(initial,dtype = np.float64).ravel()
+                initial = .9 * initial + .1 * np.mean(initial)
+                initvals = {"x" : matrix(np.concatenate((initial,np.dot(L.T,initial)))),"s" : matrix(initial)}
+            with stage("qp",assets = n) as record:
+                solution = solvers.qp(float(scale) * S,q,G,h,A,b,initvals = initvals)
+                record.add(iterations = solution["iterations"])
+            return np.array(solution["x"]).ravel()[:n]
+        return solve
+
+    def optimization_constraint_matrices(self):
+        from cvxopt import matrix
+        n = self.n
+        G = matrix(0.0, (n,n))
+        G[::n+1] = -1.0
+        h = matrix(0.0, (n,1))
+        A = matrix(1.0, (1,n))
+        b = matrix(1.0)
+
+        return G, h, A, b
+
+
+def extends(statistics,dates,returns):
+    # Whether the returns are those of the statistics followed by further days.
+    n = len(statistics["dates"])
+    return (not isinstance(statistics["covariance_estimator"],CovarianceMatrix) and len(dates) >= n
+            and np.array_equal(dates[:n],statistics["dates"]) and np.array_equal(returns[:n],statistics["asset_returns"]))
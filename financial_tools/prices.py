@@ -0,0 +1,233 @@
+# prices.py: A compact, columnar representation of the daily price history of
+#       an asset. Rather than storing each trading day as a dictionary of
+#       strings, the history is held as a sorted index of dates together with
+#       contiguous arrays for each of the price fields reported by Yahoo
+#       Finance!
+#
+# Because the date index is sorted, looking up a particular trading day or
+# extracting the history over an interval of time is a binary search rather
+# than a scan over every recorded date. Slices are views onto the original
+# arrays, so that no price data is copied.
+#
+# The following is an example usage of the price history class:
+#       dates = ["2013-01-02","2013-01-03","2013-01-04"]
+#       columns = {"Close" : [10.0,10.5,10.25]}
+#       prices = PriceHistory(dates,columns)
+#       print prices.lookup("2013-01-03","Close")
+#       print prices.slice("2013-01-03","2013-01-04")["Close"]
+#
+# Price histories in the CSV format of Yahoo Finance! are parsed in a single
+# streaming pass, from a local file or from an open connection:
+#       prices = read_yahoo_csv("GOOG.csv")
+#
+# New trading days may be appended to the end of a history as they arrive. The
+# arrays are allocated with spare capacity, which doubles whenever it is used
+# up, so that appending a day costs O(1) amortized time:
+#       prices.extend(["2013-01-07"],{"Close" : [10.5]})
+
+import numpy as np
+
+# The fields reported by Yahoo Finance! for each trading day, in the order in
+# which they appear in the downloaded CSV file. The trading volume is stored
+# as an integer array, while every other field is stored as a float array.
+FIELDS = ("Open","High","Low","Close","Volume","Adj Close")
+INTEGER_FIELDS = ("Volume",)
+
+
+def field_dtype(field):
+    return np.int64 if field in INTEGER_FIELDS else np.float64
+
+
+def grow(buffer,length,values):
+    # Write the values after the first "length" entries of the buffer, and
+    # return the buffer. When the buffer is full, the values are written to a
+    # new buffer of twice the capacity instead, so that the entries which have
+    # already been written are not disturbed (arrays which view them remain
+    # valid) and the cost of reallocation is amortized over every value.
+    needed = length + len(values)
+    if needed > len(buffer):
+        enlarged = np.empty(max(2 * len(buffer),needed,16),dtype = buffer.dtype)
+        enlarged[:length] = buffer[:length]
+        buffer = enlarged
+    buffer[length:needed] = values
+    return buffer
+
+
+def as_datetime64(date):
+    # Dates are accepted either as strings in the format "YYYY-MM-DD", as
+    # datetime objects, or as numpy datetime64 values of any resolution.
+    if isinstance(date,(str,type(u""))):
+        return np.datetime64(date[:10],"D")
+    return np.datetime64(date,"D")
+
+
+class PriceHistory(object):
+    def __init__(self,dates,columns):
+        dates = np.asarray(dates).astype("datetime64[D]",copy = False)
+        columns = dict((field,np.asarray(values,dtype = field_dtype(field))) for field,values in columns.items())
+
+        # Yahoo Finance! reports the most recent trading day first. Store the
+        # history in ascending order so that dates may be located by binary
+        # search; the sort is skipped entirely when the dates are already
+        # ordered, which is the common case for slices and cached histories.
+        if len(dates) > 1 and np.any(dates[1:] < dates[:-1]):
+            order = np.argsort(dates,kind = "mergesort")
+            dates = dates[order]
+            columns = dict((field,values[order]) for field,values in columns.items())
+
+        self.dates = dates
+        self.columns = columns
+        self.buffers = None
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __getitem__(self,field):
+        return self.columns[field]
+
+    def __contains__(self,date):
+        index = np.searchsorted(self.dates,as_datetime64(date))
+        return index < len(self.dates) and self.dates[index] == as_datetime64(date)
+
+    def fields(self):
+        return [field for field in FIELDS if field in self.columns]
+
+    def index_of(self,date):
+        # Locate the position of a trading day in O(log n) time. As with a
+        # dictionary keyed by date, a KeyError is raised for dates on which
+        # the asset did not trade.
+        date = as_datetime64(date)
+        index = np.searchsorted(self.dates,date)
+        if index == len(self.dates) or self.dates[index] != date:
+            raise KeyError(str(date))
+        return int(index)
+
+    def lookup(self,date,field):
+        return self.columns[field][self.index_of(date)]
+
+    def slice(self,start = None,end = None):
+        # Both endpoints of the interval are inclusive, in keeping with the
+        # date ranges used to download the price history.
+        lower = 0 if start is None else np.searchsorted(self.dates,as_datetime64(start),side = "left")
+        upper = len(self.dates) if end is None else np.searchsorted(self.dates,as_datetime64(end),side = "right")
+        return PriceHistory(self.dates[lower:upper],
+                            dict((field,values[lower:upper]) for field,values in self.columns.items()))
+
+    def date_strings(self):
+        return [str(date) for date in self.dates]
+
+    def extend(self,dates,columns):
+        # Append trading days to the end of the history. The days must follow
+        # the last day of the history in ascending order, and a value must be
+        # given for every field of the history.
+        dates = np.asarray(dates).astype("datetime64[D]",copy = False)
+        if not len(dates):
+            return
+        if np.any(dates[1:] <= dates[:-1]) or (len(self.dates) and dates[0] <= self.dates[-1]):
+            raise ValueError("Appended trading days must follow the last day of the history in ascending order.")
+        if set(columns.keys()) != set(self.columns.keys()):
+            raise ValueError("A value must be given for every field of the history: " + ", ".join(self.fields()))
+
+        # The arrays of the history begin as buffers without spare capacity,
+        # which may be views onto other arrays (or read-only memory maps), and
+        # so are never written beyond their length.
+        if self.buffers is None:
+            self.buffers = dict(self.columns,Date = self.dates)
+        n = len(self.dates)
+        self.buffers["Date"] = grow(self.buffers["Date"],n,dates)
+        for field in self.columns.keys():
+            self.buffers[field] = grow(self.buffers[field],n,np.asarray(columns[field],dtype = field_dtype(field)))
+
+        self.dates = self.buffers["Date"][:n + len(dates)]
+        self.columns = dict((field,self.buffers[field][:n + len(dates)]) for field in self.columns.keys())
+
+    def row(self,index):
+        return dict((field,self.columns[field][index]) for field in self.fields())
+
+    def to_profile(self):
+        # Construct the legacy representation of the price history, in which
+        # every trading day is a dictionary of strings keyed by the date:
+        #     'YYYY-MM-DD': {'Adj Close': 'float',
+        #                    'Close': 'float',
+        #                    'High': 'float',
+        #                    'Low': 'float',
+        #                    'Open': 'float',
+        #                    'Volume': 'int'
+        #                   }
+        fields = self.fields()
+        columns = [[repr(value) for value in self.columns[field].tolist()] for field in fields]
+        profile = {}
+        for i,date in enumerate(self.date_strings()):
+            profile[date] = dict((fields[j],columns[j][i]) for j in range(len(fields)))
+        return profile
+
+
+def read_yahoo_csv(source,chunk_size = 1 << 20):
+    # Parse a price history in the CSV format of Yahoo Finance!:
+    #     Date,Open,High,Low,Close,Volume,Adj Close
+    #     2013-01-08,...
+    # The source is either the path of a local file or an open file-like
+    # object, such as the response to an HTTP request. The source is read in
+    # chunks of "chunk_size" bytes, and every chunk is decoded directly into
+    # preallocated arrays, so that the parser never holds more than a single
+    # chunk of text in memory at once.
+    if isinstance(source,(str,type(u""))):
+        with open(source,"rb") as csv_file:
+            return read_yahoo_csv(csv_file,chunk_size)
+
+    keys, buffer = None, b""
+    dates, columns, n = None, None, 0
+
+    while True:
+        chunk = source.read(chunk_size)
+        buffer += chunk
+
+        # Only complete lines are parsed. The incomplete line at the end of
+        # the chunk is carried over and completed by the next chunk, unless
+        # the source is exhausted.
+        end = buffer.rfind(b"\n") if chunk else len(buffer)
+        if end < 0:
+            continue
+        block, buffer = buffer[:end], buffer[end + 1:]
+
+        if keys is None:
+            header, _, block = block.partition(b"\n")
+            keys = [str(key.strip().decode("utf-8")) for key in header.split(b",")]
+            dates = np.empty(1024,dtype = "datetime64[D]")
+            columns = dict((key,np.empty(1024,dtype = field_dtype(key))) for key in keys[1:])
+
+        rows = [row for row in block.replace(b"\r",b"").split(b"\n") if row]
+        if rows:
+            fields = np.array(b",".join(rows).split(b","))
+            if len(fields) != len(rows) * len(keys):
+                raise ValueError("Every line of the CSV file must have %d fields." % len(keys))
+            fields = fields.reshape(len(rows),len(keys))
+
+            # Grow the arrays geometrically whenever they are full, so that
+            # the cost of reallocation is amortized over the whole file.
+            if n + len(rows) > len(dates):
+                capacity = max(2 * len(dates),n + len(rows))
+                dates.resize(capacity,refcheck = False)
+                for values in columns.values():
+                    values.resize(capacity,refcheck = False)
+
+            dates[n:n + len(rows)] = fields[:,0].astype("datetime64[D]")
+            for j in range(1,len(keys)):
+                columns[keys[j]][n:n + len(rows)] = fields[:,j].astype(np.float64)
+            n += len(rows)
+
+        if not chunk:
+            break
+
+    dates.resize(n,refcheck = False)
+    for values in columns.values():
+        values.resize(n,refcheck = False)
+
+    # Yahoo Finance! reports the most recent trading day first. A history in
+    # descending order is reversed one column at a time, which is cheaper
+    # than the general sort performed by the price history.
+    if n > 1 and np.all(dates[1:] <= dates[:-1]):
+        dates[:] = dates[::-1].copy()
+        for values in columns.values():
+            values[:] = values[::-1].copy()
+    return PriceHistory(dates,columns)
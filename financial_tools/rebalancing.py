@@ -0,0 +1,191 @@
+# rebalancing.py: Walk-forward re-optimization of a portfolio on a rolling
+#       schedule of rebalance dates.
+#
+# At every rebalance date the weights of the portfolio with the maximum Sharpe's
+# ratio, of the portfolio with the minimum variance, and of the Kelly portfolio
+# are re-estimated from a window of the most recent days of returns. The
+# statistics of the window are not recalculated from scratch: as the window
+# slides forward from one rebalance date to the next, the days which enter it
+# are added to the running sums of the covariance estimator and the days which
+# leave it are removed (see covariance.py). The sums are recalculated exactly
+# once the window has moved by its own length, so that rounding errors do not
+# accumulate.
+#
+# Each rebalance solves a single quadratic program per objective. Successive
+# programs differ only slightly, so that each is started from the weights of the
+# previous rebalance. Since the windows of distant rebalance dates share no
+# days, the rebalance dates may be divided into contiguous blocks which are
+# solved in parallel by a pool of processes; the programs within each block are
+# warm-started from one another as before.
+#
+# The following is an example of how to re-optimize a portfolio every month
+# from the returns of the previous year:
+#       walk_forward = WalkForward(portfolio,window = 252,frequency = 21)
+#       print walk_forward.results["weights"]["max_sharpe"][-1]
+#       print walk_forward.results["turnover"]["kelly"]
+
+import numpy as np
+from multiprocessing import Pool
+from .covariance import ESTIMATORS
+from .panel import ReturnsPanel
+
+OBJECTIVES = ("max_sharpe","min_variance","kelly")
+
+
+class WalkForward(object):
+    def __init__(self,portfolio,window = 252,frequency = 21,objectives = OBJECTIVES,
+                 covariance_estimator = "sample",processes = None):
+        # The covariance estimator is the name of an estimator which supports
+        # the removal of days, that is, either "sample" or "ledoit_wolf".
+        returns = portfolio.statistics["asset_returns"]
+        n_days = returns.shape[0]
+        if not np.all(np.isfinite(returns)):
+            raise ValueError("The walk-forward optimization requires a return for every asset on every day.")
+        if window < 2 or window > n_days:
+            raise ValueError("The window must contain at least two days and not exceed the length of the series.")
+        if not hasattr(ESTIMATORS.get(covariance_estimator),"remove"):
+            raise ValueError("The covariance estimator must support the removal of days: " + str(covariance_estimator))
+
+        self.portfolio = portfolio
+        self.window = window
+        self.frequency = frequency
+        self.objectives = tuple(objectives)
+        self.covariance_estimator = covariance_estimator
+        self.processes = processes
+
+        # The risk free return of each window is the average of the returns of
+        # the risk free asset over the days of the window on which it has one.
+        risk_free = ReturnsPanel([portfolio.risk_free],missing = "pairwise",
+                                 calendar = portfolio.panel.dates).returns[:,0]
+        self.risk_free = risk_free
+
+        # The portfolio is rebalanced at the close of every "frequency" days,
+        # from the window of returns which ends on that day.
+        self.positions = np.arange(window,n_days + 1,frequency)
+        self.results = self.rebalance()
+
+    def rebalance(self):
+        returns = self.portfolio.statistics["asset_returns"]
+        blocks = [self.positions]
+        if self.processes is not None and self.processes > 1:
+            blocks = [block for block in np.array_split(self.positions,self.processes) if len(block)]
+        arguments = [(returns,self.risk_free,self.window,block,self.objectives,self.covariance_estimator)
+                     for block in blocks]
+
+        if len(arguments) > 1:
+            pool = Pool(self.processes)
+            try:
+                solutions = pool.map(walk_forward_block,arguments)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            solutions = [walk_forward_block(block_arguments) for block_arguments in arguments]
+
+        # The turnover of a rebalance is the sum of the absolute changes in the
+        # weights. The portfolio begins in cash, so that the turnover of the
+        # first rebalance is the entire position.
+        results = {"tickers" : [asset.ticker for asset in self.portfolio.assets],
+                   "dates" : self.portfolio.statistics["dates"][self.positions - 1],
+                   "weights" : {},"turnover" : {},"iterations" : {}}
+        for objective in self.objectives:
+            weights = np.concatenate([solution[objective][0] for solution in solutions],axis = 0)
+            previous = np.concatenate((np.zeros((1,weights.shape[1])),weights[:-1]),axis = 0)
+            results["weights"][objective] = weights
+            results["turnover"][objective] = np.sum(np.abs(weights - previous),axis = 1)
+            results["iterations"][objective] = np.concatenate([solution[objective][1] for solution in solutions])
+        return results
+
+
+def walk_forward_block(arguments):
+    # Solve the programs of a contiguous block of rebalance dates, sliding the
+    # window of the covariance estimator from each date to the next.
+    returns, risk_free, window, positions, objectives, estimator_name = arguments
+    observed = np.isfinite(risk_free)
+    risk_free_sums = np.concatenate(([0],np.cumsum(np.where(observed,risk_free,0))))
+    risk_free_counts = np.concatenate(([0],np.cumsum(observed)))
+
+    estimator = None
+    solutions = dict((objective,([],[])) for objective in objectives)
+    previous = dict((objective,None) for objective in objectives)
+    for position in positions:
+        if estimator is None or position - refitted >= window:
+            estimator = ESTIMATORS[estimator_name](returns[position - window:position])
+            refitted = position
+        else:
+            estimator.update(returns[last:position])
+            estimator.remove(returns[last - window:position - window])
+        last = position
+
+        count = risk_free_counts[position] - risk_free_counts[position - window]
+        r = (risk_free_sums[position] - risk_free_sums[position - window]) / count if count else 0.0
+        mean, covariance = estimator.mean(), estimator.to_dense()
+
+        for objective in objectives:
+            weights, iterations = optimize_weights(objective,mean,covariance,r,previous[objective])
+            previous[objective] = weights
+            solutions[objective][0].append(weights)
+            solutions[objective][1].append(iterations)
+
+    return dict((objective,(np.array(solutions[objective][0]).reshape((len(positions),returns.shape[1])),
+                            np.array(solutions[objective][1],dtype = int))) for objective in objectives)
+
+
+def optimize_weights(objective,mean,covariance,risk_free,initial = None):
+    # Solve the long-only, fully invested quadratic program of the objective,
+    # starting from the initial weights when they are given. The weights and
+    # the number of iterations taken by the solver are returned.
+    from cvxopt import matrix, spmatrix
+    solvers = cvxopt_solvers()
+    n = len(mean)
+    G = spmatrix(-1.0,range(n),range(n))
+    h = matrix(0.0,(n,1))
+    A = matrix(1.0,(1,n))
+    b = matrix(1.0)
+
+    if objective == "max_sharpe":
+        # The portfolio with the maximum Sharpe's ratio is found by a single
+        # program over the scaled weights y = w / (mu - r)'w, which minimizes
+        # y'Sy subject to (mu - r)'y = 1 and y >= 0; the weights are y / sum(y).
+        # When no asset is expected to outperform the risk free asset, no such
+        # portfolio exists, and the portfolio with the minimum variance is used.
+        excess = mean - risk_free
+        if not np.any(excess > 0):
+            return optimize_weights("min_variance",mean,covariance,risk_free,initial)
+        P, q = matrix(covariance), matrix(0.0,(n,1))
+        A = matrix(excess.reshape((1,n)))
+        if initial is not None and np.dot(excess,initial) > 0:
+            initial = initial / np.dot(excess,initial)
+        else:
+            initial = None
+    elif objective == "min_variance":
+        P, q = matrix(2 * covariance), matrix(0.0,(n,1))
+    elif objective == "kelly":
+        # As in Portfolio.optimize_kelly_criterion.
+        P = matrix(1.0 / ((1 + risk_free) ** 2) * covariance)
+        q = matrix(-1.0 / (1 + risk_free) * (mean - risk_free))
+    else:
+        raise ValueError("Unknown rebalancing objective: " + str(objective))
+
+    # The interior-point solver requires a starting point strictly inside the
+    # constraints, whereas the previous weights of assets which are not held
+    # are zero. The previous weights are therefore drawn slightly towards the
+    # equally weighted portfolio, and serve as the slacks of the constraints
+    # w >= 0 as well as the starting weights.
+    initvals = None
+    if initial is not None:
+        initial = .9 * np.asarray(initial,dtype = np.float64) + .1 * np.mean(initial)
+        initvals = {"x" : matrix(initial),"s" : matrix(initial)}
+    solution = solvers.qp(P,q,G,h,A,b,initvals = initvals)
+    weights = np.array(solution["x"]).ravel()
+    if objective == "max_sharpe":
+        weights = weights / np.sum(weights)
+    return weights, solution["iterations"]
+
+
+def cvxopt_solvers():
+    # The solvers of cvxopt, which are imported on first use, without printing
+    # the progress of every program.
+    from cvxopt import solvers
+    solvers.options["show_progress"] = False
+    return solvers
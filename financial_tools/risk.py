@@ -0,0 +1,196 @@
+# risk.py: A full-revaluation risk engine for calculating the value-at-risk and
+#       the expected shortfall of portfolios by simulation. Scenarios for the
+#       daily returns of the assets are either the historical returns
+#       themselves (historical simulation) or are drawn at random (Monte Carlo
+#       simulation), from a multivariate normal distribution with the sample
+#       covariance or from a t-copula with fitted t-distributed marginals.
+#
+# Scenarios are generated in chunks of a fixed size, so that the memory
+# required does not grow with the number of scenarios. Every chunk is
+# evaluated against many weight vectors at once, and only the largest losses
+# of each weight vector (those in the tail beyond the value-at-risk) are
+# retained from one chunk to the next. The chunks may be spread across a pool
+# of processes. Each chunk draws from its own random stream, seeded from the
+# seed of the engine, so that the results are reproducible and do not depend
+# on the number of processes. The parameters of the scenarios and the weights
+# are sent to each worker process once, when it starts, so that a task is
+# simply the position, size and seed of a chunk.
+#
+# The following is an example of how to calculate the value-at-risk of two
+# portfolios with one million scenarios drawn from a t-copula:
+#       engine = RiskEngine(returns,method = "monte_carlo",distribution = "t_copula",seed = 0)
+#       risk = engine.evaluate(np.array([[.5,.2],[.5,.8]]),alpha = .05,position = 1000,
+#                              scenarios = 10 ** 6)
+#       print risk["value_at_risk"], risk["expected_shortfall"]
+#
+# For large universes, the covariance of the normal scenarios may be given by
+# an estimator from covariance.py. A factor model is then simulated through its
+# factors, as L z + sqrt(D) e, without forming the covariance matrix.
+
+import numpy as np
+from multiprocessing import Pool
+from .distributions import fit_t
+
+# The parameters of the scenarios, the weights, the position and the size of
+# the tail, set in each worker process when it starts.
+worker_state = None
+
+
+class RiskEngine(object):
+    def __init__(self,returns,method = "monte_carlo",distribution = "normal",copula_dof = 5.0,
+                 seed = None,chunk_size = 100000,processes = None,covariance = None):
+        # The returns are a matrix with one row for each day and one column for
+        # each asset. Days on which any return is missing (nan) cannot serve as
+        # scenarios, and are not used.
+        self.returns = np.atleast_2d(np.asarray(returns,dtype = np.float64).T).T
+        self.returns = self.returns[np.all(np.isfinite(self.returns),axis = 1)]
+        self.method = method
+        self.distribution = distribution
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.processes = processes
+
+        if method not in ("monte_carlo","historical"):
+            raise ValueError("Unknown simulation method: " + str(method))
+
+        if method == "monte_carlo" and distribution == "normal":
+            self.mean = np.mean(self.returns,axis = 0)
+            if covariance is None:
+                self.factor = covariance_factor(np.atleast_2d(np.cov(self.returns,rowvar = 0)))
+                self.parameters = ("normal",self.mean,self.factor)
+            elif covariance.factored() is not None:
+                self.factor, variances = covariance.factored()
+                self.parameters = ("factor",self.mean,self.factor,np.sqrt(variances))
+            else:
+                self.factor = covariance_factor(covariance.to_dense())
+                self.parameters = ("normal",self.mean,self.factor)
+        elif method == "monte_carlo" and distribution == "t_copula":
+            self.parameters = ("t_copula",) + self.fit_t_copula(copula_dof)
+        elif method == "monte_carlo":
+            raise ValueError("Unknown scenario distribution: " + str(distribution))
+
+    def fit_t_copula(self,copula_dof):
+        # Every asset is given a t-distributed marginal, fitted by maximum
+        # likelihood. The dependence between the assets is captured by the
+        # correlation of the pseudo-observations (the ranks of the returns,
+        # scaled into the unit interval) mapped through the quantile function
+        # of a t-distribution with the degrees of freedom of the copula.
+        from scipy import stats
+        n_days, n_assets = self.returns.shape
+        marginals = np.column_stack(fit_t(self.returns))
+
+        ranks = np.argsort(np.argsort(self.returns,axis = 0),axis = 0) + 1.0
+        scores = stats.t.ppf(ranks / (n_days + 1),copula_dof)
+        correlation = np.atleast_2d(np.corrcoef(scores,rowvar = 0))
+        factor = covariance_factor(correlation)
+        return copula_dof, factor, marginals
+
+    def chunks(self,scenarios):
+        # Divide the scenarios into chunks, and give every chunk the seed of its
+        # own random stream. Historical simulation uses each of the historical
+        # days as a scenario, and so has no need of random streams.
+        if self.method == "historical":
+            scenarios = self.returns.shape[0]
+        sizes = [self.chunk_size] * (scenarios // self.chunk_size)
+        sizes += [scenarios % self.chunk_size] if scenarios % self.chunk_size else []
+        seeds = np.random.RandomState(self.seed).randint(0,2 ** 31 - 1,size = len(sizes))
+        starts = np.cumsum([0] + sizes[:-1])
+        return scenarios, list(zip(starts,sizes,seeds))
+
+    def evaluate(self,weights,alpha = .05,position = 1.0,scenarios = 100000):
+        # Calculate the value-at-risk and the expected shortfall of one or more
+        # portfolios over a horizon of one day. The weights are either a single
+        # vector or a matrix with one column for each portfolio.
+        weights = np.asarray(weights,dtype = np.float64)
+        single = weights.ndim == 1
+        weights = weights.reshape((self.returns.shape[1],-1))
+
+        scenarios, chunks = self.chunks(scenarios)
+        tail_size = max(1,int(np.ceil(alpha * scenarios)))
+        parameters = self.parameters if self.method == "monte_carlo" else ("historical",self.returns)
+        state = (parameters,weights,position,tail_size)
+
+        if self.processes is not None and self.processes > 1:
+            pool = Pool(self.processes,initializer = initialize_worker,initargs = state)
+            try:
+                tails = pool.map(evaluate_chunk,chunks)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            initialize_worker(*state)
+            tails = [evaluate_chunk(chunk) for chunk in chunks]
+
+        # The tails of the chunks are merged, and the largest losses overall are
+        # those in the tail of the merged losses. The value-at-risk is the
+        # smallest loss in the tail, and the expected shortfall its mean.
+        tail = largest(np.concatenate(tails,axis = 0),tail_size)
+        risk = {"value_at_risk" : np.min(tail,axis = 0),"expected_shortfall" : np.mean(tail,axis = 0),
+                "scenarios" : scenarios}
+        if single:
+            risk["value_at_risk"] = risk["value_at_risk"][0]
+            risk["expected_shortfall"] = risk["expected_shortfall"][0]
+        return risk
+
+
+def covariance_factor(covariance):
+    # A factor L of the covariance matrix, such that L L' is the covariance, by
+    # which independent normal draws are given that covariance. The Cholesky
+    # factor is used where it exists. A covariance matrix which is singular
+    # (with more assets than days, or an asset which is a combination of
+    # others) or, through rounding or missing returns, not positive
+    # semidefinite has none, and is instead factored through its eigenvectors,
+    # with negative eigenvalues clipped to zero.
+    try:
+        return np.linalg.cholesky(covariance)
+    except np.linalg.LinAlgError:
+        eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+        return eigenvectors * np.sqrt(np.maximum(eigenvalues,0))
+
+
+def largest(losses,k):
+    # Select the k largest losses in each column, in no particular order.
+    if losses.shape[0] <= k:
+        return losses
+    return np.partition(losses,losses.shape[0] - k,axis = 0)[-k:]
+
+
+def generate_scenarios(parameters,start,size,seed):
+    # Draw a chunk of scenarios for the daily returns of the assets, or take
+    # the chunk of historical days which begins at "start".
+    generator = np.random.RandomState(seed)
+    if parameters[0] == "historical":
+        return parameters[1][start:start + size]
+    elif parameters[0] == "normal":
+        mean, factor = parameters[1:]
+        return mean + np.dot(generator.standard_normal((size,len(mean))),factor.T)
+    elif parameters[0] == "factor":
+        mean, loadings, deviations = parameters[1:]
+        common = np.dot(generator.standard_normal((size,loadings.shape[1])),loadings.T)
+        return mean + common + deviations * generator.standard_normal((size,len(mean)))
+    else:
+        # A multivariate t-distributed vector is a multivariate normal vector
+        # divided by the square root of an independent chi-squared variable
+        # (scaled by its degrees of freedom). Mapping each component through
+        # the distribution function of the t-distribution gives the copula,
+        # and the quantile functions of the marginals give the returns.
+        from scipy import stats
+        dof, factor, marginals = parameters[1:]
+        normal = np.dot(generator.standard_normal((size,factor.shape[0])),factor.T)
+        chi_squared = generator.chisquare(dof,size = (size,1)) / dof
+        uniform = stats.t.cdf(normal / np.sqrt(chi_squared),dof)
+        return stats.t.ppf(uniform,marginals[:,0],marginals[:,1],marginals[:,2])
+
+
+def initialize_worker(parameters,weights,position,tail_size):
+    global worker_state
+    worker_state = (parameters,weights,position,tail_size)
+
+
+def evaluate_chunk(chunk):
+    # Revalue every portfolio under every scenario of the chunk, and return
+    # only the largest losses of each portfolio.
+    start, size, seed = chunk
+    parameters, weights, position, tail_size = worker_state
+    losses = -position * np.dot(generate_scenarios(parameters,start,size,seed),weights)
+    return largest(losses,tail_size)
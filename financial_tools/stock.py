@@ -0,0 +1,467 @@
+# Stock.py: A Python class representing a stock as downloaded from Yahoo
+#       Finance! A stock object is instantiated by specifying a ticker
+#       and, optionally, a start and end date in the format "YYYY/MM/DD".
+#
+# The stock object is completely specified by its ticker and a pair of
+# dates across which is aggregates financial data. The stock class then
+# computes the returns, the expected return, and the gross return based on
+# daily price information. 
+#
+# The stock class supports operations to calculate the value-at-risk, and
+# utility functions to graph the daily prices. Daily prices are held in a
+# columnar price history (see prices.py); the legacy dictionary of dates is
+# still available through the "profile" attribute, which is constructed on
+# first access.
+#
+# The following is an example usage of the stock class to download
+# historical stock information from Google over a specified period:
+#       date_range = {"start" : "2012-01-03", "end" : "2013-01-08"}
+#       ticker = "GOOG"
+#       stock = Stock(ticker,date_range)
+#       stock.display_price()
+#       print stock
+# A DownloadError is raised when the price history cannot be obtained, as for
+# an invalid ticker symbol or without a connection to the internet.
+#
+# Many stocks may be downloaded at once, in which case the downloads are made
+# concurrently over persistent connections:
+#       stocks, failures = Stock.load_many(["GOOG","MSFT","IBM"],date_range)
+#
+# New trading days may be appended to a stock as they arrive, in which case the
+# statistics are brought up to date in O(1) time per day, and every subscriber
+# (such as a portfolio holding the stock) is notified of the new days:
+#       stock.subscribe(lambda stock,start: ...)
+#       stock.append({"Date" : "2013-01-09","Open" : 10.0,"High" : 10.6,"Low" : 9.9,
+#                     "Close" : 10.5,"Volume" : 120000,"Adj Close" : 10.5})
+
+import numpy as np
+import httplib
+import socket
+import threading
+import urlparse
+from urllib2 import HTTPError
+from urllib import urlencode
+from multiprocessing.pool import ThreadPool
+import datetime
+from .prices import PriceHistory, read_yahoo_csv, grow
+from .distributions import fit_t
+from .instrumentation import stage, instrumented, counted
+
+# The address from which historical price data is downloaded. Pointing this at
+# a local server which responds in the Yahoo Finance! CSV format allows the
+# stock class to be used without a connection to the internet.
+YAHOO_URL = "http://ichart.yahoo.com/table.csv"
+
+# Every thread keeps its own persistent connection to each host, so that a
+# sequence of downloads does not pay for a new connection each time.
+connections = threading.local()
+
+# The errors which mean that the price history of a ticker could not be
+# obtained: a failed connection or request (urllib2 raises subclasses of
+# IOError), a response which could not be parsed, or a ticker which is missing
+# from an offline price cache. Any other error is a bug, and is not caught.
+DOWNLOAD_ERRORS = (IOError,httplib.HTTPException,ValueError,KeyError)
+
+
+class DownloadError(Exception):
+    # Raised when the price histories of one or more stocks could not be
+    # obtained. The failures are a dictionary from the ticker symbol to the
+    # exception raised while downloading it.
+    def __init__(self,failures):
+        self.failures = failures
+        message = "; ".join("%s: %s" % (ticker,error) for ticker,error in sorted(failures.items()))
+        super(DownloadError,self).__init__("Failed to download " + message)
+
+
+class Stock(object):
+    # A price cache (see cache.py) shared by every stock object for which no
+    # cache is explicitly provided. By default no cache is used, and every
+    # stock object downloads its price history.
+    default_cache = None
+
+    def __init__(self,ticker,date_range = None,position = None,cache = None,prices = None):
+        self.ticker = ticker
+        self.cache = cache if cache is not None else Stock.default_cache
+        self.position = position if position is not None else None
+        self.date_range = date_range if date_range is not None else default_date_range()
+        self.subscribers = []
+
+        # A price history which has already been obtained (for instance by a
+        # bulk download) is used as it is, rather than downloaded again.
+        if prices is not None:
+            self.prices = prices
+            self.statistics = self.calculate_statistics()
+            return
+
+        try:
+            self.prices = load_prices(self.ticker,self.date_range,self.cache)
+            self.statistics = self.calculate_statistics()
+        except DOWNLOAD_ERRORS as error:
+            raise DownloadError({self.ticker : error})
+
+    @classmethod
+    def load_many(cls,assets,date_range = None,cache = None,max_workers = 8):
+        # Download the price histories of many stocks concurrently. Every asset
+        # is either a ticker symbol or a dictionary with a ticker and a date
+        # range, exactly as accepted by the portfolio class; stock objects are
+        # passed through unchanged. At most "max_workers" downloads are in
+        # flight at any one time.
+        #
+        # A list of stock objects is returned in the same order as the assets,
+        # together with a dictionary of the failures keyed by ticker symbol.
+        # The stock object of an asset which failed to download is None.
+        cache = cache if cache is not None else cls.default_cache
+        requests = [(asset["ticker"],asset["date_range"]) if type(asset) is dict else (asset,date_range)
+                    for asset in assets]
+
+        def load(request):
+            ticker,asset_date_range = request
+            if isinstance(ticker,cls):
+                return ticker, None
+            asset_date_range = asset_date_range if asset_date_range is not None else default_date_range()
+            try:
+                prices = load_prices(ticker,asset_date_range,cache)
+                return cls(ticker,asset_date_range,cache = cache,prices = prices), None
+            except DOWNLOAD_ERRORS as error:
+                return None, error
+
+        # A pool of threads is only started when more than one asset must be
+        # downloaded, since starting and joining the pool takes far longer than
+        # passing through stock objects which have already been constructed.
+        downloads = sum(1 for ticker,asset_date_range in requests if not isinstance(ticker,cls))
+        with stage("load_many",assets = len(requests),downloads = downloads):
+            if downloads <= 1:
+                results = [load(request) for request in requests]
+            else:
+                pool = ThreadPool(max(1,min(max_workers,downloads)))
+                try:
+                    results = pool.map(load,requests)
+                finally:
+                    pool.close()
+                    pool.join()
+
+        stocks = [stock for stock,error in results]
+        failures = dict((stock_ticker(request[0]),error) for request,(stock,error) in zip(requests,results) if error is not None)
+        return stocks, failures
+
+    @classmethod
+    def from_csv(cls,ticker,path,position = None):
+        # Construct a stock from a local file in the CSV format of Yahoo
+        # Finance! The date range of the stock is the range of the file.
+        with open(path,"rb") as csv_file, stage("parse",ticker = ticker) as record:
+            prices = read_yahoo_csv(counted(csv_file,record))
+            record.add(rows = len(prices))
+        date_range = {"start" : str(prices.dates[0]),"end" : str(prices.dates[-1])}
+        return cls(ticker,date_range,position = position,prices = prices)
+
+    @property
+    def profile(self):
+        # The dictionary of dates is a compatibility layer over the columnar
+        # price history. It is expensive to construct for long histories, so
+        # it is only built on first access and then retained.
+        if getattr(self,"_profile",None) is None:
+            self._profile = self.prices.to_profile()
+        return self._profile
+
+    def __str__(self):
+        print_string = "Ticker: " + self.ticker + "\n"
+        print_string += "Time series: From " + self.date_range["start"] + " to " + self.date_range["end"] + "\n\n"
+        print_string += "Current performance:\n"
+        print_string += "Date\t\tOpen\tHigh\tLow\tClose\tVolume\t\tAdjusted Close\n"
+
+        current_date = str(self.prices.dates[-1])
+        current_performance = self.prices.row(-1)
+     
+        print_string += "%s\t%.2f\t%.2f\t%.2f\t%.2f\t%7e\t%.2f\n\n" % (current_date, 
+                                                                       current_performance["Open"], 
+                                                                       current_performance["High"], 
+                                                                       current_performance["Low"], 
+                                                                       current_performance["Close"], 
+                                                                       current_performance["Volume"], 
+                                                                       current_performance["Adj Close"]
+                                                                       )
+        print_string += "Expected return: %.4f" % self.statistics["expected_return"]
+        return print_string
+
+    @instrumented("stock_statistics",lambda stock: {"ticker" : stock.ticker})
+    def calculate_statistics(self):
+        statistics = {}
+        closing_prices = self.asset_closing_prices(array = True)
+
+        # Occasionally, values of zero are obtained as an asset price. In all likelihood, this
+        # value is rubbish and cannot be trusted, as it implies that the asset has no value. 
+        # In these cases, we replace the reported asset price by the mean of all asset prices.
+        closing_prices[closing_prices == 0] = np.mean(closing_prices)
+
+        # Calculate the daily returns on the stock option. These calculation is
+        # defined by the formula:
+        #     R_t = (P_t / P_{t - 1}) - 1
+        # Refer to page five of Statistics and Data Analysis for Financial 
+        # Engineering. For the expected return, we simply take the mean value of
+        # the calculated daily returns.
+        statistics["returns"] = closing_prices[1:] / closing_prices[:-1] - 1
+        statistics["log_returns"] = np.log(statistics["returns"] + 1)
+
+        # Multiply the average daily return by the length of the time series in order to
+        # obtain the expected return over the entire period.
+        statistics["expected_daily_return"] = np.mean(statistics["returns"])
+        statistics["expected_return"] = statistics["expected_daily_return"] * len(statistics["returns"])
+
+        # The running totals from which the statistics are brought up to date
+        # as new trading days are appended.
+        self.accumulators = {"close_sum" : np.sum(self.prices["Close"]),"last_close" : closing_prices[-1],
+                             "return_sum" : np.sum(statistics["returns"]),
+                             "returns" : statistics["returns"],"log_returns" : statistics["log_returns"]}
+        return statistics
+
+    def append(self,bar):
+        # A bar is a dictionary holding the date of a trading day ("Date") and
+        # a value for every field of the price history.
+        self.extend([bar])
+
+    def extend(self,bars):
+        # Append trading days to the price history of the stock, given either
+        # as a list of bars or as a price history. The statistics are updated
+        # from the new days alone, and then every subscriber is notified.
+        if not isinstance(bars,PriceHistory):
+            bars = list(bars)
+            bars = PriceHistory([bar["Date"] for bar in bars],
+                                dict((field,[bar[field] for bar in bars]) for field in self.prices.fields()))
+        if not len(bars):
+            return
+
+        start = len(self.prices)
+        self.prices.extend(bars.dates,bars.columns)
+        self.date_range = dict(self.date_range,end = str(self.prices.dates[-1]))
+        self._profile = None
+        self.update_statistics(start)
+
+        for callback in list(self.subscribers):
+            callback(self,start)
+
+    def update_statistics(self,start):
+        # Calculate the returns of the trading days from "start" onwards, and
+        # fold them into the running totals. As in calculate_statistics, zero
+        # prices are replaced by the mean of the closing prices, although here
+        # it is the mean of the prices up to the new days.
+        accumulators = self.accumulators
+        closing_prices = self.prices["Close"][start:].astype(np.float64)
+        accumulators["close_sum"] += np.sum(closing_prices)
+        closing_prices[closing_prices == 0] = accumulators["close_sum"] / len(self.prices)
+
+        previous = np.concatenate(([accumulators["last_close"]],closing_prices[:-1]))
+        returns = closing_prices / previous - 1
+        n = len(self.statistics["returns"])
+        m = n + len(returns)
+
+        accumulators["returns"] = grow(accumulators["returns"],n,returns)
+        accumulators["log_returns"] = grow(accumulators["log_returns"],n,np.log(returns + 1))
+        accumulators["return_sum"] += np.sum(returns)
+        accumulators["last_close"] = closing_prices[-1]
+
+        # The statistics are views onto the buffers of returns. Since these are
+        # new arrays, statistics memoized against the previous returns (such as
+        # the fitted t-distribution) are recognized as out of date.
+        self.statistics["returns"] = accumulators["returns"][:m]
+        self.statistics["log_returns"] = accumulators["log_returns"][:m]
+        self.statistics["expected_daily_return"] = accumulators["return_sum"] / m
+        self.statistics["expected_return"] = accumulators["return_sum"]
+
+    def subscribe(self,callback):
+        # The callback is called as callback(stock,start) whenever trading days
+        # are appended, where "start" is the index of the first new day.
+        self.subscribers.append(callback)
+
+    def unsubscribe(self,callback):
+        self.subscribers.remove(callback)
+
+    def calculate_parametric_risk(self,alpha,position = None):
+
+        if position is None and self.position is not None:
+            position = self.position
+        elif position is None and self.position is None:
+            print "Either specify a position for the stock object or provide one as an input parameter."
+            return np.nan
+
+        # Fit a t-distribution to the daily returns data using the 
+        # method of maximum likelihood estimation.
+        from scipy.special import stdtrit
+        tdof, tloc, tscale = self.fit_t_distribution()
+        quantile = tloc + tscale * stdtrit(tdof, alpha)
+
+        # Assuming that returns are i.i.d. with a t-distribution, it
+        # can be shown that value-at-risk is calculated as:
+        #      VaR_t(alpha) = -S * {mu + q_{alpha}(nu) * lambda}
+        # Is this formula, S refers to the size of the position. The 
+        # parameters mu, lambda, and scale are the estimated mean, 
+        # scale, and degrees of freedom of the sample returns. The
+        # parameter q_{alpha}(nu) is the alpha-quantile of a 
+        # t-distribution with nu degrees of freedom. Refer to page 
+        # 510 in Statistics and Data Analysis for Financial 
+        # Engineering. The quantile above already includes the
+        # location and the scale.
+        value_at_risk = -position * quantile
+        return value_at_risk
+
+    def fit_t_distribution(self):
+        # The fitted parameters of the t-distribution are retained together
+        # with the returns to which they were fitted. They remain valid for as
+        # long as the statistics of the stock hold that same array of returns,
+        # and are fitted again only once the returns have been recalculated.
+        # A new fit begins from the previous parameters, which are close to the
+        # solution when only a few returns have been appended.
+        returns = self.statistics["returns"]
+        fitted = getattr(self,"t_distribution",None)
+        if fitted is None or fitted[0] is not returns:
+            self.t_distribution = (returns,fit_t(returns,initial = fitted[1] if fitted is not None else None,
+                                                 ticker = self.ticker))
+        return self.t_distribution[1]
+
+    @classmethod
+    def fit_t_distributions(cls,stocks):
+        # Fit t-distributions to the returns of many stocks at once (see
+        # distributions.py), and retain the parameters on each stock so that
+        # subsequent calculations of the value-at-risk need not fit them again.
+        # Series of different lengths are aligned on their most recent return.
+        stocks = [stock for stock in stocks if getattr(stock,"t_distribution",(None,))[0] is not stock.statistics["returns"]]
+        if not stocks:
+            return
+        length = max(len(stock.statistics["returns"]) for stock in stocks)
+        returns = np.full((length,len(stocks)),np.nan)
+        for j,stock in enumerate(stocks):
+            returns[length - len(stock.statistics["returns"]):,j] = stock.statistics["returns"]
+
+        dof, loc, scale = fit_t(returns,ticker = ",".join(stock.ticker for stock in stocks))
+        for j,stock in enumerate(stocks):
+            stock.t_distribution = (stock.statistics["returns"],(dof[j],loc[j],scale[j]))
+
+    def asset_closing_prices(self,array = False):
+        # A copy of the closing prices is returned so that callers may modify
+        # the array without corrupting the price history of the stock.
+        closing_prices = self.prices["Close"].copy()
+        return closing_prices if array else closing_prices.tolist()
+
+    def display_price(self):
+        import matplotlib.pyplot as plt
+        import matplotlib.dates as mdates
+        plt.plot_date(mdates.date2num(self.prices.dates.astype(object)),
+                      self.asset_closing_prices(),
+                      fmt="k-o")
+        plt.title(self.ticker + " Closing Prices")
+        plt.ylabel("Daily Prices")
+        plt.xlabel("Historical Dates")
+        plt.grid(True)
+        plt.show()
+
+    def yahoo_download_daily(self,start_date = None,end_date = None):
+        start_date = start_date if start_date is not None else self.date_range["start"]
+        end_date = end_date if end_date is not None else self.date_range["end"]
+        return yahoo_download_daily(self.ticker,start_date,end_date)
+
+
+def stock_ticker(asset):
+    return asset.ticker if isinstance(asset,Stock) else asset
+
+
+def default_date_range():
+    # If there was no specified time interval, presume that the
+    # user intends to download historical price data from the 
+    # past year. Notice that the end of the time interval is 
+    # today, while the start is one year in the past.
+    end = datetime.datetime.now().strftime("%Y-%m-%d")
+    start = (datetime.datetime.now() - datetime.timedelta(days = 365)).strftime("%Y-%m-%d")
+    return {"start" : start, "end" : end}
+
+
+@instrumented("load_prices",lambda ticker: {"ticker" : ticker})
+def load_prices(ticker,date_range,cache = None):
+    # Obtain the price history of a ticker, from the price cache when one is
+    # provided and otherwise directly from Yahoo Finance!
+    if cache is not None:
+        return cache.get(ticker,date_range["start"],date_range["end"],yahoo_download_interval)
+    return yahoo_download_daily(ticker,date_range["start"],date_range["end"])
+
+
+def yahoo_download_interval(ticker,start_date,end_date):
+    # Download the price history over an interval of time other than the
+    # date range of the stock, as is required to fill the gaps in a price
+    # cache. Yahoo Finance! responds with an error when no trading took
+    # place during the interval (over a weekend, for instance), in which
+    # case the price history is simply empty.
+    try:
+        return yahoo_download_daily(ticker,start_date,end_date)
+    except HTTPError as error:
+        if error.code != 404:
+            raise
+        return PriceHistory([],{})
+
+
+def http_get(url,reader = None):
+    # Issue a GET request over the persistent connection that this thread
+    # holds to the host. A connection which the server has since closed is
+    # replaced by a new one, and the request is attempted a second time. The
+    # body of the response is passed to the reader, which must consume it in
+    # its entirety; by default the body is simply returned.
+    parts = urlparse.urlsplit(url)
+    path = parts.path + ("?" + parts.query if parts.query else "")
+    pool = connections.__dict__.setdefault("pool",{})
+
+    for attempt in range(2):
+        connection = pool.get(parts.netloc)
+        if connection is None:
+            connection_class = httplib.HTTPSConnection if parts.scheme == "https" else httplib.HTTPConnection
+            connection = pool[parts.netloc] = connection_class(parts.netloc)
+        try:
+            connection.request("GET",path)
+            response = connection.getresponse()
+            break
+        except (httplib.HTTPException,socket.error):
+            connection.close()
+            del pool[parts.netloc]
+            if attempt:
+                raise
+
+    if response.status != 200:
+        response.read()
+        raise HTTPError(url,response.status,response.reason,response.msg,None)
+
+    # A response which was not read to the end would corrupt the next request
+    # made over the connection, so the connection is discarded if the reader
+    # fails part of the way through.
+    try:
+        return reader(response) if reader is not None else response.read()
+    except:
+        connection.close()
+        del pool[parts.netloc]
+        raise
+
+
+def yahoo_download_daily(ticker,start_date,end_date):
+    # Stocks are defined over a range of time, with a beginning and an end 
+    # date. We use these dates to query yahoo Finance! for the relevant 
+    # historical price data.
+
+    # Encode the query parameters to be used in the GET request to yahoo 
+    # Finance!
+    yahoo = {}
+    yahoo["parameters"] = urlencode({
+            "s": ticker,
+            "a": int(start_date[5:7]) - 1,
+            "b": int(start_date[8:10]),
+            "c": int(start_date[0:4]),
+            "d": int(end_date[5:7]) - 1,
+            "e": int(end_date[8:10]),
+            "f": int(end_date[0:4]),
+            "g": "d",
+            "ignore": ".csv",
+            })
+    yahoo["url"] = YAHOO_URL + "?%s" % yahoo["parameters"]
+
+    # The response is parsed as it arrives, directly into the columnar price
+    # history (see read_yahoo_csv in prices.py), rather than being read into a
+    # single string and split into lists of strings. Since the response is
+    # parsed as it arrives, the time of the download includes that of parsing.
+    with stage("download",ticker = ticker) as record:
+        prices = http_get(yahoo["url"],lambda response: read_yahoo_csv(counted(response,record)))
+        record.add(rows = len(prices))
+    return prices
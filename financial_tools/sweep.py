@@ -0,0 +1,174 @@
+# sweep.py: Parallel parameter sweeps of trading strategies, with walk-forward
+#       validation of the parameters chosen.
+#
+# A strategy (see backtesting.py) with keyword parameters, such as the buy and
+# sell levels of the threshold strategy, is backtested for every combination of
+# a grid of parameter values and on every asset at once. The combinations are
+# divided into chunks which are spread across a pool of processes. The prices
+# are placed once in shared memory, which every worker maps as a numpy array
+# when it starts, so that no prices (and no Portfolio or Stock objects) are sent
+# with the tasks; a task is simply a chunk of combinations and a range of days.
+# Results are collected as the workers finish them, and are ranked on arrival,
+# so that only the best rows are kept when the grid is large.
+#
+# Since the best parameters over a history are chosen with the benefit of
+# hindsight, the sweep may instead be walked forward: the parameters are chosen
+# on a window of in-sample days and then tested on the out-of-sample days which
+# follow it, after which both windows move forward.
+#
+# The following is an example of how to sweep the levels of the threshold
+# strategy, and to validate them out of sample:
+#       sweep = ParameterSweep(portfolio,threshold_strategy,
+#                              {"buy" : np.arange(8,10,.1),"sell" : np.arange(10,12,.1)},
+#                              transaction_cost = .001,processes = 4)
+#       for row in sweep.run(metric = "sharpe_ratio",top = 10):
+#           print row["ticker"], row["parameters"], row["sharpe_ratio"]
+#       splits = sweep.walk_forward(in_sample = 504,out_of_sample = 126)
+
+import heapq
+import itertools
+import numpy as np
+from multiprocessing import Pool
+from multiprocessing.sharedctypes import RawArray
+from .backtesting import run_backtest, column_statistics
+from .panel import ReturnsPanel
+
+METRICS = ("total_return","annualized_return","annualized_volatility","sharpe_ratio","max_drawdown")
+
+# The prices mapped from shared memory by each worker process.
+shared_prices = None
+
+
+class ParameterSweep(object):
+    def __init__(self,assets,strategy,grid,transaction_cost = 0.0,processes = None,chunk_size = 64):
+        # The assets are a portfolio, whose aligned prices are used, or a list
+        # of stock objects, whose prices are aligned on the days on which all of
+        # them traded. The grid maps the name of each parameter of the strategy
+        # to the values which it takes.
+        panel = assets.panel if hasattr(assets,"panel") else ReturnsPanel(assets,missing = "drop")
+        self.tickers = panel.tickers
+        self.dates = panel.dates
+        self.strategy = strategy
+        self.names = sorted(grid.keys())
+        self.combinations = list(itertools.product(*[list(grid[name]) for name in self.names]))
+        self.transaction_cost = transaction_cost
+        self.processes = processes
+        self.chunk_size = chunk_size
+        self.pool = None
+
+        prices = np.ascontiguousarray(panel.prices,dtype = np.float64)
+        self.shape = prices.shape
+        self.prices = RawArray("d",prices.size)
+        np.frombuffer(self.prices,dtype = np.float64)[:] = prices.ravel()
+
+    def tasks(self,start,end):
+        for i in range(0,len(self.combinations),self.chunk_size):
+            yield (self.strategy,self.names,self.combinations[i:i + self.chunk_size],start,end,self.transaction_cost)
+
+    def start_pool(self):
+        return Pool(self.processes,initializer = initialize_worker,initargs = (self.prices,self.shape))
+
+    def evaluate(self,start,end):
+        # Generate the statistics of every chunk of combinations over the days
+        # from start to end, in the order in which the chunks are completed.
+        # The pool of a walk forward is shared by all of its splits.
+        if self.pool is not None:
+            for results in self.pool.imap_unordered(evaluate_combinations,self.tasks(start,end)):
+                yield results
+        elif self.processes is not None and self.processes > 1:
+            pool = self.start_pool()
+            try:
+                for results in pool.imap_unordered(evaluate_combinations,self.tasks(start,end)):
+                    yield results
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            initialize_worker(self.prices,self.shape)
+            for task in self.tasks(start,end):
+                yield evaluate_combinations(task)
+
+    def run(self,metric = "sharpe_ratio",top = None,minimize = False,start = 0,end = None):
+        # Rank every combination of parameters on every asset by the metric,
+        # over the days from start to end. Only the best "top" rows are kept
+        # (all of them by default), and are returned best first.
+        # Rows which tie on the metric are ranked by the order of the grid and of
+        # the assets, rather than by the order in which the chunks arrive, so
+        # that the ranking does not depend on the number of processes.
+        end = self.shape[0] if end is None else end
+        sign = -1 if minimize else 1
+        order = dict((values,i) for i,values in enumerate(self.combinations))
+        heap = []
+        for results in self.evaluate(start,end):
+            for values,statistics in results:
+                for j,ticker in enumerate(self.tickers):
+                    row = {"ticker" : ticker,"parameters" : dict(zip(self.names,values))}
+                    for name in METRICS:
+                        row[name] = statistics[name][j]
+                    key = (sign * row[metric],-order[values],-j,row)
+                    if top is None or len(heap) < top:
+                        heapq.heappush(heap,key)
+                    else:
+                        heapq.heappushpop(heap,key)
+        return [key[3] for key in sorted(heap,reverse = True)]
+
+    def walk_forward(self,in_sample = 504,out_of_sample = 126,metric = "sharpe_ratio",minimize = False):
+        # Choose the best parameters for every asset on each in-sample window,
+        # and test them on the out-of-sample window which follows. Strategies
+        # see the prices from the first day onwards, so that they may use the
+        # history before each window, and every window begins with no position.
+        # A single pool of processes, which maps the prices once, ranks the
+        # parameters of every split.
+        if self.processes is not None and self.processes > 1:
+            self.pool = self.start_pool()
+        try:
+            return self.walk_forward_splits(in_sample,out_of_sample,metric,minimize)
+        finally:
+            if self.pool is not None:
+                self.pool.close()
+                self.pool.join()
+                self.pool = None
+
+    def walk_forward_splits(self,in_sample,out_of_sample,metric,minimize):
+        n_days = self.shape[0]
+        initialize_worker(self.prices,self.shape)
+        splits = []
+        for start in range(0,n_days - in_sample - 1,out_of_sample):
+            middle = start + in_sample
+            end = min(middle + out_of_sample,n_days)
+            ranked = self.run(metric = metric,minimize = minimize,start = start,end = middle)
+            best = {}
+            for row in ranked:
+                best.setdefault(row["ticker"],row)
+
+            split = {"in_sample" : (self.dates[start],self.dates[middle - 1]),
+                     "out_of_sample" : (self.dates[middle],self.dates[end - 1]),"assets" : {}}
+            for j,ticker in enumerate(self.tickers):
+                values = tuple(best[ticker]["parameters"][name] for name in self.names)
+                statistics = evaluate_combinations((self.strategy,self.names,[values],middle,end,
+                                                    self.transaction_cost))[0][1]
+                split["assets"][ticker] = {"parameters" : best[ticker]["parameters"],
+                                           "in_sample" : dict((name,best[ticker][name]) for name in METRICS),
+                                           "out_of_sample" : dict((name,statistics[name][j]) for name in METRICS)}
+            splits.append(split)
+        return splits
+
+
+def initialize_worker(prices,shape):
+    # Map the shared prices as a numpy array, without copying them.
+    global shared_prices
+    shared_prices = np.frombuffer(prices,dtype = np.float64).reshape(shape)
+
+
+def evaluate_combinations(arguments):
+    # Backtest a chunk of combinations of parameters on every asset, over the
+    # days from start to end, and return the statistics of each asset for each
+    # combination.
+    strategy, names, combinations, start, end, transaction_cost = arguments
+    prices = shared_prices[:end]
+    results = []
+    for values in combinations:
+        targets = np.asarray(strategy(prices,**dict(zip(names,values))),dtype = np.float64)[start:]
+        backtest = run_backtest(prices[start:],targets,transaction_cost = transaction_cost)
+        results.append((values,column_statistics(backtest["asset_returns"])))
+    return results
@@ -0,0 +1,111 @@
+# synthetic.py: Deterministic synthetic market data, for benchmarking and
+#       testing the tools without a connection to Yahoo Finance!
+#
+# Prices follow a geometric Brownian motion with jumps: the daily log return of
+# each asset is normal, with the drift and volatility given in annual terms,
+# and on a random proportion of the days a normally distributed jump is added
+# to it. The normal parts of the returns of many assets are correlated, either
+# by a single correlation shared by every pair of assets or by a correlation
+# matrix. Autoregressive series are generated as in the example of arima.py.
+#
+# Every generator takes a seed, and produces the same data for the same seed
+# and arguments. Trading days are the weekdays from the start date onwards.
+#
+# The following is an example of how to construct a portfolio of synthetic
+# stocks, and to write the prices of one of them in the CSV format of Yahoo
+# Finance!:
+#       stocks = synthetic_stocks(["S%d" % i for i in range(20)],n_days = 2520,correlation = .3,seed = 0)
+#       risk_free = synthetic_stock("RF",n_days = 2520,drift = .02,volatility = 0.0,jump_intensity = 0.0)
+#       portfolio = Portfolio(stocks,risk_free = risk_free)
+#       open("S0.csv","wb").write(yahoo_csv(stocks[0].prices))
+
+import numpy as np
+from .prices import PriceHistory
+from .stock import Stock
+
+TRADING_DAYS = 252
+
+
+def trading_days(n_days,start = "2000-01-03"):
+    # The first n_days weekdays on or after the start date.
+    start = np.datetime64(start,"D")
+    days = start + np.arange(int(n_days * 7 // 5) + 7)
+    weekdays = (days.astype(np.int64) - 4) % 7 < 5
+    return days[weekdays][:n_days]
+
+
+def jump_diffusion(n_days,n_assets = 1,drift = .05,volatility = .2,correlation = 0.0,jump_intensity = .01,
+                   jump_mean = 0.0,jump_deviation = .05,initial = 100.0,seed = None):
+    # A matrix of prices with one row for each day and one column for each
+    # asset. The jump intensity is the probability of a jump on any one day.
+    # The correlation is either a number shared by every pair of assets or a
+    # correlation matrix.
+    generator = np.random.RandomState(seed)
+    dt = 1.0 / TRADING_DAYS
+    if np.ndim(correlation) == 0:
+        correlation = np.full((n_assets,n_assets),float(correlation))
+        np.fill_diagonal(correlation,1.0)
+    factor = np.linalg.cholesky(correlation)
+
+    shocks = np.dot(generator.standard_normal((n_days - 1,n_assets)),factor.T)
+    log_returns = (drift - volatility ** 2 / 2.0) * dt + volatility * np.sqrt(dt) * shocks
+    jumps = generator.random_sample((n_days - 1,n_assets)) < jump_intensity
+    log_returns += jumps * generator.normal(jump_mean,jump_deviation,(n_days - 1,n_assets))
+
+    log_prices = np.zeros((n_days,n_assets))
+    log_prices[1:] = np.cumsum(log_returns,axis = 0)
+    return initial * np.exp(log_prices)
+
+
+def autoregressive(n,phi = (.5,),mu = 0.0,deviation = 1.0,n_series = None,seed = None):
+    # An autoregressive process x_t = mu + sum_i phi_i (x_{t-i} - mu) + e_t,
+    # started from its mean. Given a number of series, a matrix with one column
+    # for each series is returned.
+    generator = np.random.RandomState(seed)
+    phi = np.asarray(phi,dtype = np.float64)
+    shape = (n,) if n_series is None else (n,n_series)
+    innovations = deviation * generator.standard_normal(shape)
+    series = np.zeros(shape)
+    for t in range(len(phi),n):
+        series[t] = np.dot(phi,series[t - len(phi):t][::-1]) + innovations[t]
+    return series + mu
+
+
+def price_history(dates,closing_prices,seed = None):
+    # A price history around the closing prices, whose opening prices are the
+    # previous close and whose highs and lows bracket the open and close.
+    generator = np.random.RandomState(seed)
+    closing_prices = np.asarray(closing_prices,dtype = np.float64)
+    opening_prices = np.concatenate((closing_prices[:1],closing_prices[:-1]))
+    spread = 1 + .01 * np.abs(generator.standard_normal((2,len(closing_prices))))
+    columns = {"Open" : opening_prices,"Close" : closing_prices,
+               "High" : np.maximum(opening_prices,closing_prices) * spread[0],
+               "Low" : np.minimum(opening_prices,closing_prices) / spread[1],
+               "Volume" : generator.randint(10 ** 5,10 ** 7,len(closing_prices)),
+               "Adj Close" : closing_prices}
+    return PriceHistory(dates,columns)
+
+
+def synthetic_stock(ticker,n_days = TRADING_DAYS,start = "2000-01-03",seed = None,**parameters):
+    # A stock whose prices follow the jump diffusion with the given parameters.
+    return synthetic_stocks([ticker],n_days,start,seed,**parameters)[0]
+
+
+def synthetic_stocks(tickers,n_days = TRADING_DAYS,start = "2000-01-03",seed = None,**parameters):
+    # Stocks whose prices follow a single correlated jump diffusion, on the
+    # same trading days.
+    dates = trading_days(n_days,start)
+    prices = jump_diffusion(n_days,len(tickers),seed = seed,**parameters)
+    date_range = {"start" : str(dates[0]),"end" : str(dates[-1])}
+    return [Stock(ticker,date_range,prices = price_history(dates,prices[:,j],seed = None if seed is None else seed + j + 1))
+            for j,ticker in enumerate(tickers)]
+
+
+def yahoo_csv(history):
+    # The price history in the CSV format of Yahoo Finance!, with the most
+    # recent day first, as downloaded.
+    lines = ["Date,Open,High,Low,Close,Volume,Adj Close"]
+    columns = [history[field] for field in ("Open","High","Low","Close","Volume","Adj Close")]
+    for i in range(len(history) - 1,-1,-1):
+        lines.append("%s,%.4f,%.4f,%.4f,%.4f,%d,%.4f" % ((history.dates[i],) + tuple(column[i] for column in columns)))
+    return ("\n".join(lines) + "\n").encode("ascii")
@@ -0,0 +1,68 @@
+# test_arima.py: The fits of autoregressive processes, to a single series and
+#       to a panel of series (see arima.py).
+
+import unittest
+import numpy as np
+from financial_tools.arima import AR, autocovariance, lag_matrix, levinson_durbin, fit_ar_panel
+from financial_tools.synthetic import autoregressive
+
+
+class TestAR(unittest.TestCase):
+    def setUp(self):
+        self.series = autoregressive(5000,phi = (.5,-.2),mu = 1.0,seed = 0)
+
+    def test_recovers_process(self):
+        model = AR(self.series)
+        self.assertEqual(model.p,2)
+        np.testing.assert_allclose(model.regression["phi"],[.5,-.2],atol = .03)
+        self.assertAlmostEqual(model.regression["mu"],1.0,places = 1)
+        self.assertAlmostEqual(model.regression["sigma2"],1.0,places = 1)
+        self.assertGreater(model.calculate_ljung_box_statistic()["p_value"],.01)
+
+    def test_least_squares(self):
+        model = AR(self.series,p = 3)
+        design = np.column_stack((np.ones(4997),self.series[2:-1],self.series[1:-2],self.series[:-3]))
+        coefficients = np.linalg.lstsq(design,self.series[3:],rcond = None)[0]
+        np.testing.assert_allclose(model.regression["phi"],coefficients[1:])
+
+    def test_autocovariance(self):
+        centered = self.series - np.mean(self.series)
+        expected = [np.dot(centered[k:],centered[:len(centered) - k]) / len(centered) for k in range(6)]
+        np.testing.assert_allclose(autocovariance(self.series,5),expected)
+        np.testing.assert_array_equal(lag_matrix(np.arange(5.0),2),[[2,1,0],[3,2,1],[4,3,2]])
+
+    def test_levinson_durbin(self):
+        # The coefficients solve the Yule-Walker equations of each order.
+        gamma = autocovariance(self.series,4)
+        recursion = levinson_durbin(gamma,4)
+        for k in range(1,5):
+            toeplitz = gamma[np.abs(np.subtract.outer(np.arange(k),np.arange(k)))]
+            np.testing.assert_allclose(recursion["coefficients"][k],np.linalg.solve(toeplitz,gamma[1:k + 1]))
+            self.assertAlmostEqual(recursion["sigma2"][k],gamma[0] - np.dot(recursion["coefficients"][k],gamma[1:k + 1]))
+        self.assertAlmostEqual(recursion["pacf"][3],recursion["coefficients"][3][-1])
+
+
+class TestPanel(unittest.TestCase):
+    def setUp(self):
+        self.series = autoregressive(2000,phi = (.5,-.2),n_series = 6,seed = 1)
+
+    def test_panel_equals_single(self):
+        fit = fit_ar_panel(self.series,max_order = 5,chunk_size = 4)
+        for j in range(6):
+            model = AR(self.series[:,j],max_order = 5)
+            self.assertEqual(fit["order"][j],model.p)
+        np.testing.assert_allclose(fit["phi"][:,:2],np.tile([.5,-.2],(6,1)),atol = .06)
+
+        fit = fit_ar_panel(self.series,p = 2,method = "least_squares")
+        for j in range(6):
+            np.testing.assert_allclose(fit["phi"][j],AR(self.series[:,j],p = 2).regression["phi"])
+
+    def test_invalid(self):
+        series = self.series.copy()
+        series[0,0] = np.nan
+        self.assertRaises(ValueError,fit_ar_panel,series)
+        self.assertRaises(ValueError,fit_ar_panel,self.series,method = "burg")
+
+
+if __name__ == "__main__":
+    unittest.main()
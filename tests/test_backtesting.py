@@ -0,0 +1,67 @@
+# test_backtesting.py: The vectorized backtesting engine, checked against
+#       trades worked out by hand (see backtesting.py).
+
+import unittest
+import numpy as np
+from financial_tools.backtesting import Backtesting, run_backtest, forward_fill, bar_strategy, threshold_strategy
+from financial_tools.portfolio import Portfolio
+from financial_tools.synthetic import synthetic_stock, synthetic_stocks
+
+
+class TestRunBacktest(unittest.TestCase):
+    def test_trades(self):
+        # The position targeted on the first day is filled on the second, and
+        # earns the returns of the following days until the sale, targeted on
+        # the fourth day, is filled on the fifth.
+        prices = [10.0,10.0,11.0,12.1,11.0]
+        results = run_backtest(prices,[1,np.nan,np.nan,0,np.nan],transaction_cost = .01)
+        np.testing.assert_array_equal(results["positions"][:,0],[0,1,1,1,0])
+        np.testing.assert_array_equal(results["fills"][:,0],[0,1,0,0,-1])
+        np.testing.assert_allclose(results["returns"],[0,-.01,.1,.1,-1 / 11.0 - .01])
+        np.testing.assert_allclose(results["equity"][-1],.99 * 1.1 * 1.1 * (1 - 1 / 11.0 - .01))
+        self.assertEqual(results["trades"],2)
+        self.assertAlmostEqual(results["total_costs"],.02)
+        self.assertAlmostEqual(results["max_drawdown"],1 / 11.0 + .01)
+
+    def test_weights(self):
+        prices = np.column_stack(([10.0,10.0,11.0],[10.0,10.0,9.0]))
+        results = run_backtest(prices,np.ones((3,2)),weights = [.75,.25])
+        np.testing.assert_allclose(results["returns"],[0,0,.75 * .1 - .25 * .1])
+
+    def test_forward_fill(self):
+        targets = np.array([[np.nan,1],[1,np.nan],[np.nan,0],[0,np.nan]])
+        np.testing.assert_array_equal(forward_fill(targets),[[0,1],[1,1],[1,0],[0,0]])
+
+    def test_bar_strategy(self):
+        # A strategy of one day at a time makes the same targets as the
+        # vectorized strategy.
+        def threshold(index,prices,position):
+            if prices[index] < 9.5:
+                return 1.0
+            if prices[index] > 10.5:
+                return 0.0
+            return position
+        prices = synthetic_stock("S",500,initial = 10.0,seed = 0).prices["Close"]
+        np.testing.assert_array_equal(bar_strategy(threshold)(prices),forward_fill(threshold_strategy(prices)[:,None])[:,0])
+
+
+class TestBacktesting(unittest.TestCase):
+    def test_portfolio(self):
+        stocks = synthetic_stocks(["A","B"],500,initial = 10.0,seed = 0)
+        risk_free = synthetic_stock("RF",500,drift = .02,volatility = 0.0,jump_intensity = 0.0)
+        portfolio = Portfolio(stocks,risk_free = risk_free)
+        backtest = Backtesting(portfolio,threshold_strategy,transaction_cost = .001)
+        prices = portfolio.panel.prices
+        expected = run_backtest(prices,threshold_strategy(prices),transaction_cost = .001)
+        np.testing.assert_allclose(backtest.results["equity"],expected["equity"])
+        self.assertIn("Sharpe's ratio",str(backtest))
+
+        # One strategy for each asset trades each asset on its own prices.
+        strategies = [threshold_strategy,lambda prices: np.zeros(len(prices))]
+        backtest = Backtesting(portfolio,strategies)
+        self.assertFalse(np.any(backtest.results["positions"][:,1]))
+        np.testing.assert_array_equal(backtest.results["positions"][:,0],expected["positions"][:,0])
+
+
+if __name__ == "__main__":
+    unittest.main()
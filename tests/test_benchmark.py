@@ -0,0 +1,67 @@
+# test_benchmark.py: The measurement of the benchmark cases, and their
+#       comparison against a baseline (see benchmark.py).
+
+import unittest
+from financial_tools import benchmark
+
+
+def result(case = "kelly",scale = 5,seconds = 1.0,peak_memory = 100.0,memory_increase = 10.0):
+    return {"case" : case,"scale" : scale,"unit" : "assets","seconds" : seconds,"throughput" : scale / seconds,
+            "peak_memory" : peak_memory,"memory_increase" : memory_increase}
+
+
+class TestCompare(unittest.TestCase):
+    def setUp(self):
+        self.baseline = {"results" : [result(),result(scale = 20,memory_increase = 0.0)]}
+
+    def test_unchanged(self):
+        results = [result()]
+        self.assertEqual(benchmark.compare(results,self.baseline),[])
+        self.assertEqual(results[0]["time_ratio"],1.0)
+        self.assertEqual(results[0]["memory_ratio"],1.0)
+
+    def test_time_regression(self):
+        results = [result(seconds = 1.3),result(seconds = 1.2)]
+        self.assertEqual(benchmark.compare(results,self.baseline),results[:1])
+
+    def test_memory_increase_regression(self):
+        # The peak memory grows by only 5%, but the increase beyond the memory
+        # of the imported modules by 50%.
+        results = [result(peak_memory = 105.0,memory_increase = 15.0)]
+        self.assertEqual(benchmark.compare(results,self.baseline),results)
+        self.assertAlmostEqual(results[0]["memory_ratio"],1.5)
+
+    def test_memory_slack(self):
+        # Growth of less than a megabyte is within the resolution of the peak.
+        results = [result(scale = 20,memory_increase = .5),result(memory_increase = 10.9)]
+        self.assertEqual(benchmark.compare(results,{"results" : [result(scale = 20,memory_increase = 0.0),
+                                                                 result(memory_increase = 8.0)]},tolerance = .1),
+                         results[1:])
+        results = [result(scale = 20,memory_increase = 2.0)]
+        self.assertEqual(benchmark.compare(results,self.baseline),results)
+
+    def test_cases_missing_from_baseline_are_skipped(self):
+        results = [result(case = "european_call",seconds = 100.0)]
+        self.assertEqual(benchmark.compare(results,self.baseline),[])
+        self.assertNotIn("regression",results[0])
+
+
+class TestMeasure(unittest.TestCase):
+    def test_measure(self):
+        measured = benchmark.measure("black_scholes_chain",1000,repeats = 2,budget = .5,minimum = 0.0)
+        self.assertEqual(measured["case"],"black_scholes_chain")
+        self.assertEqual(measured["unit"],"contracts")
+        self.assertGreaterEqual(measured["repeats"],2)
+        self.assertGreater(measured["throughput"],0)
+        self.assertGreaterEqual(measured["memory_increase"],0)
+
+    def test_measure_in_subprocess(self):
+        measured = benchmark.measure_in_subprocess("european_call",1000,repeats = 1,budget = .1)
+        self.assertEqual((measured["case"],measured["scale"]),("european_call",1000))
+
+    def test_unknown_case(self):
+        self.assertRaises(ValueError,benchmark.find_case,"nothing")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+# test_cache.py: The price cache (see cache.py), filled from a local stand-in
+#       for Yahoo Finance! which serves synthetic price histories and records
+#       the intervals of time that are requested of it.
+
+import os
+import shutil
+import datetime
+import urlparse
+import unittest
+import tempfile
+import threading
+import SocketServer
+import BaseHTTPServer
+import numpy as np
+from financial_tools import stock as stock_module
+from financial_tools.cache import PriceCache, CacheMiss
+from financial_tools.prices import PriceHistory
+from financial_tools.stock import Stock, DownloadError, yahoo_download_interval
+from financial_tools.synthetic import synthetic_stock, yahoo_csv
+
+HISTORIES = dict((ticker,synthetic_stock(ticker,504,seed = seed).prices) for seed,ticker in enumerate(["A","B"]))
+
+
+class YahooHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    # Serve the days of a history within the requested interval, or respond
+    # with an error when there are none, as Yahoo Finance! does.
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        query = dict(urlparse.parse_qsl(urlparse.urlsplit(self.path).query))
+        start = "%s-%02d-%s" % (query["c"],int(query["a"]) + 1,query["b"].zfill(2))
+        end = "%s-%02d-%s" % (query["f"],int(query["d"]) + 1,query["e"].zfill(2))
+        self.server.requests.append((query["s"],start,end))
+        history = HISTORIES.get(query["s"])
+        history = history.slice(start,end) if history is not None else None
+        if history is None or not len(history):
+            self.send_response(404)
+            self.send_header("Content-Length","0")
+            self.end_headers()
+            return
+        body = yahoo_csv(history)
+        self.send_response(200)
+        self.send_header("Content-Length",str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self,*arguments):
+        pass
+
+
+class YahooServer(SocketServer.ThreadingMixIn,BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+class TestPriceCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = YahooServer(("127.0.0.1",0),YahooHandler)
+        cls.server.requests = []
+        thread = threading.Thread(target = cls.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        cls.url = stock_module.YAHOO_URL
+        stock_module.YAHOO_URL = "http://127.0.0.1:%d/table.csv" % cls.server.server_port
+
+    @classmethod
+    def tearDownClass(cls):
+        # The persistent connections to the server are closed, so that the
+        # threads which serve them finish.
+        for connection in stock_module.connections.__dict__.pop("pool",{}).values():
+            connection.close()
+        stock_module.YAHOO_URL = cls.url
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        del self.server.requests[:]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def get(self,cache,ticker,start,end):
+        return cache.get(ticker,start,end,yahoo_download_interval)
+
+    def test_miss_then_hit(self):
+        cache = PriceCache(self.directory)
+        prices = self.get(cache,"A","2000-02-01","2000-06-30")
+        self.assertEqual(self.server.requests,[("A","2000-02-01","2000-06-30")])
+        expected = HISTORIES["A"].slice("2000-02-01","2000-06-30")
+        np.testing.assert_array_equal(prices.dates,expected.dates)
+        np.testing.assert_allclose(prices["Adj Close"],expected["Adj Close"],atol = 1e-4)
+
+        prices = self.get(PriceCache(self.directory),"A","2000-03-01","2000-04-30")
+        self.assertEqual(len(self.server.requests),1)
+        np.testing.assert_array_equal(prices.dates,HISTORIES["A"].slice("2000-03-01","2000-04-30").dates)
+
+    def test_incremental_refresh(self):
+        cache = PriceCache(self.directory)
+        self.get(cache,"A","2000-02-01","2000-06-30")
+        prices = self.get(cache,"A","2000-01-03","2000-09-29")
+        self.assertEqual(self.server.requests[1:],[("A","2000-01-03","2000-01-31"),("A","2000-07-01","2000-09-29")])
+        np.testing.assert_array_equal(prices.dates,HISTORIES["A"].slice("2000-01-03","2000-09-29").dates)
+
+    def test_offline(self):
+        self.get(PriceCache(self.directory),"A","2000-02-01","2000-06-30")
+        offline = PriceCache(self.directory,offline = True)
+        prices = self.get(offline,"A","2000-01-03","2000-09-29")
+        np.testing.assert_array_equal(prices.dates,HISTORIES["A"].slice("2000-02-01","2000-06-30").dates)
+        self.assertRaises(CacheMiss,self.get,offline,"B","2000-01-03","2000-09-29")
+        self.assertEqual(len(self.server.requests),1)
+
+    def test_caches_sharing_a_directory_merge_their_indices(self):
+        first, second = PriceCache(self.directory), PriceCache(self.directory)
+        self.get(first,"A","2000-02-01","2000-06-30")
+        self.get(second,"B","2000-02-01","2000-06-30")
+        self.get(first,"A","2000-02-01","2000-03-31")
+        self.assertEqual(sorted(PriceCache(self.directory).index),["A","B"])
+
+    def test_present_day_is_refetched(self):
+        # Prices which are not yet reported for the present day are fetched
+        # again by a later request.
+        today = np.datetime64(datetime.date.today(),"D")
+        history = HISTORIES["A"]
+        requests, reported = [], [today - 1]
+        def fetch(ticker,start,end):
+            requests.append((start,end))
+            dates = history.dates[-5:] - history.dates[-1] + reported[-1]
+            return PriceHistory(dates,dict((field,history[field][-5:]) for field in history.fields())).slice(start,end)
+
+        cache = PriceCache(self.directory)
+        self.assertEqual(len(cache.get("A",today - 4,today,fetch)),4)
+        self.assertEqual(cache.covered("A"),[[today - 4,today - 1]])
+        reported.append(today)
+        self.assertEqual(len(cache.get("A",today - 4,today,fetch)),5)
+        self.assertEqual(requests,[(str(today - 4),str(today)),(str(today),str(today))])
+
+    def test_ticker_paths_are_distinct(self):
+        cache = PriceCache(self.directory)
+        self.assertNotEqual(cache.ticker_path("A^"),cache.ticker_path("A_5e"))
+        self.assertEqual(os.path.basename(cache.ticker_path("^IRX")),"_5eIRX")
+
+    def test_stock(self):
+        cache = PriceCache(self.directory)
+        date_range = {"start" : "2000-02-01","end" : "2000-06-30"}
+        stock = Stock("B",date_range,cache = cache)
+        cached = Stock("B",date_range,cache = cache)
+        self.assertEqual(len(self.server.requests),1)
+        self.assertAlmostEqual(stock.statistics["expected_return"],cached.statistics["expected_return"])
+
+    def test_invalid_ticker(self):
+        date_range = {"start" : "2000-02-01","end" : "2000-06-30"}
+        self.assertRaises(DownloadError,Stock,"INVALID",date_range)
+        stocks, failures = Stock.load_many(["A","INVALID"],date_range)
+        self.assertEqual(stocks[1],None)
+        self.assertEqual(failures.keys(),["INVALID"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+# test_capm.py: The regressions of the capital asset pricing model, of single
+#       assets, of many assets at once and over rolling windows (see capm.py).
+
+import unittest
+import numpy as np
+from financial_tools.capm import CAPM
+from financial_tools.stock import Stock
+from financial_tools.synthetic import synthetic_stock, trading_days, price_history
+
+
+class TestCAPM(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # The premiums of the assets are exactly linear in that of the market,
+        # with some noise, so that alpha and beta are known.
+        cls.market = synthetic_stock("M",1000,seed = 0)
+        cls.risk_free = synthetic_stock("RF",1000,drift = .02,volatility = 0.0,jump_intensity = 0.0)
+        close = lambda stock: stock.prices["Close"]
+        market_returns = np.diff(close(cls.market)) / close(cls.market)[:-1]
+        risk_free_returns = np.diff(close(cls.risk_free)) / close(cls.risk_free)[:-1]
+        generator = np.random.RandomState(1)
+        cls.stocks = []
+        for j,beta in enumerate((.5,1.5)):
+            returns = risk_free_returns + .0002 + beta * (market_returns - risk_free_returns) + .002 * generator.standard_normal(999)
+            prices = 50 * np.concatenate(([1],np.cumprod(1 + returns)))
+            cls.stocks.append(Stock("S%d" % j,prices = price_history(trading_days(1000),prices,seed = j)))
+        cls.model = CAPM(cls.risk_free,cls.market)
+
+    def test_asset_regression(self):
+        self.model.asset_regression(self.stocks[1])
+        self.assertAlmostEqual(self.model.beta["value"],1.5,places = 1)
+        self.assertAlmostEqual(self.model.alpha["value"],.0002,places = 3)
+        lower, upper = self.model.beta["confidence_interval"]
+        self.assertTrue(lower < 1.5 < upper)
+
+    def test_batch_equals_single(self):
+        results = self.model.batch_regression(self.stocks)
+        for stock in self.stocks:
+            self.model.asset_regression(stock)
+            self.assertAlmostEqual(results[stock.ticker]["beta"]["value"],self.model.beta["value"])
+            self.assertAlmostEqual(results[stock.ticker]["alpha"]["standard_error"],self.model.alpha["standard_error"])
+        self.assertAlmostEqual(results["S0"]["beta"]["value"],.5,places = 1)
+
+    def test_rolling_regression(self):
+        rolling = self.model.rolling_regression(self.stocks,window = 200)
+        self.assertEqual(rolling["beta"]["value"].shape,(800,2))
+        self.assertEqual(len(rolling["dates"]),800)
+
+        # Every window agrees with a regression over its own days.
+        premiums = self.model.asset_premiums(self.stocks)
+        for t in (0,1,450,799):
+            rows = slice(t,t + 200)
+            theta = np.linalg.lstsq(self.model.covariates[rows],premiums[rows],rcond = None)[0]
+            np.testing.assert_allclose(rolling["coefficients"][t],theta,rtol = 1e-8,atol = 1e-12)
+        self.assertRaises(ValueError,self.model.rolling_regression,self.stocks,window = 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+# test_cointegration.py: The Engle-Granger test of cointegration, for a pair of
+#       assets and for every pair of a universe (see cointegration.py).
+
+import unittest
+import numpy as np
+from financial_tools.cointegration import (CointegratedAssets, augmented_dickey_fuller, engle_granger_critical_value,
+                                           screen_price_pairs)
+from financial_tools.stock import Stock
+from financial_tools.synthetic import trading_days, price_history
+
+
+class TestCointegration(unittest.TestCase):
+    def setUp(self):
+        # The first two assets share a random walk, from which they deviate by
+        # a stationary spread; the third is an independent random walk.
+        generator = np.random.RandomState(0)
+        walk = 50 + np.cumsum(generator.standard_normal(1000))
+        self.prices = np.column_stack((2 * walk + 10 + generator.standard_normal(1000),walk,
+                                       50 + np.cumsum(generator.standard_normal(1000))))
+        self.prices -= min(np.min(self.prices) - 1,0)
+
+    def test_augmented_dickey_fuller(self):
+        generator = np.random.RandomState(1)
+        residuals = np.column_stack((generator.standard_normal(1000),np.cumsum(generator.standard_normal(1000))))
+        statistics = augmented_dickey_fuller(residuals,lags = 2)
+        critical_value = engle_granger_critical_value(1,1000)
+        self.assertLess(statistics[0],critical_value)
+        self.assertGreater(statistics[1],critical_value)
+        self.assertAlmostEqual(augmented_dickey_fuller(residuals[:,0],lags = 2),statistics[0])
+        self.assertRaises(ValueError,engle_granger_critical_value,2,1000,.2)
+
+    def test_pair(self):
+        dates = trading_days(1000)
+        stocks = [Stock("S%d" % j,prices = price_history(dates,self.prices[:,j],seed = j)) for j in range(3)]
+        cointegrated = CointegratedAssets(stocks[:2])
+        self.assertTrue(cointegrated.engle_granger["cointegrated"])
+        self.assertLess(cointegrated.engle_granger["step_two"]["statistic"],cointegrated.engle_granger["critical_value"])
+        self.assertIn("cointegration exists",str(cointegrated))
+        self.assertAlmostEqual(cointegrated.engle_granger["step_one"]["theta"][1],2,places = 1)
+        independent = CointegratedAssets([stocks[0],stocks[2]])
+        self.assertGreater(independent.engle_granger["step_two"]["statistic"],independent.engle_granger["critical_value"])
+        self.assertFalse(independent.engle_granger["cointegrated"])
+        self.assertIn("does not exist",str(independent))
+
+    def test_screen(self):
+        pairs = screen_price_pairs(self.prices,["A","B","C"],min_correlation = 0.0,chunk_size = 1)
+        self.assertEqual(len(pairs["pairs"]),3)
+        self.assertEqual(sorted(pairs["tickers"][0].tolist()),["A","B"])
+        self.assertEqual(pairs["cointegrated"].tolist(),[True,False,False])
+
+        # The statistic of a pair is that of the more negative of its two
+        # cointegrating regressions, whose coefficients are returned.
+        for (i,j),alpha,beta,statistic in zip(pairs["pairs"],pairs["alpha"],pairs["beta"],pairs["statistic"]):
+            self.assertAlmostEqual(statistic,augmented_dickey_fuller(self.prices[:,i] - alpha - beta * self.prices[:,j]))
+            reverse = np.polyfit(self.prices[:,i],self.prices[:,j],1)
+            self.assertLessEqual(statistic,augmented_dickey_fuller(self.prices[:,j] - np.polyval(reverse,self.prices[:,i])))
+
+        # The verdict does not depend on the order of the columns.
+        reordered = screen_price_pairs(self.prices[:,::-1],["C","B","A"],min_correlation = 0.0,processes = 2,chunk_size = 1)
+        for field in ("statistic","cointegrated"):
+            np.testing.assert_allclose(reordered[field],pairs[field])
+        self.assertEqual(reordered["tickers"].tolist(),pairs["tickers"].tolist())
+        self.assertEqual(len(screen_price_pairs(self.prices,min_correlation = 1.0)["pairs"]),0)
+
+
+if __name__ == "__main__":
+    unittest.main()
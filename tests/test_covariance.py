@@ -0,0 +1,98 @@
+# test_covariance.py: The incremental covariance estimators against their
+#       definitions (see covariance.py).
+
+import unittest
+import numpy as np
+from financial_tools.covariance import (CovarianceMatrix, SampleCovariance, LedoitWolf, ExponentialCovariance,
+                                        FactorModel, estimate_covariance)
+from financial_tools.portfolio import Portfolio
+from financial_tools.stock import Stock
+from financial_tools.synthetic import synthetic_stock, synthetic_stocks
+
+
+class TestCovariance(unittest.TestCase):
+    def setUp(self):
+        generator = np.random.RandomState(0)
+        factors = generator.standard_normal((300,2))
+        self.returns = .01 * (np.dot(factors,generator.standard_normal((2,6))) + generator.standard_normal((300,6)))
+
+    def test_sample(self):
+        estimator = SampleCovariance(self.returns[:200])
+        np.testing.assert_allclose(estimator.to_dense(),np.cov(self.returns[:200].T))
+        estimator.update(self.returns[200:]).remove(self.returns[:100])
+        np.testing.assert_allclose(estimator.to_dense(),np.cov(self.returns[100:].T),atol = 1e-14)
+        np.testing.assert_allclose(estimator.mean(),np.mean(self.returns[100:],axis = 0),atol = 1e-14)
+
+    def test_missing_days(self):
+        returns = self.returns.copy()
+        returns[5,2] = np.nan
+        np.testing.assert_allclose(SampleCovariance(returns).to_dense(),np.cov(np.delete(self.returns,5,axis = 0).T))
+
+    def test_ledoit_wolf(self):
+        # The shrinkage of sklearn.covariance.ledoit_wolf, written out directly.
+        x = self.returns[100:]
+        T, N = x.shape
+        y = x - np.mean(x,axis = 0)
+        S = np.dot(y.T,y) / T
+        mu = np.trace(S) / N
+        d = np.sum((S - mu * np.eye(N)) ** 2) / N
+        b = min(np.sum([np.sum((np.outer(row,row) - S) ** 2) for row in y]) / T ** 2 / N,d)
+        expected = (1 - b / d) * S + b / d * mu * np.eye(N)
+
+        estimator = LedoitWolf(self.returns[:200]).update(self.returns[200:]).remove(self.returns[:100])
+        np.testing.assert_allclose(estimator.to_dense(),expected,atol = 1e-14)
+        np.testing.assert_allclose(LedoitWolf(x).to_dense(),expected,atol = 1e-14)
+
+    def test_exponential(self):
+        estimator = ExponentialCovariance(self.returns[:200],decay = .97)
+        for row in self.returns[200:]:
+            estimator.update(row)
+        weights = .97 ** np.arange(299,-1,-1)
+        weights /= np.sum(weights)
+        mean = np.dot(weights,self.returns)
+        centered = self.returns - mean
+        np.testing.assert_allclose(estimator.to_dense(),np.dot(centered.T * weights,centered),atol = 1e-14)
+
+    def test_factor_model(self):
+        model = estimate_covariance(self.returns[:299],"factor",n_factors = 2).update(self.returns[299])
+        L, D = model.factored()
+        dense = model.to_dense()
+        np.testing.assert_allclose(dense,np.dot(L,L.T) + np.diag(D))
+        weights = np.random.RandomState(1).standard_normal((6,3))
+        np.testing.assert_allclose(model.dot(weights),np.dot(dense,weights))
+        np.testing.assert_allclose(model.quadratic(weights),np.diag(np.dot(weights.T,np.dot(dense,weights))))
+        np.testing.assert_allclose(model.diagonal(),np.diag(dense))
+
+        # The residual variances are those of the regressions on the factors.
+        factors = np.dot(self.returns,model.basis)
+        design = np.column_stack((np.ones(300),factors))
+        residuals = self.returns - np.dot(design,np.linalg.lstsq(design,self.returns,rcond = None)[0])
+        np.testing.assert_allclose(D,np.var(residuals,axis = 0,ddof = 1),rtol = 1e-10)
+
+    def test_fixed_matrix(self):
+        covariance = np.cov(self.returns.T)
+        fixed = CovarianceMatrix(covariance)
+        self.assertIs(fixed.fit(self.returns).update(self.returns[0]).remove(self.returns[0]),fixed)
+        np.testing.assert_array_equal(fixed.to_dense(),covariance)
+
+    def test_portfolio_refresh(self):
+        # Appending days to the stocks of a portfolio updates a sample
+        # estimator, and leaves a fixed matrix as it was given.
+        whole = synthetic_stocks(["A","B"],504,seed = 0)
+        risk_free = synthetic_stock("RF",504,drift = .02,volatility = 0.0,jump_intensity = 0.0)
+        for estimator in ("sample",CovarianceMatrix(np.eye(2))):
+            stocks = [Stock(stock.ticker,stock.date_range,prices = stock.prices.slice(None,stock.prices.dates[251]))
+                      for stock in whole]
+            portfolio = Portfolio(stocks,risk_free = risk_free,covariance_estimator = estimator)
+            for stock,complete in zip(stocks,whole):
+                stock.extend(complete.prices.slice(complete.prices.dates[252],None))
+            self.assertEqual(len(portfolio.statistics["asset_returns"]),503)
+            expected = np.eye(2) if estimator != "sample" else np.cov(portfolio.statistics["asset_returns"].T)
+            np.testing.assert_allclose(portfolio.statistics["covariance"],expected,atol = 1e-15)
+
+    def test_unknown_estimator(self):
+        self.assertRaises(ValueError,estimate_covariance,self.returns,"robust")
+
+
+if __name__ == "__main__":
+    unittest.main()
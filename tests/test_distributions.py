@@ -0,0 +1,47 @@
+# test_distributions.py: The fit of the t-distribution to many series at once
+#       (see distributions.py).
+
+import unittest
+import numpy as np
+from scipy import stats
+from financial_tools.distributions import fit_t
+
+
+class TestFitT(unittest.TestCase):
+    def setUp(self):
+        generator = np.random.RandomState(0)
+        self.returns = .001 + .01 * generator.standard_t(4,size = (5000,3))
+
+    def test_recovers_parameters(self):
+        dof, loc, scale = fit_t(self.returns)
+        np.testing.assert_allclose(dof,4,rtol = .2)
+        np.testing.assert_allclose(loc,.001,atol = 3e-4)
+        np.testing.assert_allclose(scale,.01,rtol = .05)
+
+    def test_maximum_likelihood(self):
+        # The fit is at least as likely as that of scipy.
+        dof, loc, scale = fit_t(self.returns[:,0])
+        expected = stats.t.fit(self.returns[:,0])
+        self.assertGreaterEqual(np.sum(stats.t.logpdf(self.returns[:,0],dof,loc,scale)) + 1e-6,
+                                np.sum(stats.t.logpdf(self.returns[:,0],*expected)))
+        np.testing.assert_allclose((dof,loc,scale),expected,rtol = 1e-3)
+
+    def test_batch_equals_single(self):
+        batch = fit_t(self.returns)
+        for i in range(3):
+            np.testing.assert_allclose([parameters[i] for parameters in batch],fit_t(self.returns[:,i]),rtol = 1e-6)
+
+    def test_missing_returns(self):
+        returns = self.returns.copy()
+        returns[:1000,1] = np.nan
+        dof, loc, scale = fit_t(returns)
+        np.testing.assert_allclose([dof[1],loc[1],scale[1]],fit_t(self.returns[1000:,1]),rtol = 1e-6)
+
+    def test_initial_estimates(self):
+        # Beginning from a previous fit converges to the same parameters.
+        fitted = fit_t(self.returns)
+        np.testing.assert_allclose(fit_t(self.returns,initial = (5.0,0.0,.02)),fitted,rtol = 1e-5)
+
+
+if __name__ == "__main__":
+    unittest.main()
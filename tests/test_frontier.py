@@ -0,0 +1,157 @@
+# test_frontier.py: The critical line algorithm (see frontier.py) is checked
+#       against a quadratic program solved by CVXOPT on random instances,
+#       including expected returns which are tied and covariance matrices
+#       which are singular.
+#
+# The tests are run from the root of the repository by:
+#       python -m unittest discover
+
+import unittest
+import numpy as np
+from financial_tools.frontier import CriticalLineAlgorithm
+
+try:
+    import cvxopt
+except ImportError:
+    cvxopt = None
+
+LAMBDAS = (0.0,.01,.1,1.0,10.0,100.0)
+
+
+def random_instance(seed,kind = "random",bounded = False):
+    generator = np.random.RandomState(seed)
+    n = generator.randint(2,12)
+    factor = generator.randn(n,max(1,n - 2) if kind == "singular" else n + 2)
+    covariance = np.dot(factor,factor.T) / n
+    if kind == "ties":
+        mean = np.round(generator.randn(n) * 2) / 20
+    else:
+        mean = generator.randn(n) * .1
+    lower, upper = np.zeros(n), np.ones(n)
+    if bounded:
+        lower = -generator.rand(n) * .3
+        upper = np.maximum(lower + .05,generator.rand(n) * .8)
+        upper += max(0.0,1.1 - np.sum(upper)) / n
+    return mean, covariance, lower, upper
+
+
+def quadratic_program(mean,covariance,lower,upper,l):
+    # minimize 1/2 * w'Sw - lambda * mu'w   subject to lower <= w <= upper, sum(w) = 1
+    from cvxopt import matrix, solvers
+    n = len(mean)
+    options = {"show_progress" : False,"abstol" : 1e-13,"reltol" : 1e-13,"feastol" : 1e-13}
+    G = matrix(np.vstack((-np.eye(n),np.eye(n))))
+    h = matrix(np.concatenate((-lower,upper)))
+    A, b = matrix(np.ones((1,n))), matrix(1.0)
+    solution = solvers.qp(matrix(covariance),matrix(-l * mean),G,h,A,b,options = options)
+    return np.array(solution["x"]).ravel()
+
+
+def frontier_at(cla,l):
+    # The efficient portfolio at a value of lambda, interpolated between the
+    # corner portfolios on either side of it.
+    lambdas = [np.inf if corner is None else corner for corner in cla.lambdas]
+    for k in range(len(lambdas) - 1):
+        if lambdas[k] >= l >= lambdas[k + 1]:
+            if not np.isfinite(lambdas[k]):
+                return cla.weights[k + 1]
+            spread = lambdas[k] - lambdas[k + 1]
+            t = (lambdas[k] - l) / spread if spread > 0 else 0.0
+            return cla.weights[k] + t * (cla.weights[k + 1] - cla.weights[k])
+    return cla.weights[0]
+
+
+@unittest.skipIf(cvxopt is None,"CVXOPT is not installed")
+class TestCriticalLineAlgorithm(unittest.TestCase):
+    def check(self,kind,bounded = False,seeds = range(60)):
+        for seed in seeds:
+            mean, covariance, lower, upper = random_instance(seed,kind,bounded)
+            cla = CriticalLineAlgorithm(mean,covariance,lower,upper)
+            for l in LAMBDAS:
+                weights = frontier_at(cla,l)
+                reference = quadratic_program(mean,covariance,lower,upper,l)
+                objective = lambda w: .5 * np.dot(w,np.dot(covariance,w)) - l * np.dot(mean,w)
+                message = "seed %d, lambda %g" % (seed,l)
+                self.assertAlmostEqual(np.sum(weights),1.0,places = 8,msg = message)
+                self.assertTrue(np.all(weights >= lower - 1e-8),message)
+                self.assertTrue(np.all(weights <= upper + 1e-8),message)
+                self.assertLessEqual(objective(weights),objective(reference) + 1e-7 * (1 + abs(objective(reference))),message)
+
+    def test_random(self):
+        self.check("random")
+
+    def test_tied_expected_returns(self):
+        self.check("ties")
+
+    def test_singular_covariance(self):
+        self.check("singular")
+
+    def test_bounds(self):
+        for kind in ("random","ties","singular"):
+            self.check(kind,bounded = True)
+
+    def test_final_corner_is_minimum_variance(self):
+        for seed in range(20):
+            mean, covariance, lower, upper = random_instance(seed,"ties")
+            cla = CriticalLineAlgorithm(mean,covariance,lower,upper)
+            reference = quadratic_program(mean,covariance,lower,upper,0.0)
+            variance = np.dot(cla.min_variance(),np.dot(covariance,cla.min_variance()))
+            self.assertLessEqual(variance,np.dot(reference,np.dot(covariance,reference)) + 1e-10)
+
+    def test_factored_covariance(self):
+        # The Woodbury identity is used where every free asset has specific
+        # variance, and the covariance of the free assets otherwise.
+        for seed in range(40):
+            generator = np.random.RandomState(seed)
+            n, k = generator.randint(2,30), generator.randint(1,4)
+            loadings, variances = generator.randn(n,k) * .1, generator.rand(n) * .01
+            if seed % 2:
+                variances[generator.rand(n) < .3] = 0.0
+            mean = generator.randn(n) * .1
+            dense = CriticalLineAlgorithm(mean,np.dot(loadings,loadings.T) + np.diag(variances))
+            factored = CriticalLineAlgorithm(mean,(loadings,variances))
+            # Where the covariance matrix is singular, the efficient portfolios
+            # need not be unique, but their returns and risks are.
+            expected, actual = dense.frontier(50), factored.frontier(50)
+            np.testing.assert_allclose(actual[0],expected[0],atol = 1e-8)
+            np.testing.assert_allclose(actual[1],expected[1],atol = 1e-8)
+            if np.all(variances > 0):
+                np.testing.assert_allclose(actual[2],expected[2],atol = 1e-8)
+
+    def test_portfolio_methods_agree(self):
+        # The critical line algorithm finds portfolios at least as good as the
+        # quadratic programming method at its own levels of risk aversion.
+        from financial_tools.portfolio import Portfolio
+        from financial_tools.synthetic import synthetic_stock, synthetic_stocks
+        stocks = synthetic_stocks(["S%d" % i for i in range(8)],504,correlation = .3,seed = 1)
+        risk_free = synthetic_stock("RF",504,drift = .02,volatility = 0.0,jump_intensity = 0.0)
+        portfolio = Portfolio(stocks,risk_free = risk_free)
+        critical_line = portfolio.optimize_portfolio()
+        reference = portfolio.optimize_portfolio(method = "quadratic_program")
+        self.assertLessEqual(np.min(critical_line["risk"]),np.min(reference["risk"]) + 1e-8)
+
+        covariance = portfolio.statistics["covariance_estimator"].to_dense()
+        mu_free = portfolio.statistics["expected_risk_free_return"]
+        mean = portfolio.statistics["expected_asset_returns"]
+        sharpe = lambda w: (np.dot(mean,w.ravel()) - mu_free) / np.sqrt(np.dot(w.ravel(),np.dot(covariance,w.ravel())))
+        self.assertGreaterEqual(sharpe(critical_line["max_sharpe_weights"]),sharpe(reference["max_sharpe_weights"]) - 1e-8)
+
+    def test_factor_model_portfolio_is_not_made_dense(self):
+        from financial_tools.covariance import FactorModel
+        from financial_tools.portfolio import Portfolio
+        from financial_tools.synthetic import synthetic_stock, synthetic_stocks
+
+        class FactoredOnly(FactorModel):
+            def to_dense(self):
+                raise AssertionError("The dense covariance matrix was formed.")
+
+        stocks = synthetic_stocks(["S%d" % i for i in range(12)],504,correlation = .3,seed = 2)
+        risk_free = synthetic_stock("RF",504,drift = .02,volatility = 0.0,jump_intensity = 0.0)
+        portfolio = Portfolio(stocks,risk_free = risk_free,covariance_estimator = FactoredOnly(n_factors = 2))
+        critical_line = portfolio.optimize_portfolio()
+        reference = portfolio.optimize_portfolio(method = "quadratic_program")
+        self.assertLessEqual(np.min(critical_line["risk"]),np.min(reference["risk"]) + 1e-8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+# test_instrumentation.py: The records of instrumented stages, and their
+#       attribution to tickers (see instrumentation.py).
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from financial_tools import instrumentation
+from financial_tools.capm import CAPM
+from financial_tools.stock import Stock
+from financial_tools.synthetic import synthetic_stock, synthetic_stocks
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        instrumentation.reset()
+        instrumentation.enable()
+
+    def tearDown(self):
+        instrumentation.disable()
+        instrumentation.reset()
+
+    def stages(self,name):
+        return [record for record in instrumentation.records() if record["stage"] == name]
+
+    def test_disabled(self):
+        instrumentation.disable()
+        with instrumentation.stage("nothing",ticker = "A") as record:
+            record.add(rows = 1)
+        self.assertIs(record,instrumentation.DISABLED_STAGE)
+        self.assertEqual(instrumentation.records(),[])
+
+    def test_counts_and_summary(self):
+        for rows in (3,4):
+            with instrumentation.stage("parse",ticker = "A") as record:
+                record.add(rows = rows)
+                record.add(rows = 1)
+        with instrumentation.stage("parse",ticker = "B",series = 7):
+            pass
+        summary = instrumentation.summary(by = ("stage","ticker"))
+        self.assertEqual(summary[("parse","A")]["calls"],2)
+        self.assertEqual(summary[("parse","A")]["rows"],9)
+        self.assertNotIn("series",summary[("parse","B")])
+        self.assertIn("parse A",instrumentation.format_summary(summary))
+
+    def test_errors_are_recorded(self):
+        def fail():
+            with instrumentation.stage("fail"):
+                raise ValueError()
+        self.assertRaises(ValueError,fail)
+        self.assertEqual(self.stages("fail")[0]["error"],"ValueError")
+
+    def test_fit_t_records_ticker(self):
+        stock = synthetic_stock("A",504,seed = 0)
+        stock.fit_t_distribution()
+        self.assertEqual([record["ticker"] for record in self.stages("fit_t")],["A"])
+
+        stocks = synthetic_stocks(["B","C"],504,seed = 0)
+        Stock.fit_t_distributions(stocks)
+        self.assertEqual(self.stages("fit_t")[-1]["ticker"],"B,C")
+
+    def test_capm_regression_records_ticker(self):
+        market, stock = synthetic_stocks(["M","S"],504,correlation = .6,seed = 0)
+        risk_free = synthetic_stock("RF",504,drift = .02,volatility = 0.0,jump_intensity = 0.0)
+        model = CAPM(risk_free,market)
+        model.asset_regression(stock)
+        self.assertEqual([record["ticker"] for record in self.stages("capm_regression")],["S"])
+
+    def test_chrome_trace(self):
+        with instrumentation.stage("outer",ticker = "A"):
+            with instrumentation.stage("inner"):
+                pass
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory,"trace.json")
+            instrumentation.write_chrome_trace(path)
+            with open(path) as source:
+                events = json.load(source)["traceEvents"]
+        finally:
+            shutil.rmtree(directory)
+        self.assertEqual(sorted(event["name"] for event in events),["inner","outer"])
+        self.assertEqual([event["args"] for event in events if event["name"] == "outer"],[{"ticker" : "A"}])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+# test_intraday.py: The parsing of files of intraday prices, and the daily
+#       statistics calculated from them (see intraday.py).
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from financial_tools.intraday import IntradayFile, parse_chunk
+
+
+def write_ticks(path,n_days = 4,seed = 0):
+    # Trades at random times between 09:30 and 16:00 of consecutive days, some
+    # of them with fractional seconds, followed on each day by three lines which
+    # cannot be read. The last price in every minute of every day is returned.
+    generator = np.random.RandomState(seed)
+    last = {}
+    with open(path,"wb") as destination:
+        destination.write(b"Date,Price\n")
+        for day in range(n_days):
+            seconds = np.sort(generator.randint(34200,57600,2000))
+            prices = 40 * np.exp(np.cumsum(generator.standard_normal(len(seconds)) * .001))
+            for i,(second,price) in enumerate(zip(seconds,prices)):
+                fraction = ".%03d" % generator.randint(1000) if i % 3 == 0 else ""
+                destination.write(("2014-02-%02d %02d:%02d:%02d%s,%.4f\n" % (
+                    day + 10,second // 3600,second // 60 % 60,second % 60,fraction,price)).encode("ascii"))
+                last[(20140210 + day,second // 60)] = float("%.4f" % price)
+            destination.write(b"2014-02-%02d 16:00:00,n/a\n2014-02-%02d 16:00:01,-1\n2014-02-%02d 16:0x:02,40\n" % (
+                day + 10,day + 10,day + 10))
+    return last
+
+
+class TestIntradayFile(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory,"ticks.csv")
+        self.last = write_ticks(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_parse_chunk(self):
+        text = (b"Date,Price\n2014-02-14 09:30:01,37.655\n2014-02-14 09:30:02.250,37.66\n"
+                b"2014-02-14 09:30:03.2x0,38\n2014-02-14 09:30:04,abc\n2014-02-14 09:30:05,-1\n"
+                b"2014-02-14 09:30:06.5,38.1\r\n\n2014-02-14 09:30:07,\n2014-02-14 09:30:08,39")
+        days, seconds, prices, rejected = parse_chunk(text)
+        np.testing.assert_array_equal(days,[20140214] * 4)
+        np.testing.assert_array_equal(seconds,[34201,34202,34206,34208])
+        np.testing.assert_array_equal(prices,[37.655,37.66,38.1,39.0])
+        self.assertEqual(rejected,4)
+
+    def test_resample(self):
+        days, intervals, prices, rejected = IntradayFile(self.path,interval = 60).resample()
+        self.assertEqual(rejected,12)
+        self.assertEqual(dict(((day,interval),price) for day,interval,price in zip(days,intervals,prices)),self.last)
+
+    def test_chunks_and_processes_agree(self):
+        whole = IntradayFile(self.path,interval = 60).daily_statistics()
+        chunked = IntradayFile(self.path,interval = 60,chunk_size = 1000).daily_statistics(processes = 3)
+        self.assertEqual(len(whole["dates"]),4)
+        self.assertEqual(whole["rejected"],chunked["rejected"])
+        np.testing.assert_array_equal(whole["dates"],chunked["dates"])
+        np.testing.assert_allclose(whole["statistic"],chunked["statistic"])
+
+    def test_statistics_of_a_day(self):
+        statistics = IntradayFile(self.path,interval = 60).daily_statistics()
+        minutes = sorted(minute for day,minute in self.last if day == 20140210)
+        grid = np.arange(minutes[0],minutes[-1] + 1)
+        prices = np.array([self.last[(20140210,minute)] for minute in minutes])
+        prices = prices[np.searchsorted(minutes,grid,side = "right") - 1]
+        log_returns = np.diff(np.log(prices))
+        self.assertEqual(statistics["n_returns"][0],len(log_returns))
+        self.assertAlmostEqual(statistics["realized_variance"][0],np.sum(log_returns ** 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+# test_jumps.py: The Barndorff-Nielsen statistic, as it is brought up to date
+#       with appended trading days and over rolling windows (see jumps.py).
+
+import unittest
+import numpy as np
+from financial_tools.jumps import BarndorffNielsen, rolling_barndorff_nielsen
+from financial_tools.stock import Stock
+from financial_tools.synthetic import synthetic_stock
+
+
+class TestBarndorffNielsen(unittest.TestCase):
+    def setUp(self):
+        self.whole = synthetic_stock("S",504,jump_intensity = .05,seed = 0)
+
+    def test_update_matches_recalculation(self):
+        prices = self.whole.prices
+        stock = Stock("S",self.whole.date_range,prices = prices.slice(None,prices.dates[299]))
+        with BarndorffNielsen(stock) as bn:
+            stock.extend(prices.slice(prices.dates[300],None))
+            expected = BarndorffNielsen(self.whole)
+            self.assertAlmostEqual(bn.statistic,expected.statistic,places = 10)
+            self.assertAlmostEqual(bn.tripower_quarticity,expected.tripower_quarticity,places = 14)
+            expected.close()
+
+    def test_close_unsubscribes(self):
+        bn = BarndorffNielsen(self.whole)
+        self.assertEqual(len(self.whole.subscribers),1)
+        bn.close()
+        bn.close()
+        self.assertEqual(self.whole.subscribers,[])
+        with BarndorffNielsen(self.whole):
+            self.assertEqual(len(self.whole.subscribers),1)
+        self.assertEqual(self.whole.subscribers,[])
+
+    def test_rolling_matches_single_window(self):
+        log_returns = self.whole.statistics["log_returns"]
+        rolling = rolling_barndorff_nielsen(np.column_stack((log_returns,log_returns[::-1])),63)
+        for start in (0,100,len(log_returns) - 63):
+            stock = Stock("S",self.whole.date_range,prices = self.whole.prices.slice(
+                self.whole.prices.dates[start],self.whole.prices.dates[start + 63]))
+            with BarndorffNielsen(stock) as bn:
+                self.assertAlmostEqual(rolling["statistic"][start,0],bn.statistic,places = 8)
+
+    def test_rolling_missing_returns(self):
+        log_returns = self.whole.statistics["log_returns"].copy()
+        log_returns[70] = np.nan
+        rolling = rolling_barndorff_nielsen(log_returns,21)
+        self.assertTrue(np.all(np.isnan(rolling["statistic"][50:71])))
+        self.assertTrue(np.all(np.isfinite(rolling["statistic"][71:])))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+# test_lattice.py: The prices of American options on binomial and trinomial
+#       lattices (see lattice.py).
+
+import unittest
+import numpy as np
+from financial_tools.lattice import price_american
+from financial_tools.option import black_scholes
+
+
+class TestLattice(unittest.TestCase):
+    def setUp(self):
+        self.strikes = np.linspace(40.0,70.0,7)
+
+    def test_call_without_dividends(self):
+        # Early exercise of a call on a stock without dividends is never optimal.
+        for method in ("binomial","trinomial"):
+            prices = price_american(55.0,self.strikes,.5,.03,.45,call = True,steps = 400,method = method)
+            np.testing.assert_allclose(prices,black_scholes(55.0,self.strikes,.5,.03,.45,call = True)["price"],atol = .03)
+
+    def test_put_early_exercise(self):
+        prices = price_american(55.0,self.strikes,.5,.03,.45,call = False,steps = 400)
+        european = black_scholes(55.0,self.strikes,.5,.03,.45,call = False)["price"]
+        self.assertTrue(np.all(prices > european - .02))
+        self.assertGreater(prices[-1] - european[-1],.1)
+        self.assertTrue(np.all(prices >= np.maximum(self.strikes - 55.0,0)))
+
+    def test_known_put(self):
+        # Hull, example 21.1: an American put with S = X = 50, r = .1,
+        # sigma = .4 and five months to expiry is worth 4.28 in the limit.
+        self.assertAlmostEqual(price_american(50.0,50.0,5 / 12.0,.1,.4,call = False,steps = 2000),4.28,places = 2)
+
+    def test_binomial_trinomial_agree(self):
+        binomial = price_american(55.0,self.strikes,.5,.03,.45,call = False,steps = 800)
+        trinomial = price_american(55.0,self.strikes,.5,.03,.45,call = False,steps = 800,method = "trinomial")
+        np.testing.assert_allclose(binomial,trinomial,atol = .02)
+
+    def test_broadcasting(self):
+        calls = np.array([[True],[False]])
+        prices = price_american(55.0,self.strikes,.5,.03,.45,call = calls,steps = 100)
+        self.assertEqual(prices.shape,(2,7))
+        np.testing.assert_array_equal(prices[1],price_american(55.0,self.strikes,.5,.03,.45,call = False,steps = 100))
+        self.assertRaises(ValueError,price_american,55.0,50.0,.5,.03,.45,method = "quadrinomial")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+# test_monte_carlo.py: The Monte Carlo prices of path-dependent options (see
+#       monte_carlo.py).
+
+import unittest
+import numpy as np
+from financial_tools.monte_carlo import simulate
+from financial_tools.option import black_scholes
+
+
+class TestSimulate(unittest.TestCase):
+    def test_reproducible(self):
+        arguments = (55.0,50.0,.5,.03,.45,("asian",True))
+        first = simulate(*arguments,paths = 20000,steps = 50,chunk_size = 3000,seed = 0)
+        self.assertEqual(first,simulate(*arguments,paths = 20000,steps = 50,chunk_size = 3000,seed = 0))
+        self.assertNotEqual(first,simulate(*arguments,paths = 20000,steps = 50,chunk_size = 3000,seed = 1))
+        self.assertEqual(first,simulate(*arguments,paths = 20000,steps = 50,chunk_size = 3000,seed = 0,processes = 2))
+
+    def test_european_limit(self):
+        # An up-and-out call whose barrier is never reached is a European call.
+        price, error = simulate(55.0,50.0,.5,.03,.45,("barrier",True,1e9,"up-and-out"),paths = 100000,steps = 1,seed = 0)
+        self.assertLess(abs(price - black_scholes(55.0,50.0,.5,.03,.45,call = True)["price"]),4 * error)
+
+    def test_asian_below_european(self):
+        # Averaging lowers the volatility of the underlying of the option.
+        price, error = simulate(55.0,50.0,.5,.03,.45,("asian",True),paths = 50000,steps = 50,seed = 0)
+        self.assertLess(price + 4 * error,black_scholes(55.0,50.0,.5,.03,.45,call = True)["price"])
+
+    def test_barrier_parity(self):
+        # With the same paths, an out and an in option make a vanilla option.
+        arguments = dict(paths = 20000,steps = 50,seed = 0)
+        out = simulate(55.0,50.0,.5,.03,.45,("barrier",False,45.0,"down-and-out"),**arguments)[0]
+        knocked_in = simulate(55.0,50.0,.5,.03,.45,("barrier",False,45.0,"down-and-in"),**arguments)[0]
+        vanilla = simulate(55.0,50.0,.5,.03,.45,("barrier",False,0.0,"down-and-out"),**arguments)[0]
+        self.assertAlmostEqual(out + knocked_in,vanilla,places = 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
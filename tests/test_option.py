@@ -0,0 +1,46 @@
+# test_option.py: The pricing of options by the formula of Black and Scholes,
+#       and the recovery of implied volatilities from prices (see option.py).
+
+import unittest
+import numpy as np
+from financial_tools.option import EuropeanCall, EuropeanPut, black_scholes, implied_volatility
+
+
+class TestBlackScholes(unittest.TestCase):
+    def test_put_call_parity(self):
+        strikes = np.linspace(30.0,80.0,11)
+        call = black_scholes(55.0,strikes,.5,.03,.45,call = True)["price"]
+        put = black_scholes(55.0,strikes,.5,.03,.45,call = False)["price"]
+        np.testing.assert_allclose(call - put,55.0 - strikes * np.exp(-.03 * .5),atol = 1e-10)
+
+    def test_classes_agree_with_vectorized_prices(self):
+        self.assertAlmostEqual(EuropeanCall().evaluate_black_scholes(),black_scholes(55.0,50.0,.5,.03,.45)["price"])
+        self.assertAlmostEqual(EuropeanPut().evaluate_black_scholes(),
+                               black_scholes(55.0,50.0,.5,.03,.45,call = False)["price"])
+
+
+class TestImpliedVolatility(unittest.TestCase):
+    def test_scalar(self):
+        price = black_scholes(55.0,50.0,.5,.03,.45)["price"]
+        sigma = implied_volatility(price,55.0,50.0,.5,.03)
+        self.assertEqual(np.ndim(sigma),0)
+        self.assertAlmostEqual(sigma,.45,places = 6)
+
+    def test_shape_and_mixed_contracts(self):
+        strikes = np.array([[40.0,50.0],[60.0,70.0]])
+        call = np.array([[True,False],[True,False]])
+        deviation = np.array([[.2,.3],[.4,.5]])
+        prices = black_scholes(55.0,strikes,.5,.03,deviation,call)["price"]
+        sigma = implied_volatility(prices,55.0,strikes,.5,.03,call)
+        self.assertEqual(sigma.shape,(2,2))
+        np.testing.assert_allclose(sigma,deviation,atol = 1e-6)
+
+    def test_arbitrage_and_unconverged_contracts_are_nan(self):
+        self.assertTrue(np.isnan(implied_volatility(60.0,55.0,50.0,.5,.03)))
+        self.assertTrue(np.isnan(implied_volatility(1.0,55.0,50.0,.5,.03)))
+        price = black_scholes(55.0,50.0,.5,.03,.45)["price"]
+        self.assertTrue(np.isnan(implied_volatility(price,55.0,50.0,.5,.03,iterations = 2)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+# test_panel.py: The alignment of the prices of many assets on a shared
+#       calendar, under each policy for missing days (see panel.py).
+
+import unittest
+import numpy as np
+from financial_tools.panel import ReturnsPanel, nearest_positive_semidefinite
+from financial_tools.prices import PriceHistory
+from financial_tools.stock import Stock
+
+
+def stock(ticker,dates,closing_prices):
+    history = PriceHistory(np.array(dates,dtype = "datetime64[D]"),{"Close" : np.array(closing_prices,dtype = np.float64)})
+    return Stock(ticker,{"start" : dates[0],"end" : dates[-1]},prices = history)
+
+
+DATES = ["2014-02-10","2014-02-11","2014-02-12","2014-02-13","2014-02-14"]
+
+
+class TestReturnsPanel(unittest.TestCase):
+    def setUp(self):
+        self.a = stock("A",DATES,[10.0,11.0,12.0,11.0,12.0])
+        # B does not trade on the 11th and 12th.
+        self.b = stock("B",[DATES[0],DATES[3],DATES[4]],[20.0,22.0,21.0])
+
+    def test_drop(self):
+        panel = ReturnsPanel([self.a,self.b],missing = "drop")
+        np.testing.assert_array_equal(panel.dates,np.array([DATES[0],DATES[3],DATES[4]],dtype = "datetime64[D]"))
+        np.testing.assert_allclose(panel.returns,[[.1,.1],[12.0 / 11 - 1,21.0 / 22 - 1]])
+
+    def test_forward_fill(self):
+        panel = ReturnsPanel([self.a,self.b],missing = "forward_fill")
+        np.testing.assert_allclose(panel.column("B"),[0.0,0.0,.1,21.0 / 22 - 1])
+
+    def test_pairwise_compounds_across_gaps(self):
+        panel = ReturnsPanel([self.a,self.b],missing = "pairwise")
+        self.assertEqual(len(panel),4)
+        np.testing.assert_allclose(panel.column("A"),[.1,12.0 / 11 - 1,11.0 / 12 - 1,12.0 / 11 - 1])
+        np.testing.assert_allclose(panel.column("B"),[np.nan,np.nan,.1,21.0 / 22 - 1])
+
+    def test_pairwise_covariance(self):
+        generator = np.random.RandomState(0)
+        dates = np.datetime64("2014-01-01") + np.arange(300)
+        prices = 100 * np.exp(np.cumsum(generator.standard_normal((300,4)) * .01,axis = 0))
+        stocks = []
+        for j in range(4):
+            traded = generator.rand(300) > .3
+            stocks.append(stock("S%d" % j,[str(date) for date in dates[traded]],prices[traded,j]))
+        panel = ReturnsPanel(stocks,missing = "pairwise")
+        covariance = panel.covariance()
+        np.testing.assert_allclose(covariance,covariance.T)
+        self.assertGreaterEqual(np.min(np.linalg.eigvalsh(covariance)),-1e-15)
+        # The pairwise estimate of this panel is positive definite already, and
+        # so its entries are the covariances over the days shared by each pair.
+        both = np.all(np.isfinite(panel.returns[:,:2]),axis = 1)
+        self.assertAlmostEqual(covariance[0,1],np.cov(panel.returns[both,:2],rowvar = 0)[0,1])
+
+    def test_complete_covariance_is_sample_covariance(self):
+        panel = ReturnsPanel([self.a,stock("C",DATES,[5.0,5.5,5.0,5.2,5.3])])
+        np.testing.assert_allclose(panel.covariance(),np.cov(panel.returns,rowvar = 0))
+
+    def test_nearest_positive_semidefinite(self):
+        matrix = np.array([[1.0,.9,-.9],[.9,1.0,.9],[-.9,.9,1.0]])
+        projected = nearest_positive_semidefinite(matrix)
+        eigenvalues = np.linalg.eigvalsh(projected)
+        self.assertGreaterEqual(np.min(eigenvalues),-1e-12)
+        self.assertAlmostEqual(np.sum(eigenvalues ** 2),np.sum(np.maximum(np.linalg.eigvalsh(matrix),0) ** 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
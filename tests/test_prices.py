@@ -0,0 +1,74 @@
+# test_prices.py: The columnar price history and the streaming parser of the
+#       CSV files of Yahoo Finance! (see prices.py).
+
+import io
+import unittest
+import numpy as np
+from financial_tools.prices import PriceHistory, read_yahoo_csv
+
+CSV = (b"Date,Open,High,Low,Close,Volume,Adj Close\n"
+       b"2013-01-04,10.5,11.0,10.0,10.25,300,10.25\n"
+       b"2013-01-03,10.0,10.75,9.75,10.5,200,10.5\r\n"
+       b"2013-01-02,9.5,10.25,9.25,10.0,100,10.0\n")
+
+
+class TestPriceHistory(unittest.TestCase):
+    def setUp(self):
+        self.prices = PriceHistory(["2013-01-04","2013-01-02","2013-01-03"],
+                                   {"Close" : [10.25,10.0,10.5],"Volume" : [300,100,200]})
+
+    def test_sorted(self):
+        self.assertEqual(self.prices.date_strings(),["2013-01-02","2013-01-03","2013-01-04"])
+        np.testing.assert_array_equal(self.prices["Close"],[10.0,10.5,10.25])
+        self.assertEqual(self.prices["Volume"].dtype,np.int64)
+        self.assertEqual(self.prices.fields(),["Close","Volume"])
+
+    def test_lookup(self):
+        self.assertEqual(self.prices.lookup("2013-01-03","Close"),10.5)
+        self.assertTrue("2013-01-04" in self.prices)
+        self.assertFalse("2013-01-05" in self.prices)
+        self.assertRaises(KeyError,self.prices.index_of,"2013-01-01")
+        self.assertEqual(self.prices.row(0),{"Close" : 10.0,"Volume" : 100})
+
+    def test_slice(self):
+        interval = self.prices.slice("2013-01-03","2013-01-04")
+        self.assertEqual(interval.date_strings(),["2013-01-03","2013-01-04"])
+        self.assertEqual(len(self.prices.slice(end = "2013-01-01")),0)
+        self.assertEqual(len(self.prices.slice("2013-01-03")),2)
+
+    def test_extend(self):
+        interval = self.prices.slice(end = "2013-01-03")
+        for i in range(100):
+            interval.extend([np.datetime64("2013-02-01") + i],{"Close" : [float(i)],"Volume" : [i]})
+        self.assertEqual(len(interval),102)
+        self.assertEqual(interval.lookup("2013-02-10","Close"),9.0)
+
+        # The original history, of which the interval was a view, is unchanged.
+        np.testing.assert_array_equal(self.prices["Close"],[10.0,10.5,10.25])
+        self.assertRaises(ValueError,interval.extend,["2013-01-01"],{"Close" : [1.0],"Volume" : [1]})
+        self.assertRaises(ValueError,interval.extend,["2014-01-01"],{"Close" : [1.0]})
+
+    def test_profile(self):
+        profile = self.prices.to_profile()
+        self.assertEqual(profile["2013-01-03"],{"Close" : "10.5","Volume" : "200"})
+
+
+class TestReadYahooCSV(unittest.TestCase):
+    def test_parse(self):
+        prices = read_yahoo_csv(io.BytesIO(CSV))
+        self.assertEqual(prices.date_strings(),["2013-01-02","2013-01-03","2013-01-04"])
+        np.testing.assert_array_equal(prices["High"],[10.25,10.75,11.0])
+        np.testing.assert_array_equal(prices["Volume"],[100,200,300])
+
+    def test_chunks(self):
+        # Lines split across the chunks of the source are parsed whole.
+        expected = read_yahoo_csv(io.BytesIO(CSV))
+        for chunk_size in (1,7,64):
+            prices = read_yahoo_csv(io.BytesIO(CSV),chunk_size = chunk_size)
+            np.testing.assert_array_equal(prices.dates,expected.dates)
+            for field in expected.fields():
+                np.testing.assert_array_equal(prices[field],expected[field])
+
+
+if __name__ == "__main__":
+    unittest.main()
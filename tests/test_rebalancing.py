@@ -0,0 +1,50 @@
+# test_rebalancing.py: The walk-forward re-optimization of a portfolio (see
+#       rebalancing.py).
+
+import unittest
+import numpy as np
+from financial_tools.portfolio import Portfolio
+from financial_tools.synthetic import synthetic_stock, synthetic_stocks
+
+
+class TestWalkForward(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        stocks = synthetic_stocks(["A","B"],400,correlation = .3,seed = 0)
+        risk_free = synthetic_stock("RF",400,drift = .02,volatility = 0.0,jump_intensity = 0.0)
+        cls.portfolio = Portfolio(stocks,risk_free = risk_free)
+        cls.walk_forward = cls.portfolio.walk_forward(window = 100,frequency = 20)
+
+    def test_minimum_variance(self):
+        # The weights of two assets with the minimum variance are known, and the
+        # window which slides forward matches one fitted afresh.
+        returns = self.portfolio.statistics["asset_returns"]
+        weights = self.walk_forward.results["weights"]["min_variance"]
+        self.assertEqual(len(weights),len(self.walk_forward.positions))
+        for position,w in zip(self.walk_forward.positions,weights):
+            S = np.cov(returns[position - 100:position].T)
+            first = np.clip((S[1,1] - S[0,1]) / (S[0,0] + S[1,1] - 2 * S[0,1]),0,1)
+            np.testing.assert_allclose(w,[first,1 - first],atol = 1e-3)
+
+    def test_constraints(self):
+        results = self.walk_forward.results
+        for objective in ("max_sharpe","min_variance","kelly"):
+            weights = results["weights"][objective]
+            np.testing.assert_allclose(np.sum(weights,axis = 1),1,atol = 1e-6)
+            self.assertTrue(np.all(weights > -1e-6))
+            np.testing.assert_allclose(results["turnover"][objective][0],np.sum(np.abs(weights[0])))
+            np.testing.assert_allclose(results["turnover"][objective][1:],np.sum(np.abs(np.diff(weights,axis = 0)),axis = 1))
+
+    def test_processes(self):
+        parallel = self.portfolio.walk_forward(window = 100,frequency = 20,processes = 2)
+        for objective in ("max_sharpe","min_variance","kelly"):
+            np.testing.assert_allclose(parallel.results["weights"][objective],
+                                       self.walk_forward.results["weights"][objective],atol = 1e-4)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError,self.portfolio.walk_forward,window = 1)
+        self.assertRaises(ValueError,self.portfolio.walk_forward,window = 100,covariance_estimator = "ewma")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+# test_risk.py: The value-at-risk and expected shortfall of the simulation
+#       risk engine (see risk.py).
+
+import unittest
+import numpy as np
+from scipy import stats
+from financial_tools.risk import RiskEngine, covariance_factor
+from financial_tools.portfolio import Portfolio
+from financial_tools.synthetic import synthetic_stock, synthetic_stocks
+
+
+class TestRiskEngine(unittest.TestCase):
+    def setUp(self):
+        generator = np.random.RandomState(0)
+        self.returns = generator.standard_normal((1000,3)) * .01
+
+    def test_historical_simulation(self):
+        engine = RiskEngine(self.returns,method = "historical")
+        weights = np.array([.2,.3,.5])
+        risk = engine.evaluate(weights,alpha = .05,position = 1000)
+        losses = -1000 * np.dot(self.returns,weights)
+        tail = np.sort(losses)[-50:]
+        self.assertAlmostEqual(risk["value_at_risk"],tail[0])
+        self.assertAlmostEqual(risk["expected_shortfall"],np.mean(tail))
+
+    def test_normal_value_at_risk(self):
+        engine = RiskEngine(self.returns,seed = 0,chunk_size = 30000)
+        weights = np.array([[.2,1.0],[.3,0.0],[.5,0.0]])
+        risk = engine.evaluate(weights,alpha = .05,position = 1000,scenarios = 200000)
+        mean, covariance = np.mean(self.returns,axis = 0), np.cov(self.returns,rowvar = 0)
+        for j in range(2):
+            w = weights[:,j]
+            expected = -1000 * (np.dot(mean,w) + stats.norm.ppf(.05) * np.sqrt(np.dot(w,np.dot(covariance,w))))
+            self.assertAlmostEqual(risk["value_at_risk"][j] / expected,1.0,places = 1)
+
+    def test_singular_covariance(self):
+        # The third asset is an exact combination of the first two, and there
+        # are more assets than days.
+        returns = np.column_stack((self.returns[:,:2],self.returns[:,0] - self.returns[:,1]))
+        risk = RiskEngine(returns,seed = 0).evaluate(np.ones(3) / 3,scenarios = 10000)
+        self.assertTrue(np.isfinite(risk["value_at_risk"]))
+        RiskEngine(self.returns[:2],seed = 0).evaluate(np.ones(3) / 3,scenarios = 1000)
+
+    def test_factor_of_matrix_which_is_not_positive_semidefinite(self):
+        covariance = np.array([[1.0,.9,-.9],[.9,1.0,.9],[-.9,.9,1.0]])
+        factor = covariance_factor(covariance)
+        eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+        clipped = np.dot(eigenvectors * np.maximum(eigenvalues,0),eigenvectors.T)
+        np.testing.assert_allclose(np.dot(factor,factor.T),clipped,atol = 1e-12)
+
+    def test_reproducible_across_chunks(self):
+        first = RiskEngine(self.returns,distribution = "t_copula",seed = 4,chunk_size = 5000)
+        second = RiskEngine(self.returns,distribution = "t_copula",seed = 4,chunk_size = 5000)
+        self.assertEqual(first.evaluate(np.ones(3) / 3,scenarios = 20000)["value_at_risk"],
+                         second.evaluate(np.ones(3) / 3,scenarios = 20000)["value_at_risk"])
+
+    def test_processes(self):
+        weights = np.array([[.2,1.0],[.3,0.0],[.5,0.0]])
+        for method in ("historical","monte_carlo"):
+            serial = RiskEngine(self.returns,method = method,seed = 1,chunk_size = 300)
+            parallel = RiskEngine(self.returns,method = method,seed = 1,chunk_size = 300,processes = 2)
+            expected = serial.evaluate(weights,scenarios = 3000)
+            risk = parallel.evaluate(weights,scenarios = 3000)
+            np.testing.assert_array_equal(risk["value_at_risk"],expected["value_at_risk"])
+            np.testing.assert_array_equal(risk["expected_shortfall"],expected["expected_shortfall"])
+
+
+class TestPortfolioRisk(unittest.TestCase):
+    def test_simulated_risk_of_optimal_portfolio_is_scalar(self):
+        stocks = synthetic_stocks(["S%d" % i for i in range(4)],504,correlation = .3,seed = 0)
+        risk_free = synthetic_stock("RF",504,drift = .02,volatility = 0.0,jump_intensity = 0.0)
+        portfolio = Portfolio(stocks,risk_free = risk_free)
+        risk = portfolio.calculate_simulated_risk(.05,position = 1000,scenarios = 10000,seed = 0)
+        self.assertEqual(np.ndim(risk),0)
+        self.assertIsInstance(float(risk),float)
+        risks = portfolio.calculate_simulated_risk(.05,position = 1000,scenarios = 10000,seed = 0,
+                                                  weights = np.ones((4,2)) / 4)
+        self.assertEqual(np.shape(risks),(2,))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+# test_stock.py: The statistics of a stock, their update as trading days are
+#       appended, and the value-at-risk of a position (see stock.py).
+
+import unittest
+import numpy as np
+from scipy import stats
+from financial_tools.stock import Stock
+from financial_tools.synthetic import synthetic_stock
+
+
+class TestStock(unittest.TestCase):
+    def test_parametric_risk(self):
+        stock = synthetic_stock("A",1008,seed = 0)
+        dof, loc, scale = stock.fit_t_distribution()
+        expected = -1000 * stats.t.ppf(.05,dof,loc,scale)
+        self.assertAlmostEqual(stock.calculate_parametric_risk(.05,1000),expected,places = 8)
+        self.assertGreater(stock.calculate_parametric_risk(.01,1000),stock.calculate_parametric_risk(.05,1000))
+
+    def test_batch_fit_agrees_with_single_fit(self):
+        stocks = [synthetic_stock("A",1008,seed = 1),synthetic_stock("B",504,seed = 2)]
+        Stock.fit_t_distributions(stocks)
+        for stock in stocks:
+            batch = stock.t_distribution[1]
+            del stock.t_distribution
+            np.testing.assert_allclose(batch,stock.fit_t_distribution(),rtol = 1e-5)
+
+    def test_extend_matches_recalculation(self):
+        whole = synthetic_stock("A",504,seed = 3)
+        stock = Stock("A",whole.date_range,prices = whole.prices.slice(None,whole.prices.dates[251]))
+        notifications = []
+        stock.subscribe(lambda stock,start: notifications.append(start))
+        stock.extend(whole.prices.slice(whole.prices.dates[252],None))
+        self.assertEqual(notifications,[252])
+        np.testing.assert_allclose(stock.statistics["returns"],whole.statistics["returns"])
+        self.assertAlmostEqual(stock.statistics["expected_return"],whole.statistics["expected_return"])
+
+    def test_load_many_passes_stocks_through(self):
+        stocks = [synthetic_stock(ticker,252,seed = 0) for ticker in ("A","B")]
+        loaded, failures = Stock.load_many(stocks)
+        self.assertEqual(failures,{})
+        self.assertTrue(all(a is b for a,b in zip(loaded,stocks)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+# test_sweep.py: The parallel parameter sweeps and their walk-forward
+#       validation (see sweep.py).
+
+import unittest
+import numpy as np
+from financial_tools.backtesting import run_backtest, column_statistics, threshold_strategy
+from financial_tools.portfolio import Portfolio
+from financial_tools import sweep as sweep_module
+from financial_tools.sweep import ParameterSweep
+from financial_tools.synthetic import synthetic_stock, synthetic_stocks
+
+
+class TestParameterSweep(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        stocks = synthetic_stocks(["A","B"],600,initial = 10.0,seed = 0)
+        risk_free = synthetic_stock("RF",600,drift = .02,volatility = 0.0,jump_intensity = 0.0)
+        cls.portfolio = Portfolio(stocks,risk_free = risk_free)
+        cls.grid = {"buy" : np.arange(9.0,10.0,.25),"sell" : np.arange(10.25,11.25,.25)}
+
+    def test_run(self):
+        sweep = ParameterSweep(self.portfolio,threshold_strategy,self.grid,transaction_cost = .001,chunk_size = 3)
+        rows = sweep.run()
+        self.assertEqual(len(rows),2 * 16)
+        ratios = [row["sharpe_ratio"] for row in rows]
+        self.assertEqual(ratios,sorted(ratios,reverse = True))
+
+        # Every row is the backtest of its parameters on its asset.
+        prices = self.portfolio.panel.prices
+        row = rows[0]
+        j = sweep.tickers.index(row["ticker"])
+        backtest = run_backtest(prices,threshold_strategy(prices,**row["parameters"]),transaction_cost = .001)
+        self.assertAlmostEqual(row["total_return"],column_statistics(backtest["asset_returns"])["total_return"][j])
+
+        self.assertEqual(sweep.run(top = 5),rows[:5])
+        drawdowns = [row["max_drawdown"] for row in sweep.run(metric = "max_drawdown",minimize = True)]
+        self.assertEqual(drawdowns,sorted(drawdowns))
+
+    def test_processes(self):
+        serial = ParameterSweep(self.portfolio,threshold_strategy,self.grid,chunk_size = 3).run()
+        parallel = ParameterSweep(self.portfolio,threshold_strategy,self.grid,chunk_size = 3,processes = 2).run()
+        key = lambda row: (row["ticker"],sorted(row["parameters"].items()))
+        self.assertEqual(sorted(serial,key = key),sorted(parallel,key = key))
+
+    def test_walk_forward(self):
+        sweep = ParameterSweep(self.portfolio,threshold_strategy,self.grid)
+        splits = sweep.walk_forward(in_sample = 200,out_of_sample = 100)
+        self.assertEqual(len(splits),4)
+        self.assertEqual(splits[0]["out_of_sample"][0],sweep.dates[200])
+        for split in splits:
+            for ticker,asset in split["assets"].items():
+                best = sweep.run(start = np.searchsorted(sweep.dates,split["in_sample"][0]),
+                                 end = np.searchsorted(sweep.dates,split["in_sample"][1]) + 1)
+                self.assertEqual(asset["in_sample"]["sharpe_ratio"],
+                                 max(row["sharpe_ratio"] for row in best if row["ticker"] == ticker))
+
+    def test_walk_forward_shares_one_pool(self):
+        pools = []
+        def counting_pool(*arguments,**keywords):
+            pools.append(arguments)
+            return pool_class(*arguments,**keywords)
+        pool_class, sweep_module.Pool = sweep_module.Pool, counting_pool
+        try:
+            parallel = ParameterSweep(self.portfolio,threshold_strategy,self.grid,chunk_size = 5,processes = 2)
+            splits = parallel.walk_forward(in_sample = 200,out_of_sample = 100)
+        finally:
+            sweep_module.Pool = pool_class
+        self.assertEqual(len(pools),1)
+        self.assertIs(parallel.pool,None)
+        serial = ParameterSweep(self.portfolio,threshold_strategy,self.grid).walk_forward(in_sample = 200,out_of_sample = 100)
+        self.assertEqual([split["assets"] for split in splits],[split["assets"] for split in serial])
+
+
+if __name__ == "__main__":
+    unittest.main()
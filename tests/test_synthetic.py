@@ -0,0 +1,55 @@
+# test_synthetic.py: The determinism and the statistical properties of the
+#       synthetic market data (see synthetic.py).
+
+import io
+import unittest
+import numpy as np
+from financial_tools.prices import read_yahoo_csv
+from financial_tools.synthetic import (trading_days, jump_diffusion, autoregressive, synthetic_stock,
+                                       synthetic_stocks, yahoo_csv)
+
+
+class TestSynthetic(unittest.TestCase):
+    def test_same_seed_same_data(self):
+        first = synthetic_stocks(["A","B"],252,correlation = .5,seed = 7)
+        second = synthetic_stocks(["A","B"],252,correlation = .5,seed = 7)
+        other = synthetic_stocks(["A","B"],252,correlation = .5,seed = 8)
+        for a,b,c in zip(first,second,other):
+            for field in a.prices.fields():
+                np.testing.assert_array_equal(a.prices[field],b.prices[field])
+            self.assertFalse(np.array_equal(a.prices["Close"],c.prices["Close"]))
+        np.testing.assert_array_equal(autoregressive(100,(.5,-.2),seed = 1),autoregressive(100,(.5,-.2),seed = 1))
+        self.assertEqual(yahoo_csv(first[0].prices),yahoo_csv(second[0].prices))
+
+    def test_trading_days(self):
+        days = trading_days(10,"2014-02-14")
+        self.assertEqual(len(days),10)
+        self.assertEqual(str(days[0]),"2014-02-14")
+        self.assertEqual(str(days[1]),"2014-02-17")
+        weekdays = (days.astype(np.int64) - 4) % 7
+        self.assertTrue(np.all(weekdays < 5))
+
+    def test_jump_diffusion_moments(self):
+        prices = jump_diffusion(50000,2,drift = .1,volatility = .2,correlation = .6,jump_intensity = 0.0,seed = 0)
+        log_returns = np.diff(np.log(prices),axis = 0)
+        self.assertAlmostEqual(np.std(log_returns[:,0]) * np.sqrt(252),.2,places = 2)
+        self.assertAlmostEqual(np.corrcoef(log_returns.T)[0,1],.6,places = 1)
+
+    def test_autoregressive_coefficients(self):
+        series = autoregressive(20000,(.5,-.2),mu = 3.0,seed = 2)
+        design = np.column_stack((np.ones(len(series) - 2),series[1:-1],series[:-2]))
+        coefficients = np.linalg.lstsq(design,series[2:],rcond = None)[0]
+        np.testing.assert_allclose(coefficients[1:],[.5,-.2],atol = .03)
+        self.assertAlmostEqual(np.mean(series),3.0,places = 1)
+
+    def test_yahoo_csv_round_trip(self):
+        stock = synthetic_stock("A",100,seed = 3)
+        parsed = read_yahoo_csv(io.BytesIO(yahoo_csv(stock.prices)))
+        np.testing.assert_array_equal(parsed.dates,stock.prices.dates)
+        np.testing.assert_allclose(parsed["Close"],stock.prices["Close"],atol = 5e-5)
+        self.assertTrue(np.all(stock.prices["High"] >= np.maximum(stock.prices["Open"],stock.prices["Close"])))
+        self.assertTrue(np.all(stock.prices["Low"] <= np.minimum(stock.prices["Open"],stock.prices["Close"])))
+
+
+if __name__ == "__main__":
+    unittest.main()